@@ -10,7 +10,7 @@ import structlog
 
 from app.core.security import (
     get_current_user,
-    require_role,
+    ADMIN_ONLY,
     create_access_token,
     verify_password,
     get_password_hash
@@ -148,7 +148,7 @@ async def get_system_status(
 
 @router.post("/emergency-stop")
 async def emergency_stop(
-    current_user: dict = Depends(require_role(["admin"])),
+    current_user: dict = Depends(ADMIN_ONLY),
     session=Depends(get_session)
 ):
     """
@@ -184,7 +184,7 @@ async def emergency_stop(
 
 @router.post("/resume")
 async def resume_provisioning(
-    current_user: dict = Depends(require_role(["admin"])),
+    current_user: dict = Depends(ADMIN_ONLY),
     session=Depends(get_session)
 ):
     """Reactive le systeme de provisionnement."""
@@ -234,7 +234,7 @@ async def get_recent_audit_logs(
 
 @router.get("/config")
 async def get_gateway_config(
-    current_user: dict = Depends(require_role(["admin"]))
+    current_user: dict = Depends(ADMIN_ONLY)
 ):
     """Recupere la configuration actuelle de la gateway (sans secrets)."""
     return {
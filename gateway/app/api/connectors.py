@@ -11,8 +11,9 @@ from app.models.connector import (
     ConnectorResponse, ConnectorListResponse, ConnectorTestRequest,
     ConnectorTestResult, ConnectorTypeInfo
 )
-from app.core.security import get_current_user, require_role
+from app.core.security import get_current_user, ADMIN_ONLY
 from app.core.database import get_session
+from app.connectors.connector_factory import ConnectorFactory
 from app.services.connector_management_service import ConnectorManagementService
 
 router = APIRouter()
@@ -89,7 +90,7 @@ async def get_connector(
 @router.post("/", response_model=ConnectorResponse)
 async def create_connector(
     data: ConnectorCreate,
-    current_user: dict = Depends(require_role(["admin"])),
+    current_user: dict = Depends(ADMIN_ONLY),
     session=Depends(get_session)
 ):
     """Cree un nouveau connecteur."""
@@ -100,6 +101,7 @@ async def create_connector(
             data=data,
             created_by=current_user["username"]
         )
+        await ConnectorFactory().invalidate_target(data.name, session)
         logger.info(
             "Connector created",
             connector_id=connector.id,
@@ -120,7 +122,7 @@ async def create_connector(
 async def update_connector(
     connector_id: str,
     data: ConnectorUpdate,
-    current_user: dict = Depends(require_role(["admin"])),
+    current_user: dict = Depends(ADMIN_ONLY),
     session=Depends(get_session)
 ):
     """Met a jour un connecteur existant."""
@@ -139,6 +141,7 @@ async def update_connector(
             data=data,
             updated_by=current_user["username"]
         )
+        await ConnectorFactory().invalidate_target(connector.name, session)
         logger.info(
             "Connector updated",
             connector_id=connector_id,
@@ -157,7 +160,7 @@ async def update_connector(
 @router.delete("/{connector_id}")
 async def delete_connector(
     connector_id: str,
-    current_user: dict = Depends(require_role(["admin"])),
+    current_user: dict = Depends(ADMIN_ONLY),
     session=Depends(get_session)
 ):
     """Supprime un connecteur."""
@@ -172,6 +175,7 @@ async def delete_connector(
 
     deleted = await service.delete_connector(connector_id)
     if deleted:
+        await ConnectorFactory().invalidate_target(connector.name, session)
         logger.info(
             "Connector deleted",
             connector_id=connector_id,
@@ -249,7 +253,7 @@ async def test_connector_preview(
 async def toggle_connector(
     connector_id: str,
     is_active: bool,
-    current_user: dict = Depends(require_role(["admin"])),
+    current_user: dict = Depends(ADMIN_ONLY),
     session=Depends(get_session)
 ):
     """Active ou desactive un connecteur."""
@@ -263,6 +267,7 @@ async def toggle_connector(
         )
 
     updated = await service.toggle_connector(connector_id, is_active)
+    await ConnectorFactory().invalidate_target(connector.name, session)
     logger.info(
         "Connector toggled",
         connector_id=connector_id,
@@ -275,7 +280,7 @@ async def toggle_connector(
 
 @router.post("/health-check")
 async def run_health_checks(
-    current_user: dict = Depends(require_role(["admin"])),
+    current_user: dict = Depends(ADMIN_ONLY),
     session=Depends(get_session)
 ):
     """Execute les tests de sante sur tous les connecteurs actifs."""
@@ -3,14 +3,15 @@ API de comparaison en temps reel entre systemes.
 Fonctionnalite innovante pour visualiser l'etat de synchronisation.
 """
 from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from pydantic import BaseModel
 from datetime import datetime
 import structlog
 import asyncio
 
-from app.core.security import get_current_user, require_role
+from app.core.security import get_current_user, ADMIN_OR_ENGINEER
 from app.core.database import get_session
+from app.connectors.base import BaseConnector
 from app.connectors.ldap_connector import LDAPConnector
 from app.connectors.sql_connector import SQLConnector
 from app.connectors.odoo_connector import OdooConnector
@@ -47,6 +48,17 @@ class UserCrossReference(BaseModel):
     sync_status: str
 
 
+async def _count_accounts(connector: BaseConnector, sample_size: int = 5) -> Tuple[int, List[Dict[str, Any]]]:
+    """Compte les comptes en flux (page par page) et garde les premiers en exemple."""
+    total = 0
+    sample: List[Dict[str, Any]] = []
+    async for account in connector.iter_accounts():
+        if total < sample_size:
+            sample.append(account)
+        total += 1
+    return total, sample
+
+
 @router.get("/stats", response_model=Dict[str, Any])
 async def get_live_stats(
     current_user: dict = Depends(get_current_user)
@@ -65,14 +77,14 @@ async def get_live_stats(
     try:
         ldap = LDAPConnector()
         if await ldap.test_connection():
-            ldap_users = await ldap.list_accounts()
+            total, sample = await _count_accounts(ldap)
             stats["systems"]["LDAP"] = {
                 "status": "connected",
-                "total_users": len(ldap_users),
+                "total_users": total,
                 "sample": [{"uid": u.get("uid"), "cn": u.get("cn"), "mail": u.get("mail")}
-                          for u in ldap_users[:5]]
+                          for u in sample]
             }
-            stats["total_identities"] += len(ldap_users)
+            stats["total_identities"] += total
         else:
             stats["systems"]["LDAP"] = {"status": "disconnected", "total_users": 0}
     except Exception as e:
@@ -82,14 +94,14 @@ async def get_live_stats(
     try:
         sql = SQLConnector()
         if await sql.test_connection():
-            sql_users = await sql.list_accounts()
+            total, sample = await _count_accounts(sql)
             stats["systems"]["SQL"] = {
                 "status": "connected",
-                "total_users": len(sql_users),
+                "total_users": total,
                 "sample": [{"username": u.get("username"), "email": u.get("email"),
-                           "department": u.get("department")} for u in sql_users[:5]]
+                           "department": u.get("department")} for u in sample]
             }
-            stats["total_identities"] += len(sql_users)
+            stats["total_identities"] += total
         else:
             stats["systems"]["SQL"] = {"status": "disconnected", "total_users": 0}
     except Exception as e:
@@ -99,14 +111,14 @@ async def get_live_stats(
     try:
         odoo = OdooConnector()
         if await odoo.test_connection():
-            odoo_users = await odoo.list_accounts()
+            total, sample = await _count_accounts(odoo)
             stats["systems"]["Odoo"] = {
                 "status": "connected",
-                "total_users": len(odoo_users),
+                "total_users": total,
                 "sample": [{"id": u.get("id"), "name": u.get("name"), "login": u.get("login")}
-                          for u in odoo_users[:5]]
+                          for u in sample]
             }
-            stats["total_identities"] += len(odoo_users)
+            stats["total_identities"] += total
         else:
             stats["systems"]["Odoo"] = {"status": "disconnected", "total_users": 0}
     except Exception as e:
@@ -117,7 +129,7 @@ async def get_live_stats(
 
 @router.get("/compare", response_model=Dict[str, Any])
 async def compare_systems(
-    current_user: dict = Depends(require_role(["admin", "iam_engineer"]))
+    current_user: dict = Depends(ADMIN_OR_ENGINEER)
 ):
     """
     Compare en temps reel les utilisateurs entre tous les systemes.
@@ -138,8 +150,7 @@ async def compare_systems(
     # LDAP
     try:
         ldap = LDAPConnector()
-        ldap_list = await ldap.list_accounts()
-        for u in ldap_list:
+        async for u in ldap.iter_accounts():
             email = u.get("mail", "").lower() if u.get("mail") else None
             uid = u.get("uid", "").lower() if u.get("uid") else None
             key = email or uid
@@ -156,8 +167,7 @@ async def compare_systems(
     # SQL
     try:
         sql = SQLConnector()
-        sql_list = await sql.list_accounts()
-        for u in sql_list:
+        async for u in sql.iter_accounts():
             email = u.get("email", "").lower() if u.get("email") else None
             username = u.get("username", "").lower() if u.get("username") else None
             key = email or username
@@ -174,8 +184,7 @@ async def compare_systems(
     # Odoo
     try:
         odoo = OdooConnector()
-        odoo_list = await odoo.list_accounts()
-        for u in odoo_list:
+        async for u in odoo.iter_accounts():
             login = u.get("login", "").lower() if u.get("login") else None
             name = u.get("name", "").lower().replace(" ", ".") if u.get("name") else None
             key = login or name
@@ -338,7 +347,7 @@ async def get_user_cross_reference(
 async def sync_user_to_systems(
     identifier: str,
     target_systems: List[str],
-    current_user: dict = Depends(require_role(["admin", "iam_engineer"]))
+    current_user: dict = Depends(ADMIN_OR_ENGINEER)
 ):
     """
     Synchronise un utilisateur vers les systemes specifies.
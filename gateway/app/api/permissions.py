@@ -8,7 +8,7 @@ from pydantic import BaseModel
 from datetime import datetime
 import structlog
 
-from app.core.security import get_current_user, require_role
+from app.core.security import get_current_user, ADMIN_OR_ENGINEER
 from app.core.memory_store import memory_store
 
 router = APIRouter()
@@ -281,7 +281,7 @@ async def get_user_permission(
 @router.post("/assign", response_model=Dict[str, Any])
 async def assign_permission_level(
     assignment: PermissionAssignment,
-    current_user: dict = Depends(require_role(["admin", "iam_engineer"]))
+    current_user: dict = Depends(ADMIN_OR_ENGINEER)
 ):
     """
     Assigne un niveau de droits a un utilisateur.
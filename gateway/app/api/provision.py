@@ -5,15 +5,19 @@ Ce module gere le provisionnement des utilisateurs.
 Quand MIDPOINT_ENABLED=True, toutes les operations passent par MidPoint
 qui se charge de propager aux systemes cibles.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from typing import List, Optional
-import json
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+import asyncio
+import hashlib
+import orjson
 import structlog
-from datetime import datetime
+from datetime import datetime, timezone
 
 from app.models.provision import (
     ProvisioningRequest,
     ProvisioningResponse,
+    BatchProvisioningRequest,
     ProvisioningOperation,
     OperationStatus,
     TargetSystem
@@ -22,22 +26,32 @@ from app.core.security import get_current_user
 from app.core.database import get_session
 from app.core.config import settings
 from app.core.memory_store import memory_store
-from app.services.provision_service import ProvisionService
+from app.core.audit_batcher import audit_batcher
+from app.core.bg import GatherBackgroundTasks, get_bg
+from app.core.task_scheduler import spawn
+from app.core.responses import make_etag, not_modified, not_modified_response
+from app.services.provision_service import ProvisionService, get_provision_service
 from app.services.midpoint_provision_service import MidPointProvisionService, get_midpoint_provision_service
-from app.services.rule_engine import RuleEngine
-from app.services.workflow_service import WorkflowService
-from app.services.audit_service import AuditService
+from app.services.rule_engine import RuleEngine, get_rule_engine
+from app.services.workflow_service import WorkflowService, get_workflow_service
+from app.services.audit_service import AuditService, get_audit_service
 
 router = APIRouter()
 logger = structlog.get_logger()
 
+# Provisionnements en cours, par empreinte de requete (deduplication des retries)
+_inflight_provisions: Dict[bytes, asyncio.Future] = {}
+
 
 @router.post("/", response_model=ProvisioningResponse)
 async def provision_account(
     request: ProvisioningRequest,
-    background_tasks: BackgroundTasks,
+    background_tasks: GatherBackgroundTasks = Depends(get_bg),
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    provision_service: ProvisionService = Depends(get_provision_service),
+    rule_engine: RuleEngine = Depends(get_rule_engine),
+    workflow_service: WorkflowService = Depends(get_workflow_service),
+    audit_service: AuditService = Depends(get_audit_service)
 ):
     """
     Execute une operation de provisionnement.
@@ -49,6 +63,122 @@ async def provision_account(
     Sinon:
         Gateway -> [LDAP, Odoo, SQL, ...] directement
     """
+    return await _provision_core(
+        request,
+        background_tasks,
+        current_user,
+        provision_service,
+        rule_engine,
+        workflow_service,
+        audit_service
+    )
+
+
+@router.post("/batch", response_model=Dict[str, Any])
+async def provision_batch(
+    batch: BatchProvisioningRequest,
+    background_tasks: GatherBackgroundTasks = Depends(get_bg),
+    current_user: dict = Depends(get_current_user),
+    provision_service: ProvisionService = Depends(get_provision_service),
+    rule_engine: RuleEngine = Depends(get_rule_engine),
+    workflow_service: WorkflowService = Depends(get_workflow_service),
+    audit_service: AuditService = Depends(get_audit_service)
+):
+    """
+    Execute un lot d'operations de provisionnement.
+
+    Une seule authentification pour tout le lot; chaque requete est
+    traitee en parallele et a sa propre reponse (id, status, body).
+    """
+    results = await asyncio.gather(
+        *[
+            _provision_core(
+                item.body,
+                background_tasks,
+                current_user,
+                provision_service,
+                rule_engine,
+                workflow_service,
+                audit_service
+            )
+            for item in batch.requests
+        ],
+        return_exceptions=True
+    )
+
+    responses = []
+    for item, result in zip(batch.requests, results):
+        if isinstance(result, HTTPException):
+            responses.append({"id": item.id, "status": result.status_code, "body": {"detail": result.detail}})
+        elif isinstance(result, Exception):
+            responses.append({"id": item.id, "status": 500, "body": {"detail": str(result)}})
+        else:
+            responses.append({"id": item.id, "status": 200, "body": result.model_dump(mode="json")})
+
+    return {"responses": responses}
+
+
+async def _provision_core(
+    request: ProvisioningRequest,
+    background_tasks: GatherBackgroundTasks,
+    current_user: dict,
+    provision_service: ProvisionService,
+    rule_engine: RuleEngine,
+    workflow_service: WorkflowService,
+    audit_service: AuditService
+) -> ProvisioningResponse:
+    """
+    Provisionne un compte (partage entre la route unitaire et /batch).
+
+    Les requetes identiques simultanees (retries MidPoint) partagent
+    une seule execution.
+    """
+    key = hashlib.blake2b(
+        current_user["username"].encode() + b"\0" + request.model_dump_json().encode(),
+        digest_size=16
+    ).digest()
+
+    pending = _inflight_provisions.get(key)
+    if pending is not None:
+        logger.info("Duplicate provisioning request joined", account_id=request.account_id)
+        return await asyncio.shield(pending)
+
+    pending = asyncio.get_running_loop().create_future()
+    _inflight_provisions[key] = pending
+    try:
+        response = await _provision_once(
+            request,
+            background_tasks,
+            current_user,
+            provision_service,
+            rule_engine,
+            workflow_service,
+            audit_service
+        )
+        pending.set_result(response)
+        return response
+    except asyncio.CancelledError:
+        pending.cancel()
+        raise
+    except Exception as e:
+        pending.set_exception(e)
+        # Marque l'exception comme recuperee s'il n'y a aucun doublon en attente
+        pending.exception()
+        raise
+    finally:
+        del _inflight_provisions[key]
+
+
+async def _provision_once(
+    request: ProvisioningRequest,
+    background_tasks: GatherBackgroundTasks,
+    current_user: dict,
+    provision_service: ProvisionService,
+    rule_engine: RuleEngine,
+    workflow_service: WorkflowService,
+    audit_service: AuditService
+) -> ProvisioningResponse:
+    """Execute le provisionnement (MidPoint ou direct)."""
     logger.info(
         "Provisioning request received",
         operation=request.operation,
@@ -60,16 +190,23 @@ async def provision_account(
 
     # Use MidPoint as hub if enabled
     if settings.MIDPOINT_ENABLED:
-        return await _provision_via_midpoint(request, current_user, session)
+        return await _provision_via_midpoint(request, current_user)
 
     # Legacy: direct provisioning to targets
-    return await _provision_direct(request, background_tasks, current_user, session)
+    return await _provision_direct(
+        request,
+        background_tasks,
+        current_user,
+        provision_service,
+        rule_engine,
+        workflow_service,
+        audit_service
+    )
 
 
 async def _provision_via_midpoint(
     request: ProvisioningRequest,
-    current_user: dict,
-    session
+    current_user: dict
 ) -> ProvisioningResponse:
     """
     Provision via MidPoint hub.
@@ -81,7 +218,7 @@ async def _provision_via_midpoint(
     - Audit logging
     """
     try:
-        midpoint_service = await get_midpoint_provision_service(session)
+        midpoint_service = await get_midpoint_provision_service()
 
         result = await midpoint_service.provision(
             request=request,
@@ -89,13 +226,13 @@ async def _provision_via_midpoint(
         )
 
         # Add audit log
-        memory_store.add_audit_log({
+        await audit_batcher.process({
             "type": "provision",
             "action": request.operation.value,
             "account_id": request.account_id,
             "actor": current_user["username"],
             "target_systems": ["MIDPOINT"],
-            "original_targets": [t.value for t in request.target_systems],
+            "original_targets": request.target_values,
             "status": "success",
             "midpoint_hub": True
         })
@@ -111,7 +248,7 @@ async def _provision_via_midpoint(
     except Exception as e:
         logger.error("MidPoint provisioning failed", error=str(e))
 
-        memory_store.add_audit_log({
+        await audit_batcher.process({
             "type": "provision",
             "action": request.operation.value,
             "account_id": request.account_id,
@@ -129,19 +266,22 @@ async def _provision_via_midpoint(
 
 async def _provision_direct(
     request: ProvisioningRequest,
-    background_tasks: BackgroundTasks,
+    background_tasks: GatherBackgroundTasks,
     current_user: dict,
-    session
+    provision_service: ProvisionService,
+    rule_engine: RuleEngine,
+    workflow_service: WorkflowService,
+    audit_service: AuditService
 ) -> ProvisioningResponse:
     """
     Legacy: Direct provisioning to target systems.
 
     Used when MIDPOINT_ENABLED=False.
     """
-    provision_service = ProvisionService(session)
-    rule_engine = RuleEngine(session)
-    workflow_service = WorkflowService(session)
-    audit_service = AuditService(session)
+    target_values = request.target_values
+    now = datetime.now(timezone.utc)
+    now_iso = now.isoformat()
+    operation = None
 
     try:
         # Create operation record
@@ -150,87 +290,116 @@ async def _provision_direct(
             created_by=current_user["username"]
         )
 
-        # Log audit event
-        await audit_service.log_provision_request(operation, current_user)
-
-        # Apply rules to calculate attributes
         # Include account_id in attributes for rule engine
-        enriched_attributes = {**request.attributes, "account_id": request.account_id}
-        calculated_attrs = await rule_engine.calculate_attributes(
+        enriched_attributes = request.attributes.copy()
+        enriched_attributes["account_id"] = request.account_id
+
+        # Extraire l'email du manager des attributs
+        manager_email = request.attributes.get("manager_email", "") if request.require_approval else ""
+
+        if request.require_approval and not manager_email:
+            # Workflow standard sans email: les regles seront calculees a l'approbation
+            _, workflow_instance = await asyncio.gather(
+                audit_service.log_provision_request(operation, current_user),
+                workflow_service.start_pre_workflow(
+                    operation_id=operation.id,
+                    context={
+                        "account_id": request.account_id,
+                        "operation": request.operation,
+                        **request.attributes
+                    }
+                )
+            )
+
+            # Donnees necessaires au calcul differe des regles (continue_after_approval)
+            pending_operation = {
+                "operation_id": operation.id,
+                "account_id": request.account_id,
+                "operation": request.operation.value,
+                "status": "awaiting_approval",
+                "target_systems": target_values,
+                "user_data": request.attributes,
+                "policy_id": request.policy_id,
+                "calculated_attributes": {},
+                "created_by": current_user["username"],
+                "workflow_id": workflow_instance.id,
+                "timestamp": now_iso
+            }
+            memory_store.save_operation(operation.id, pending_operation)
+            # L'approbation peut etre traitee par un autre worker
+            await provision_service.share_operation(operation.id, pending_operation)
+
+            return ProvisioningResponse(
+                status=OperationStatus.AWAITING_APPROVAL,
+                operation_id=operation.id,
+                calculated_attributes={},
+                message=f"Workflow d'approbation demarre. Instance: {workflow_instance.id}",
+                timestamp=now
+            )
+
+        calculate = rule_engine.calculate_attributes(
             attributes=enriched_attributes,
             target_systems=request.target_systems,
             policy_id=request.policy_id
         )
 
-        # Check if workflow approval is needed
-        if request.require_approval:
-            # Extraire l'email du manager des attributs
-            manager_email = request.attributes.get("manager_email", "")
-
-            if manager_email:
-                # Creer un workflow simplifie avec notification email
-                user_data = {
-                    **request.attributes,
-                    "account_id": request.account_id,
-                }
-                workflow_result = await workflow_service.create_approval_workflow(
+        if manager_email:
+            # Creer un workflow simplifie avec notification email, pendant le calcul des regles
+            _, calculated_attrs, workflow_result = await asyncio.gather(
+                audit_service.log_provision_request(operation, current_user),
+                calculate,
+                workflow_service.create_approval_workflow(
                     operation_id=operation.id,
-                    user_data=user_data,
+                    user_data=enriched_attributes,
                     manager_email=manager_email,
                     requester=current_user["username"]
                 )
+            )
 
-                # Sauvegarder l'operation avec statut pending
-                memory_store.save_operation(operation.id, {
-                    "operation_id": operation.id,
-                    "account_id": request.account_id,
-                    "operation": request.operation.value,
-                    "status": "awaiting_approval",
-                    "target_systems": [t.value for t in request.target_systems],
-                    "user_data": request.attributes,
-                    "calculated_attributes": calculated_attrs,
-                    "created_by": current_user["username"],
-                    "workflow_id": workflow_result.get("workflow_id"),
-                    "timestamp": datetime.utcnow().isoformat()
-                })
-
-                # Add audit log
-                memory_store.add_audit_log({
+            pending_operation = {
+                "operation_id": operation.id,
+                "account_id": request.account_id,
+                "operation": request.operation.value,
+                "status": "awaiting_approval",
+                "target_systems": target_values,
+                "user_data": request.attributes,
+                "policy_id": request.policy_id,
+                "calculated_attributes": calculated_attrs,
+                "created_by": current_user["username"],
+                "workflow_id": workflow_result.get("workflow_id"),
+                "timestamp": now_iso
+            }
+
+            # Save operation and its audit log in one store write
+            memory_store.save_operation_with_audit(
+                operation.id,
+                pending_operation,
+                {
                     "type": "workflow",
                     "action": "approval_requested",
                     "account_id": request.account_id,
                     "actor": current_user["username"],
-                    "target_systems": [t.value for t in request.target_systems],
+                    "target_systems": target_values,
                     "status": "pending",
                     "manager_email": manager_email
-                })
-
-                return ProvisioningResponse(
-                    status=OperationStatus.AWAITING_APPROVAL,
-                    operation_id=operation.id,
-                    calculated_attributes=calculated_attrs,
-                    message=f"Demande en attente d'approbation. Email envoye a {manager_email}",
-                    timestamp=datetime.utcnow()
-                )
-            else:
-                # Workflow standard sans email
-                workflow_instance = await workflow_service.start_pre_workflow(
-                    operation_id=operation.id,
-                    context={
-                        "account_id": request.account_id,
-                        "operation": request.operation,
-                        "calculated_attributes": calculated_attrs,
-                        **request.attributes
-                    }
-                )
+                }
+            )
+            # L'approbation peut etre traitee par un autre worker
+            await provision_service.share_operation(operation.id, pending_operation)
+
+            return ProvisioningResponse(
+                status=OperationStatus.AWAITING_APPROVAL,
+                operation_id=operation.id,
+                calculated_attributes=calculated_attrs,
+                message=f"Demande en attente d'approbation. Email envoye a {manager_email}",
+                timestamp=now
+            )
 
-                return ProvisioningResponse(
-                    status=OperationStatus.AWAITING_APPROVAL,
-                    operation_id=operation.id,
-                    calculated_attributes=calculated_attrs,
-                    message=f"Workflow d'approbation demarre. Instance: {workflow_instance.id}",
-                    timestamp=datetime.utcnow()
-                )
+        # Log audit event while applying rules to calculate attributes
+        _, calculated_attrs = await asyncio.gather(
+            audit_service.log_provision_request(operation, current_user),
+            calculate
+        )
 
         # Execute provisioning
         result = await provision_service.execute_provisioning(
@@ -238,48 +407,46 @@ async def _provision_direct(
             calculated_attributes=calculated_attrs
         )
 
-        # Log success
-        await audit_service.log_provision_success(operation, result)
-
-        # Save operation to memory store
-        memory_store.save_operation(operation.id, {
-            "operation_id": operation.id,
-            "account_id": request.account_id,
-            "operation": request.operation.value,
-            "status": "success",
-            "target_systems": [t.value for t in request.target_systems],
-            "calculated_attributes": calculated_attrs,
-            "created_by": current_user["username"],
-            "timestamp": datetime.utcnow().isoformat()
-        })
-
-        # Add audit log
-        memory_store.add_audit_log({
-            "type": "provision",
-            "action": "create",
-            "account_id": request.account_id,
-            "actor": current_user["username"],
-            "target_systems": [t.value for t in request.target_systems],
-            "status": "success"
-        })
+        # Log success after the response is sent
+        background_tasks.add_task(audit_service.log_provision_success, operation, result)
+
+        # Save operation and its audit log in one store write
+        memory_store.save_operation_with_audit(
+            operation.id,
+            {
+                "operation_id": operation.id,
+                "account_id": request.account_id,
+                "operation": request.operation.value,
+                "status": "success",
+                "target_systems": target_values,
+                "calculated_attributes": calculated_attrs,
+                "created_by": current_user["username"],
+                "timestamp": now_iso
+            },
+            {
+                "type": "provision",
+                "action": "create",
+                "account_id": request.account_id,
+                "actor": current_user["username"],
+                "target_systems": target_values,
+                "status": "success"
+            }
+        )
 
         return ProvisioningResponse(
             status=OperationStatus.SUCCESS,
             operation_id=operation.id,
             calculated_attributes=calculated_attrs,
             message="Provisionnement termine avec succes sur tous les systemes cibles",
-            timestamp=datetime.utcnow()
+            timestamp=now
         )
 
     except Exception as e:
         logger.error("Provisioning failed", error=str(e), operation_id=operation.id if operation else None)
 
-        # Attempt rollback
+        # Attempt rollback (detached: background tasks are not run on error responses)
         if operation:
-            background_tasks.add_task(
-                provision_service.rollback_operation,
-                operation.id
-            )
+            spawn("rollback", provision_service.rollback_operation, operation.id)
             await audit_service.log_provision_failure(operation, str(e))
 
         raise HTTPException(
@@ -291,11 +458,12 @@ async def _provision_direct(
 @router.get("/{operation_id}", response_model=ProvisioningResponse)
 async def get_operation_status(
     operation_id: str,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    provision_service: ProvisionService = Depends(get_provision_service)
 ):
     """Recupere le statut d'une operation de provisionnement."""
-    provision_service = ProvisionService(session)
     operation = await provision_service.get_operation(operation_id)
 
     if not operation:
@@ -304,27 +472,41 @@ async def get_operation_status(
             detail=f"Operation {operation_id} not found"
         )
 
-    calculated_attrs = json.loads(operation.calculated_attributes) if operation.calculated_attributes else {}
-
-    return ProvisioningResponse(
-        status=operation.status,
-        operation_id=operation.id,
-        calculated_attributes=calculated_attrs,
-        message=operation.error_message or "Operation en cours",
-        timestamp=operation.updated_at
+    etag = make_etag(
+        operation_id,
+        operation.get("status"),
+        operation.get("updated_at") or operation.get("timestamp")
     )
+    if not_modified(request, response, etag):
+        return not_modified_response(etag)
+
+    payload = {
+        "status": operation.get("status"),
+        "operation_id": operation.get("operation_id", operation_id),
+        "message": operation.get("message") or "Operation en cours",
+        "timestamp": operation.get("updated_at") or operation.get("timestamp")
+    }
+    calculated_attrs = operation.get("calculated_attributes") or {}
+
+    if isinstance(calculated_attrs, str):
+        # JSON brut insere tel quel dans l'enveloppe: parse + validation
+        # en une seule passe par pydantic-core
+        return ProvisioningResponse.model_validate_json(
+            orjson.dumps(payload)[:-1] + b',"calculated_attributes":' + calculated_attrs.encode() + b"}"
+        )
+
+    payload["calculated_attributes"] = calculated_attrs
+    return ProvisioningResponse.model_validate(payload)
 
 
-@router.post("/{operation_id}/rollback")
+@router.post("/{operation_id}/rollback", response_model=Dict[str, Any])
 async def rollback_operation(
     operation_id: str,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    provision_service: ProvisionService = Depends(get_provision_service),
+    audit_service: AuditService = Depends(get_audit_service)
 ):
     """Annule une operation de provisionnement (rollback)."""
-    provision_service = ProvisionService(session)
-    audit_service = AuditService(session)
-
     operation = await provision_service.get_operation(operation_id)
     if not operation:
         raise HTTPException(
@@ -338,12 +520,27 @@ async def rollback_operation(
             detail="Only completed operations can be rolled back"
         )
 
-    result = await provision_service.rollback_operation(operation_id)
-    await audit_service.log_rollback(operation, current_user)
+    result, _ = await asyncio.gather(
+        provision_service.rollback_operation(operation_id),
+        audit_service.log_rollback(operation, current_user)
+    )
 
     return {"message": "Rollback executed", "result": result}
 
 
+# Champs exposes par list_operations (avec leur valeur par defaut)
+OPERATION_LIST_FIELDS = {
+    "operation_id": None,
+    "account_id": None,
+    "status": None,
+    "calculated_attributes": {},
+    "user_data": {},
+    "target_systems": [],
+    "message": "",
+    "timestamp": None
+}
+
+
 @router.get("/")
 async def list_operations(
     account_id: Optional[str] = None,
@@ -354,35 +551,49 @@ async def list_operations(
     session=Depends(get_session)
 ):
     """Liste les operations de provisionnement."""
-    operations = memory_store.list_operations(
+    operations = memory_store.iter_operations(
         account_id=account_id,
         status=status,
         limit=limit,
-        offset=offset
+        offset=offset,
+        fields=OPERATION_LIST_FIELDS
     )
 
-    return [
-        {
-            "operation_id": op.get("operation_id"),
-            "account_id": op.get("account_id"),
-            "status": op.get("status"),
-            "calculated_attributes": op.get("calculated_attributes", {}),
-            "user_data": op.get("user_data", {}),
-            "target_systems": op.get("target_systems", []),
-            "message": op.get("message", ""),
-            "timestamp": op.get("timestamp")
-        }
-        for op in operations
-    ]
+    return StreamingResponse(
+        _iter_json_array(operations),
+        media_type="application/json"
+    )
 
 
-@router.put("/{operation_id}")
+# Nombre d'elements encodes par morceau de reponse
+JSON_STREAM_CHUNK_SIZE = 64
+
+
+async def _iter_json_array(items: Iterable[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Encode un tableau JSON par morceaux de JSON_STREAM_CHUNK_SIZE elements."""
+    separator = b"["
+    chunk = []
+    for item in items:
+        chunk.append(separator)
+        chunk.append(orjson.dumps(item))
+        separator = b","
+        if len(chunk) >= 2 * JSON_STREAM_CHUNK_SIZE:
+            yield b"".join(chunk)
+            chunk = []
+    if separator == b"[":
+        chunk.append(separator)
+    chunk.append(b"]")
+    yield b"".join(chunk)
+
+
+@router.put("/{operation_id}", response_model=Dict[str, Any])
 async def update_operation(
     operation_id: str,
     request: ProvisioningRequest,
-    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    provision_service: ProvisionService = Depends(get_provision_service),
+    rule_engine: RuleEngine = Depends(get_rule_engine),
+    audit_service: AuditService = Depends(get_audit_service)
 ):
     """
     Met a jour un utilisateur existant.
@@ -396,10 +607,6 @@ async def update_operation(
         user=current_user["username"]
     )
 
-    provision_service = ProvisionService(session)
-    rule_engine = RuleEngine(session)
-    audit_service = AuditService(session)
-
     # Get existing operation
     existing_op = memory_store.get_operation(operation_id)
     if not existing_op:
@@ -408,6 +615,8 @@ async def update_operation(
             detail=f"Operation {operation_id} not found"
         )
 
+    target_values = request.target_values
+
     try:
         # Create new operation for update
         operation = await provision_service.create_operation(
@@ -415,12 +624,16 @@ async def update_operation(
             created_by=current_user["username"]
         )
 
-        # Calculate new attributes
-        enriched_attributes = {**request.attributes, "account_id": request.account_id}
-        calculated_attrs = await rule_engine.calculate_attributes(
-            attributes=enriched_attributes,
-            target_systems=request.target_systems,
-            policy_id=request.policy_id
+        # Log audit event while calculating new attributes
+        enriched_attributes = request.attributes.copy()
+        enriched_attributes["account_id"] = request.account_id
+        _, calculated_attrs = await asyncio.gather(
+            audit_service.log_provision_request(operation, current_user),
+            rule_engine.calculate_attributes(
+                attributes=enriched_attributes,
+                target_systems=request.target_systems,
+                policy_id=request.policy_id
+            )
         )
 
         # Execute update provisioning
@@ -429,28 +642,29 @@ async def update_operation(
             calculated_attributes=calculated_attrs
         )
 
-        # Update memory store
-        memory_store.save_operation(operation.id, {
-            "operation_id": operation.id,
-            "account_id": request.account_id,
-            "operation": "update",
-            "status": "success",
-            "target_systems": [t.value for t in request.target_systems],
-            "user_data": request.attributes,
-            "calculated_attributes": calculated_attrs,
-            "created_by": current_user["username"],
-            "timestamp": datetime.utcnow().isoformat()
-        })
-
-        # Add audit log
-        memory_store.add_audit_log({
-            "type": "provision",
-            "action": "update",
-            "account_id": request.account_id,
-            "actor": current_user["username"],
-            "target_systems": [t.value for t in request.target_systems],
-            "status": "success"
-        })
+        # Save operation and its audit log in one store write
+        memory_store.save_operation_with_audit(
+            operation.id,
+            {
+                "operation_id": operation.id,
+                "account_id": request.account_id,
+                "operation": "update",
+                "status": "success",
+                "target_systems": target_values,
+                "user_data": request.attributes,
+                "calculated_attributes": calculated_attrs,
+                "created_by": current_user["username"],
+                "timestamp": datetime.utcnow().isoformat()
+            },
+            {
+                "type": "provision",
+                "action": "update",
+                "account_id": request.account_id,
+                "actor": current_user["username"],
+                "target_systems": target_values,
+                "status": "success"
+            }
+        )
 
         return {
             "status": "success",
@@ -467,11 +681,11 @@ async def update_operation(
         )
 
 
-@router.delete("/{operation_id}")
+@router.delete("/{operation_id}", response_model=Dict[str, Any])
 async def delete_operation(
     operation_id: str,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    provision_service: ProvisionService = Depends(get_provision_service)
 ):
     """
     Supprime un utilisateur des systemes cibles.
@@ -482,8 +696,6 @@ async def delete_operation(
         user=current_user["username"]
     )
 
-    provision_service = ProvisionService(session)
-
     # Get existing operation
     existing_op = memory_store.get_operation(operation_id)
     if not existing_op:
@@ -499,33 +711,47 @@ async def delete_operation(
     errors = []
     deleted_systems = []
 
+    async def _delete_one(target: str, connector) -> None:
+        # Get the account identifier for each system
+        target_attrs = calculated_attrs.get(target, {})
+        account_identifier = target_attrs.get("uid") or target_attrs.get("username") or account_id
+
+        await connector.delete_account(account_identifier)
+        logger.info(f"Deleted from {target}", account_id=account_identifier)
+
     try:
-        # Delete from each target system
+        # Resolve connectors first (sync), then delete from every target concurrently
+        deletions = {}
         for target in target_systems:
             try:
-                connector = provision_service._get_connector(target)
-                if connector:
-                    # Get the account identifier for each system
-                    target_attrs = calculated_attrs.get(target, {})
-                    account_identifier = target_attrs.get("uid") or target_attrs.get("username") or account_id
-
-                    await connector.delete_account(account_identifier)
-                    deleted_systems.append(target)
-                    logger.info(f"Deleted from {target}", account_id=account_identifier)
+                connector = provision_service.connector_factory.get_connector(target)
+                deletions[target] = _delete_one(target, connector)
             except Exception as e:
                 errors.append(f"{target}: {str(e)}")
                 logger.error(f"Failed to delete from {target}", error=str(e))
 
+        results = await asyncio.gather(*deletions.values(), return_exceptions=True)
+
+        for target, outcome in zip(deletions, results):
+            if isinstance(outcome, Exception):
+                errors.append(f"{target}: {str(outcome)}")
+                logger.error(f"Failed to delete from {target}", error=str(outcome))
+            else:
+                deleted_systems.append(target)
+
         # Update operation status
+        message_parts = ["Supprime de: " + ", ".join(deleted_systems)]
+        if errors:
+            message_parts.append("Erreurs: " + ", ".join(errors))
         new_status = "deleted" if not errors else "partially_deleted"
         memory_store.update_operation(operation_id, {
             "status": new_status,
-            "message": f"Supprime de: {', '.join(deleted_systems)}" + (f". Erreurs: {', '.join(errors)}" if errors else ""),
+            "message": ". ".join(message_parts),
             "updated_at": datetime.utcnow().isoformat()
         })
 
         # Add audit log
-        memory_store.add_audit_log({
+        await audit_batcher.process({
             "type": "provision",
             "action": "delete",
             "account_id": account_id,
@@ -534,12 +760,14 @@ async def delete_operation(
             "status": "success" if not errors else "partial"
         })
 
-        return {
+        response = {
             "status": "success" if not errors else "partial",
             "message": f"Utilisateur supprime de {len(deleted_systems)} systeme(s)",
-            "deleted_from": deleted_systems,
-            "errors": errors if errors else None
+            "deleted_from": deleted_systems
         }
+        if errors:
+            response["errors"] = errors
+        return response
 
     except Exception as e:
         logger.error("Delete failed", error=str(e), operation_id=operation_id)
@@ -551,39 +779,54 @@ async def delete_operation(
 
 # ==================== MidPoint-specific endpoints ====================
 
-@router.get("/midpoint/users")
-async def list_midpoint_users(
-    current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
-):
-    """List all users from MidPoint."""
+def require_midpoint_enabled():
+    """Rejette les requetes /midpoint/* quand MidPoint est desactive."""
     if not settings.MIDPOINT_ENABLED:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="MidPoint is not enabled"
         )
 
-    midpoint_service = await get_midpoint_provision_service(session)
+
+midpoint_router = APIRouter(
+    prefix="/midpoint",
+    dependencies=[Depends(require_midpoint_enabled)]
+)
+
+
+async def _iter_json_list(key: str, items: List[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Encode {key: [...], "count": N} element par element."""
+    yield b'{"' + key.encode() + b'":['
+    for index, item in enumerate(items):
+        if index:
+            yield b","
+        yield orjson.dumps(item)
+    yield b'],"count":' + str(len(items)).encode() + b"}"
+
+
+def _stream_json_list(key: str, items: List[Dict[str, Any]]) -> StreamingResponse:
+    """Reponse JSON streamee pour les listes MidPoint."""
+    return StreamingResponse(_iter_json_list(key, items), media_type="application/json")
+
+
+@midpoint_router.get("/users")
+async def list_midpoint_users(
+    current_user: dict = Depends(get_current_user),
+    midpoint_service: MidPointProvisionService = Depends(get_midpoint_provision_service)
+):
+    """List all users from MidPoint."""
     users = await midpoint_service.list_users()
 
-    return {"users": users, "count": len(users)}
+    return _stream_json_list("users", users)
 
 
-@router.get("/midpoint/users/{account_id}")
+@midpoint_router.get("/users/{account_id}")
 async def get_midpoint_user(
     account_id: str,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    midpoint_service: MidPointProvisionService = Depends(get_midpoint_provision_service)
 ):
     """Get a specific user from MidPoint with their shadow accounts."""
-    if not settings.MIDPOINT_ENABLED:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="MidPoint is not enabled"
-        )
-
-    midpoint_service = await get_midpoint_provision_service(session)
-
     user = await midpoint_service.get_user(account_id)
     if not user:
         raise HTTPException(
@@ -601,77 +844,56 @@ async def get_midpoint_user(
     }
 
 
-@router.get("/midpoint/roles")
+@midpoint_router.get("/roles")
 async def list_midpoint_roles(
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    midpoint_service: MidPointProvisionService = Depends(get_midpoint_provision_service)
 ):
     """List all roles from MidPoint."""
-    if not settings.MIDPOINT_ENABLED:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="MidPoint is not enabled"
-        )
-
-    midpoint_service = await get_midpoint_provision_service(session)
     roles = await midpoint_service.get_roles()
 
-    return {"roles": roles, "count": len(roles)}
+    return _stream_json_list("roles", roles)
 
 
-@router.post("/midpoint/users/{account_id}/roles/{role_name}")
+@midpoint_router.post("/users/{account_id}/roles/{role_name}")
 async def assign_role_to_user(
     account_id: str,
     role_name: str,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    midpoint_service: MidPointProvisionService = Depends(get_midpoint_provision_service)
 ):
     """Assign a role to a user (triggers provisioning to role's Resources)."""
-    if not settings.MIDPOINT_ENABLED:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="MidPoint is not enabled"
-        )
+    result = await midpoint_service.assign_role(account_id, role_name)
 
-    midpoint_service = await get_midpoint_provision_service(session)
-    success = await midpoint_service.assign_role(account_id, role_name)
-
-    if success:
-        memory_store.add_audit_log({
-            "type": "role_assignment",
-            "action": "assign",
-            "account_id": account_id,
-            "role": role_name,
-            "actor": current_user["username"],
-            "status": "success"
-        })
-        return {"success": True, "message": f"Role {role_name} assigned to {account_id}"}
-    else:
+    if not result.ok:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to assign role {role_name}"
+            status_code=result.status_code,
+            detail=result.reason or f"Failed to assign role {role_name}"
         )
 
+    await audit_batcher.process({
+        "type": "role_assignment",
+        "action": "assign",
+        "account_id": account_id,
+        "role": role_name,
+        "actor": current_user["username"],
+        "status": "success"
+    })
+    return {"success": True, "message": f"Role {role_name} assigned to {account_id}"}
+
 
-@router.delete("/midpoint/users/{account_id}/roles/{role_name}")
+@midpoint_router.delete("/users/{account_id}/roles/{role_name}")
 async def remove_role_from_user(
     account_id: str,
     role_name: str,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    midpoint_service: MidPointProvisionService = Depends(get_midpoint_provision_service)
 ):
     """Remove a role from a user (may trigger deprovisioning)."""
-    if not settings.MIDPOINT_ENABLED:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="MidPoint is not enabled"
-        )
-
-    midpoint_service = await get_midpoint_provision_service(session)
     success = await midpoint_service.remove_role(account_id, role_name)
 
     if success:
-        memory_store.add_audit_log({
+        await audit_batcher.process({
             "type": "role_assignment",
             "action": "remove",
             "account_id": account_id,
@@ -687,25 +909,18 @@ async def remove_role_from_user(
         )
 
 
-@router.get("/midpoint/resources")
+@midpoint_router.get("/resources")
 async def list_midpoint_resources(
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    midpoint_service: MidPointProvisionService = Depends(get_midpoint_provision_service)
 ):
     """List all configured Resources (target systems) in MidPoint."""
-    if not settings.MIDPOINT_ENABLED:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="MidPoint is not enabled"
-        )
-
-    midpoint_service = await get_midpoint_provision_service(session)
     resources = await midpoint_service.get_resources()
 
-    return {"resources": resources, "count": len(resources)}
+    return _stream_json_list("resources", resources)
 
 
-@router.get("/midpoint/status")
+@router.get("/midpoint/status", response_model=Dict[str, Any])
 async def midpoint_status(
     current_user: dict = Depends(get_current_user),
     session=Depends(get_session)
@@ -723,3 +938,6 @@ async def midpoint_status(
         "url": settings.MIDPOINT_URL,
         "user": settings.MIDPOINT_USER
     }
+
+
+router.include_router(midpoint_router)
@@ -1,18 +1,20 @@
 """
 API de reconciliation avec MidPoint
 """
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, BackgroundTasks
+from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 from datetime import datetime
 import structlog
 
 from app.models.provision import TargetSystem
-from app.core.security import get_current_user, require_role
+from app.core.security import get_current_user, ADMIN_ONLY, ADMIN_OR_ENGINEER
 from app.core.database import get_session
+from app.core.task_scheduler import schedule
 from app.core.memory_store import memory_store
-from app.services.reconciliation_service import ReconciliationService
-from app.services.audit_service import AuditService
+from app.core.responses import orjson_response, make_etag, not_modified, not_modified_response
+from app.services.reconciliation_service import ReconciliationService, get_reconciliation_service
+from app.services.audit_service import AuditService, get_audit_service
 
 router = APIRouter()
 logger = structlog.get_logger()
@@ -52,13 +54,11 @@ class DiscrepancyReport(BaseModel):
 async def start_reconciliation(
     request: ReconciliationRequest,
     background_tasks: BackgroundTasks,
-    current_user: dict = Depends(require_role(["admin", "iam_engineer"])),
-    session=Depends(get_session)
+    current_user: dict = Depends(ADMIN_OR_ENGINEER),
+    recon_service: ReconciliationService = Depends(get_reconciliation_service),
+    audit_service: AuditService = Depends(get_audit_service)
 ):
     """Demarre une reconciliation entre MidPoint et les systemes cibles."""
-    recon_service = ReconciliationService(session)
-    audit_service = AuditService(session)
-
     logger.info(
         "Starting reconciliation",
         targets=request.target_systems,
@@ -102,6 +102,8 @@ async def start_reconciliation(
 
     # Run reconciliation in background
     background_tasks.add_task(
+        schedule,
+        "reconcile",
         recon_service.run_reconciliation,
         job.id
     )
@@ -120,11 +122,12 @@ async def start_reconciliation(
 @router.get("/status/{job_id}", response_model=ReconciliationStatus)
 async def get_reconciliation_status(
     job_id: str,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    recon_service: ReconciliationService = Depends(get_reconciliation_service)
 ):
     """Recupere le statut d'une reconciliation."""
-    recon_service = ReconciliationService(session)
     job = await recon_service.get_job(job_id)
 
     if not job:
@@ -133,6 +136,16 @@ async def get_reconciliation_status(
             detail=f"Reconciliation job {job_id} not found"
         )
 
+    etag = make_etag(
+        job.id,
+        job.status,
+        job.processed_accounts,
+        job.discrepancies_found,
+        job.completed_at
+    )
+    if not_modified(request, response, etag):
+        return not_modified_response(etag)
+
     return job
 
 
@@ -145,7 +158,7 @@ async def list_reconciliation_jobs(
 ):
     """Liste les jobs de reconciliation."""
     jobs = memory_store.list_jobs(limit=limit, offset=offset)
-    return jobs
+    return orjson_response(jobs)
 
 
 @router.get("/{job_id}/discrepancies", response_model=List[DiscrepancyReport])
@@ -153,28 +166,26 @@ async def get_discrepancies(
     job_id: str,
     target_system: Optional[TargetSystem] = None,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    recon_service: ReconciliationService = Depends(get_reconciliation_service)
 ):
     """Recupere les divergences trouvees lors d'une reconciliation."""
-    recon_service = ReconciliationService(session)
-    return await recon_service.get_discrepancies(
+    discrepancies = await recon_service.get_discrepancies(
         job_id=job_id,
         target_system=target_system
     )
+    return orjson_response(discrepancies)
 
 
-@router.post("/{job_id}/resolve")
+@router.post("/{job_id}/resolve", response_model=Dict[str, Any])
 async def resolve_discrepancies(
     job_id: str,
     action: str,  # "use_midpoint", "use_target", "manual"
     discrepancy_ids: Optional[List[str]] = None,
-    current_user: dict = Depends(require_role(["admin", "iam_engineer"])),
-    session=Depends(get_session)
+    current_user: dict = Depends(ADMIN_OR_ENGINEER),
+    recon_service: ReconciliationService = Depends(get_reconciliation_service),
+    audit_service: AuditService = Depends(get_audit_service)
 ):
     """Resout les divergences d'une reconciliation."""
-    recon_service = ReconciliationService(session)
-    audit_service = AuditService(session)
-
     if action not in ["use_midpoint", "use_target", "manual", "ignore"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -197,29 +208,42 @@ async def resolve_discrepancies(
     return result
 
 
-@router.post("/sync-cache")
+def _parse_target_systems(raw: Optional[str]) -> Optional[List[TargetSystem]]:
+    """Decode une liste de systemes cibles separes par des virgules (ex: "LDAP,SQL")."""
+    if not raw:
+        return None
+    try:
+        return [TargetSystem(value.strip().upper()) for value in raw.split(",") if value.strip()]
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post("/sync-cache", response_model=Dict[str, Any])
 async def sync_account_cache(
-    target_systems: Optional[List[TargetSystem]] = None,
+    target_systems: Optional[str] = None,
     background_tasks: BackgroundTasks = None,
-    current_user: dict = Depends(require_role(["admin"])),
-    session=Depends(get_session)
+    current_user: dict = Depends(ADMIN_ONLY),
+    recon_service: ReconciliationService = Depends(get_reconciliation_service)
 ):
     """Synchronise le cache des comptes avec les systemes cibles."""
-    recon_service = ReconciliationService(session)
-
+    targets = _parse_target_systems(target_systems)
     background_tasks.add_task(
+        schedule,
+        "cache_sync",
         recon_service.sync_cache,
-        target_systems
+        targets
     )
 
-    return {"message": "Cache sync started", "target_systems": target_systems}
+    return {"message": "Cache sync started", "target_systems": targets}
 
 
-@router.get("/cache/stats")
+@router.get("/cache/stats", response_model=Dict[str, Any])
 async def get_cache_stats(
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    recon_service: ReconciliationService = Depends(get_reconciliation_service)
 ):
     """Recupere les statistiques du cache des comptes."""
-    recon_service = ReconciliationService(session)
     return await recon_service.get_cache_stats()
@@ -2,7 +2,7 @@
 API de gestion des regles dynamiques
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
 import json
 import structlog
 
@@ -13,12 +13,13 @@ from app.models.rules import (
     RuleTestResponse,
     RuleStatus,
     RuleType,
+    RuleVersion,
     PolicyConfig
 )
-from app.core.security import get_current_user, require_role
-from app.core.database import get_session
-from app.services.rule_engine import RuleEngine
-from app.services.audit_service import AuditService
+from app.core.security import get_current_user, ADMIN_ONLY, ADMIN_OR_ENGINEER
+from app.core.responses import orjson_response
+from app.services.rule_engine import RuleEngine, get_rule_engine
+from app.services.audit_service import AuditService, get_audit_service
 
 router = APIRouter()
 logger = structlog.get_logger()
@@ -30,28 +31,25 @@ async def list_rules(
     rule_type: Optional[RuleType] = None,
     status: Optional[RuleStatus] = None,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    rule_engine: RuleEngine = Depends(get_rule_engine)
 ):
     """Liste toutes les regles disponibles."""
-    rule_engine = RuleEngine(session)
     rules = await rule_engine.list_rules(
         target_system=target_system,
         rule_type=rule_type,
         status=status
     )
-    return rules
+    return orjson_response(rules)
 
 
 @router.post("/", response_model=Rule)
 async def create_rule(
     rule: RuleDefinition,
-    current_user: dict = Depends(require_role(["admin", "iam_engineer"])),
-    session=Depends(get_session)
+    current_user: dict = Depends(ADMIN_OR_ENGINEER),
+    rule_engine: RuleEngine = Depends(get_rule_engine),
+    audit_service: AuditService = Depends(get_audit_service)
 ):
     """Cree une nouvelle regle de calcul."""
-    rule_engine = RuleEngine(session)
-    audit_service = AuditService(session)
-
     try:
         new_rule = await rule_engine.create_rule(
             definition=rule,
@@ -62,7 +60,7 @@ async def create_rule(
             rule_id=new_rule.id,
             action="create",
             user=current_user["username"],
-            details=rule.dict()
+            details=rule.model_dump(mode="json")
         )
 
         logger.info("Rule created", rule_id=new_rule.id, name=rule.name)
@@ -79,10 +77,9 @@ async def create_rule(
 async def get_rule(
     rule_id: str,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    rule_engine: RuleEngine = Depends(get_rule_engine)
 ):
     """Recupere une regle par son ID."""
-    rule_engine = RuleEngine(session)
     rule = await rule_engine.get_rule(rule_id)
 
     if not rule:
@@ -97,13 +94,11 @@ async def get_rule(
 async def update_rule(
     rule_id: str,
     rule: RuleDefinition,
-    current_user: dict = Depends(require_role(["admin", "iam_engineer"])),
-    session=Depends(get_session)
+    current_user: dict = Depends(ADMIN_OR_ENGINEER),
+    rule_engine: RuleEngine = Depends(get_rule_engine),
+    audit_service: AuditService = Depends(get_audit_service)
 ):
     """Met a jour une regle existante."""
-    rule_engine = RuleEngine(session)
-    audit_service = AuditService(session)
-
     existing = await rule_engine.get_rule(rule_id)
     if not existing:
         raise HTTPException(
@@ -117,26 +112,31 @@ async def update_rule(
         updated_by=current_user["username"]
     )
 
+    # Seuls les champs modifies sont journalises
+    old = existing.model_dump(mode="json")
+    new = rule.model_dump(mode="json")
+    changed = [field for field, value in new.items() if old.get(field) != value]
     await audit_service.log_rule_change(
         rule_id=rule_id,
         action="update",
         user=current_user["username"],
-        details={"old": existing.dict(), "new": rule.dict()}
+        details={
+            "old": {field: old.get(field) for field in changed},
+            "new": {field: new[field] for field in changed}
+        }
     )
 
     return updated_rule
 
 
-@router.delete("/{rule_id}")
+@router.delete("/{rule_id}", response_model=Dict[str, Any])
 async def delete_rule(
     rule_id: str,
-    current_user: dict = Depends(require_role(["admin"])),
-    session=Depends(get_session)
+    current_user: dict = Depends(ADMIN_ONLY),
+    rule_engine: RuleEngine = Depends(get_rule_engine),
+    audit_service: AuditService = Depends(get_audit_service)
 ):
     """Supprime une regle (soft delete)."""
-    rule_engine = RuleEngine(session)
-    audit_service = AuditService(session)
-
     existing = await rule_engine.get_rule(rule_id)
     if not existing:
         raise HTTPException(
@@ -160,11 +160,9 @@ async def delete_rule(
 async def test_rule(
     request: RuleTestRequest,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    rule_engine: RuleEngine = Depends(get_rule_engine)
 ):
     """Teste une regle avec des donnees d'exemple."""
-    rule_engine = RuleEngine(session)
-
     result = await rule_engine.test_rule(
         rule_id=request.rule_id,
         test_data=request.test_data
@@ -173,14 +171,13 @@ async def test_rule(
     return result
 
 
-@router.get("/{rule_id}/versions")
+@router.get("/{rule_id}/versions", response_model=List[RuleVersion])
 async def get_rule_versions(
     rule_id: str,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    rule_engine: RuleEngine = Depends(get_rule_engine)
 ):
     """Recupere l'historique des versions d'une regle."""
-    rule_engine = RuleEngine(session)
     versions = await rule_engine.get_rule_versions(rule_id)
     return versions
 
@@ -189,13 +186,11 @@ async def get_rule_versions(
 async def restore_rule_version(
     rule_id: str,
     version: int,
-    current_user: dict = Depends(require_role(["admin", "iam_engineer"])),
-    session=Depends(get_session)
+    current_user: dict = Depends(ADMIN_OR_ENGINEER),
+    rule_engine: RuleEngine = Depends(get_rule_engine),
+    audit_service: AuditService = Depends(get_audit_service)
 ):
     """Restaure une version precedente d'une regle."""
-    rule_engine = RuleEngine(session)
-    audit_service = AuditService(session)
-
     restored = await rule_engine.restore_version(rule_id, version)
 
     await audit_service.log_rule_change(
@@ -212,21 +207,19 @@ async def restore_rule_version(
 @router.get("/policies/", response_model=List[PolicyConfig])
 async def list_policies(
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    rule_engine: RuleEngine = Depends(get_rule_engine)
 ):
     """Liste toutes les politiques de provisionnement."""
-    rule_engine = RuleEngine(session)
     return await rule_engine.list_policies()
 
 
 @router.post("/policies/", response_model=PolicyConfig)
 async def create_policy(
     policy: PolicyConfig,
-    current_user: dict = Depends(require_role(["admin"])),
-    session=Depends(get_session)
+    current_user: dict = Depends(ADMIN_ONLY),
+    rule_engine: RuleEngine = Depends(get_rule_engine)
 ):
     """Cree une nouvelle politique."""
-    rule_engine = RuleEngine(session)
     return await rule_engine.create_policy(policy, current_user["username"])
 
 
@@ -234,10 +227,9 @@ async def create_policy(
 async def get_policy(
     policy_id: str,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    rule_engine: RuleEngine = Depends(get_rule_engine)
 ):
     """Recupere une politique par son ID."""
-    rule_engine = RuleEngine(session)
     policy = await rule_engine.get_policy(policy_id)
     if not policy:
         raise HTTPException(
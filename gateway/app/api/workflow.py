@@ -1,9 +1,10 @@
 """
 API de gestion des workflows d'approbation
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from fastapi.responses import HTMLResponse, RedirectResponse
-from typing import List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from string import Template
 import structlog
 
 from app.models.workflow import (
@@ -15,135 +16,169 @@ from app.models.workflow import (
     ApprovalStatus,
     ApprovalDecision
 )
-from app.core.security import get_current_user, require_role
-from app.core.database import get_session
-from app.services.workflow_service import WorkflowService
-from app.services.provision_service import ProvisionService
-from app.services.audit_service import AuditService
-from app.core.memory_store import memory_store
+from app.core.security import get_current_user, ADMIN_ONLY
+from app.services.workflow_service import (
+    WorkflowService,
+    get_workflow_service,
+    CONFIG_CACHE_PREFIX,
+    INSTANCE_CACHE_PREFIX,
+    INSTANCE_LIST_CACHE_PREFIX,
+    HISTORY_CACHE_PREFIX
+)
+from app.services.provision_service import get_provision_service
+from app.core.audit_batcher import audit_batcher
+from app.core.cache import cache
+from app.core.events import approval_bus
+from app.core.config import settings
+from app.core.responses import encode_json, etag_matches, make_etag, not_modified_response, orjson_response
 
 router = APIRouter()
 logger = structlog.get_logger()
 
 
+async def _cached_body(key: str, load: Callable[[], Awaitable[Any]]) -> bytes:
+    """Corps JSON lu dans le cache Redis, ou charge puis mis en cache."""
+    body = await cache.get(key)
+    if body is None:
+        body = encode_json(await load())
+        await cache.set(key, body, settings.WORKFLOW_CACHE_TTL)
+    return body
+
+
+def _json_body(request: Request, body: bytes) -> Response:
+    """Reponse JSON avec ETag (hash du corps) ; 304 si le client a deja cette version."""
+    etag = make_etag(body)
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
 @router.get("/configs", response_model=List[WorkflowConfig])
 async def list_workflow_configs(
+    request: Request,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Liste toutes les configurations de workflow."""
-    workflow_service = WorkflowService(session)
-    return await workflow_service.list_configs()
+    return _json_body(request, await _cached_body(CONFIG_CACHE_PREFIX + "all", workflow_service.list_configs))
 
 
 @router.post("/configs", response_model=WorkflowConfig)
 async def create_workflow_config(
     config: WorkflowDefinition,
-    current_user: dict = Depends(require_role(["admin"])),
-    session=Depends(get_session)
+    current_user: dict = Depends(ADMIN_ONLY),
+    workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Cree une nouvelle configuration de workflow."""
-    workflow_service = WorkflowService(session)
     return await workflow_service.create_config(config)
 
 
 @router.get("/configs/{config_id}", response_model=WorkflowConfig)
 async def get_workflow_config(
     config_id: str,
+    request: Request,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Recupere une configuration de workflow."""
-    workflow_service = WorkflowService(session)
-    config = await workflow_service.get_config(config_id)
-    if not config:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Workflow config {config_id} not found"
-        )
-    return config
+    async def load():
+        config = await workflow_service.get_config(config_id)
+        if not config:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Workflow config {config_id} not found"
+            )
+        return config
+
+    return _json_body(request, await _cached_body(f"{CONFIG_CACHE_PREFIX}id:{config_id}", load))
 
 
 @router.put("/configs/{config_id}", response_model=WorkflowConfig)
 async def update_workflow_config(
     config_id: str,
     config: WorkflowDefinition,
-    current_user: dict = Depends(require_role(["admin"])),
-    session=Depends(get_session)
+    current_user: dict = Depends(ADMIN_ONLY),
+    workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Met a jour une configuration de workflow."""
-    workflow_service = WorkflowService(session)
     return await workflow_service.update_config(config_id, config)
 
 
 # Workflow instances
 @router.get("/instances", response_model=List[WorkflowInstanceResponse])
 async def list_workflow_instances(
+    request: Request,
     status: Optional[ApprovalStatus] = None,
     approver_id: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Liste les instances de workflow."""
-    workflow_service = WorkflowService(session)
-    return await workflow_service.list_instances(
-        status=status,
-        approver_id=approver_id or current_user["username"],
-        limit=limit,
-        offset=offset
-    )
+    approver_id = approver_id or current_user["username"]
+    # list_instances ne filtre pas par approbateur : une seule entree partagee
+    key = f"{INSTANCE_LIST_CACHE_PREFIX}{status.value if status else ''}:{limit}:{offset}"
+
+    async def load():
+        return await workflow_service.list_instances(
+            status=status,
+            approver_id=approver_id,
+            limit=limit,
+            offset=offset
+        )
+
+    return _json_body(request, await _cached_body(key, load))
 
 
-@router.get("/instances/pending")
+@router.get("/instances/pending", response_model=List[Dict[str, Any]])
 async def get_pending_approvals(
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Recupere les approbations en attente pour l'utilisateur courant."""
-    workflow_service = WorkflowService(session)
-    return await workflow_service.get_pending_approvals(current_user["username"])
+    return orjson_response(await workflow_service.get_pending_approvals(current_user["username"]))
 
 
 @router.get("/instances/{instance_id}", response_model=WorkflowInstanceResponse)
 async def get_workflow_instance(
     instance_id: str,
+    request: Request,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Recupere les details d'une instance de workflow."""
-    workflow_service = WorkflowService(session)
-    instance = await workflow_service.get_instance(instance_id)
-    if not instance:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Workflow instance {instance_id} not found"
-        )
-    return instance
+    async def load():
+        instance = await workflow_service.get_instance(instance_id)
+        if not instance:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Workflow instance {instance_id} not found"
+            )
+        return instance
+
+    return _json_body(request, await _cached_body(INSTANCE_CACHE_PREFIX + instance_id, load))
 
 
-@router.post("/instances/{instance_id}/approve")
+@router.post("/instances/{instance_id}/approve", response_model=Dict[str, Any])
 async def approve_workflow(
     instance_id: str,
     request: ApprovalRequest,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Approuve une etape de workflow."""
-    workflow_service = WorkflowService(session)
-    provision_service = ProvisionService(session)
-    audit_service = AuditService(session)
-
     # Verify user is allowed to approve
-    instance = await workflow_service.get_instance(instance_id)
+    instance, allowed = await workflow_service.get_instance_with_auth(
+        instance_id, current_user["username"]
+    )
     if not instance:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Workflow instance {instance_id} not found"
         )
 
-    if not await workflow_service.can_approve(instance_id, current_user["username"]):
+    if not allowed:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to approve this workflow"
@@ -157,16 +192,22 @@ async def approve_workflow(
         comments=request.comments
     )
 
-    await audit_service.log_workflow_approval(instance_id, current_user, request.comments)
-
-    # Check if workflow is complete
+    # Audit mis en file (ecrit par lots hors du chemin de la requete)
+    await audit_batcher.process({
+        "type": "workflow",
+        "action": "approve",
+        "instance_id": instance_id,
+        "operation_id": instance.operation_id,
+        "actor": current_user["username"],
+        "comments": request.comments,
+        "status": "success"
+    })
+
+    # Workflow complet : les appels connecteurs partent apres la reponse (approval_bus)
     if result.get("workflow_complete"):
-        # Continue provisioning
-        operation = await provision_service.continue_after_approval(
-            instance.operation_id
-        )
-        logger.info(
-            "Provisioning continued after approval",
+        await approval_bus.process({"operation_id": instance.operation_id})
+        logger.debug(
+            "Provisioning queued after approval",
             operation_id=instance.operation_id,
             instance_id=instance_id
         )
@@ -174,26 +215,24 @@ async def approve_workflow(
     return result
 
 
-@router.post("/instances/{instance_id}/reject")
+@router.post("/instances/{instance_id}/reject", response_model=Dict[str, Any])
 async def reject_workflow(
     instance_id: str,
     request: ApprovalRequest,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Rejette une etape de workflow."""
-    workflow_service = WorkflowService(session)
-    provision_service = ProvisionService(session)
-    audit_service = AuditService(session)
-
-    instance = await workflow_service.get_instance(instance_id)
+    instance, allowed = await workflow_service.get_instance_with_auth(
+        instance_id, current_user["username"]
+    )
     if not instance:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Workflow instance {instance_id} not found"
         )
 
-    if not await workflow_service.can_approve(instance_id, current_user["username"]):
+    if not allowed:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to reject this workflow"
@@ -206,10 +245,19 @@ async def reject_workflow(
         comments=request.comments
     )
 
-    await audit_service.log_workflow_rejection(instance_id, current_user, request.comments)
-
-    # Cancel the operation
-    await provision_service.cancel_operation(
+    # Audit mis en file (ecrit par lots hors du chemin de la requete)
+    await audit_batcher.process({
+        "type": "workflow",
+        "action": "reject",
+        "instance_id": instance_id,
+        "operation_id": instance.operation_id,
+        "actor": current_user["username"],
+        "comments": request.comments,
+        "status": "warning"
+    })
+
+    # Service resolu apres les controles 404/403 seulement
+    await get_provision_service().cancel_operation(
         instance.operation_id,
         reason=f"Rejected by {current_user['username']}: {request.comments}"
     )
@@ -217,29 +265,30 @@ async def reject_workflow(
     return result
 
 
-@router.post("/instances/{instance_id}/cancel")
+@router.post("/instances/{instance_id}/cancel", response_model=Dict[str, Any])
 async def cancel_workflow(
     instance_id: str,
-    current_user: dict = Depends(require_role(["admin"])),
-    session=Depends(get_session)
+    current_user: dict = Depends(ADMIN_ONLY),
+    workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Annule un workflow en cours (admin only)."""
-    workflow_service = WorkflowService(session)
-
     result = await workflow_service.cancel_instance(instance_id)
 
     return {"message": f"Workflow {instance_id} cancelled", "result": result}
 
 
-@router.get("/instances/{instance_id}/history")
+@router.get("/instances/{instance_id}/history", response_model=List[Dict[str, Any]])
 async def get_workflow_history(
     instance_id: str,
+    request: Request,
     current_user: dict = Depends(get_current_user),
-    session=Depends(get_session)
+    workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """Recupere l'historique des decisions d'un workflow."""
-    workflow_service = WorkflowService(session)
-    return await workflow_service.get_history(instance_id)
+    async def load():
+        return await workflow_service.get_history(instance_id)
+
+    return _json_body(request, await _cached_body(HISTORY_CACHE_PREFIX + instance_id, load))
 
 
 @router.get("/approve-by-email")
@@ -247,7 +296,7 @@ async def approve_workflow_by_email(
     token: str = Query(..., description="Token d'approbation"),
     workflow_id: str = Query(..., description="ID du workflow"),
     action: str = Query(..., description="Action: approve ou reject"),
-    session=Depends(get_session)
+    workflow_service: WorkflowService = Depends(get_workflow_service)
 ):
     """
     Endpoint d'approbation par email.
@@ -260,8 +309,6 @@ async def approve_workflow_by_email(
             status_code=400
         )
 
-    workflow_service = WorkflowService(session)
-    provision_service = ProvisionService(session)
 
     # Traiter l'approbation
     result = await workflow_service.approve_by_token(
@@ -276,17 +323,9 @@ async def approve_workflow_by_email(
             status_code=400
         )
 
-    # Si approuve, continuer le provisionnement
-    if action == "approve":
-        workflow = memory_store.get_workflow(workflow_id)
-        if workflow:
-            operation_id = workflow.get("operation_id")
-            if operation_id:
-                try:
-                    await provision_service.continue_after_approval(operation_id)
-                    logger.info("Provisioning continued after email approval", operation_id=operation_id)
-                except Exception as e:
-                    logger.error("Failed to continue provisioning", error=str(e))
+    # Si approuve, le provisionnement continue en tache de fond
+    if action == "approve" and result.get("operation_id"):
+        await approval_bus.publish({"operation_id": result["operation_id"]})
 
     # Generer page de confirmation
     return HTMLResponse(
@@ -295,21 +334,16 @@ async def approve_workflow_by_email(
     )
 
 
-def _generate_success_page(action: str, result: dict) -> str:
-    """Genere une page HTML de succes."""
-    action_text = "approuvee" if action == "approve" else "rejetee"
-    action_color = "#22c55e" if action == "approve" else "#ef4444"
-    icon = "✓" if action == "approve" else "✗"
-
-    return f"""
+# Pages HTML de confirmation (CSS inclus), compilees une fois au chargement
+SUCCESS_PAGE_HTML = Template("""
 <!DOCTYPE html>
 <html>
 <head>
-    <title>IAM Gateway - Demande {action_text}</title>
+    <title>IAM Gateway - Demande $action_text</title>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <style>
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
             background: linear-gradient(135deg, #f8fafc 0%, #e2e8f0 100%);
             min-height: 100vh;
@@ -318,8 +352,8 @@ def _generate_success_page(action: str, result: dict) -> str:
             justify-content: center;
             margin: 0;
             padding: 20px;
-        }}
-        .container {{
+        }
+        .container {
             background: white;
             border-radius: 16px;
             box-shadow: 0 20px 60px rgba(0,0,0,0.1);
@@ -327,30 +361,30 @@ def _generate_success_page(action: str, result: dict) -> str:
             width: 100%;
             text-align: center;
             overflow: hidden;
-        }}
-        .header {{
-            background: {action_color};
+        }
+        .header {
+            background: $action_color;
             color: white;
             padding: 40px;
-        }}
-        .icon {{
+        }
+        .icon {
             font-size: 64px;
             margin-bottom: 16px;
-        }}
-        .title {{
+        }
+        .title {
             font-size: 24px;
             font-weight: bold;
             margin: 0;
-        }}
-        .content {{
+        }
+        .content {
             padding: 40px;
-        }}
-        .message {{
+        }
+        .message {
             color: #475569;
             font-size: 16px;
             line-height: 1.6;
-        }}
-        .workflow-id {{
+        }
+        .workflow-id {
             background: #f1f5f9;
             padding: 10px 16px;
             border-radius: 8px;
@@ -358,8 +392,8 @@ def _generate_success_page(action: str, result: dict) -> str:
             font-size: 14px;
             color: #64748b;
             margin-top: 20px;
-        }}
-        .btn {{
+        }
+        .btn {
             display: inline-block;
             background: #3b82f6;
             color: white;
@@ -369,24 +403,24 @@ def _generate_success_page(action: str, result: dict) -> str:
             font-weight: 600;
             margin-top: 24px;
             transition: background 0.2s;
-        }}
-        .btn:hover {{
+        }
+        .btn:hover {
             background: #2563eb;
-        }}
+        }
     </style>
 </head>
 <body>
     <div class="container">
         <div class="header">
-            <div class="icon">{icon}</div>
-            <h1 class="title">Demande {action_text.capitalize()}</h1>
+            <div class="icon">$icon</div>
+            <h1 class="title">Demande $action_title</h1>
         </div>
         <div class="content">
             <p class="message">
-                {result.get('message', f'La demande a ete {action_text} avec succes.')}
+                $message
             </p>
             <div class="workflow-id">
-                ID: {result.get('workflow_id', 'N/A')}
+                ID: $workflow_id
             </div>
             <a href="http://localhost:3000/dashboard/workflows" class="btn">
                 Voir le tableau de bord
@@ -395,12 +429,9 @@ def _generate_success_page(action: str, result: dict) -> str:
     </div>
 </body>
 </html>
-"""
+""")
 
-
-def _generate_error_page(error: str) -> str:
-    """Genere une page HTML d'erreur."""
-    return f"""
+ERROR_PAGE_HTML = Template("""
 <!DOCTYPE html>
 <html>
 <head>
@@ -408,7 +439,7 @@ def _generate_error_page(error: str) -> str:
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <style>
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
             background: linear-gradient(135deg, #fef2f2 0%, #fee2e2 100%);
             min-height: 100vh;
@@ -417,8 +448,8 @@ def _generate_error_page(error: str) -> str:
             justify-content: center;
             margin: 0;
             padding: 20px;
-        }}
-        .container {{
+        }
+        .container {
             background: white;
             border-radius: 16px;
             box-shadow: 0 20px 60px rgba(0,0,0,0.1);
@@ -426,24 +457,24 @@ def _generate_error_page(error: str) -> str:
             width: 100%;
             text-align: center;
             overflow: hidden;
-        }}
-        .header {{
+        }
+        .header {
             background: #ef4444;
             color: white;
             padding: 40px;
-        }}
-        .icon {{ font-size: 64px; margin-bottom: 16px; }}
-        .title {{ font-size: 24px; font-weight: bold; margin: 0; }}
-        .content {{ padding: 40px; }}
-        .error-message {{
+        }
+        .icon { font-size: 64px; margin-bottom: 16px; }
+        .title { font-size: 24px; font-weight: bold; margin: 0; }
+        .content { padding: 40px; }
+        .error-message {
             background: #fef2f2;
             border: 1px solid #fecaca;
             color: #991b1b;
             padding: 16px;
             border-radius: 8px;
             margin-bottom: 20px;
-        }}
-        .btn {{
+        }
+        .btn {
             display: inline-block;
             background: #3b82f6;
             color: white;
@@ -451,7 +482,7 @@ def _generate_error_page(error: str) -> str:
             border-radius: 8px;
             text-decoration: none;
             font-weight: 600;
-        }}
+        }
     </style>
 </head>
 <body>
@@ -461,7 +492,7 @@ def _generate_error_page(error: str) -> str:
             <h1 class="title">Erreur</h1>
         </div>
         <div class="content">
-            <div class="error-message">{error}</div>
+            <div class="error-message">$error</div>
             <a href="http://localhost:3000/dashboard/workflows" class="btn">
                 Retour au tableau de bord
             </a>
@@ -469,4 +500,32 @@ def _generate_error_page(error: str) -> str:
     </div>
 </body>
 </html>
-"""
+""")
+
+# Page de succes pre-remplie par action: restent message et workflow_id
+_SUCCESS_PAGES = {
+    action: Template(SUCCESS_PAGE_HTML.safe_substitute(
+        action_text=action_text,
+        action_title=action_text.capitalize(),
+        action_color=action_color,
+        icon=icon
+    ))
+    for action, (action_text, action_color, icon) in {
+        "approve": ("approuvee", "#22c55e", "✓"),
+        "reject": ("rejetee", "#ef4444", "✗"),
+    }.items()
+}
+
+
+def _generate_success_page(action: str, result: dict) -> str:
+    """Genere une page HTML de succes."""
+    action_text = "approuvee" if action == "approve" else "rejetee"
+    return _SUCCESS_PAGES[action].substitute(
+        message=result.get('message', f'La demande a ete {action_text} avec succes.'),
+        workflow_id=result.get('workflow_id', 'N/A')
+    )
+
+
+def _generate_error_page(error: str) -> str:
+    """Genere une page HTML d'erreur."""
+    return ERROR_PAGE_HTML.substitute(error=error)
@@ -2,11 +2,26 @@
 Interface de base pour les connecteurs
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, Optional, List, AsyncIterator, Tuple, Callable, TypeVar
+import asyncio
 import structlog
 
+from app.core.config import settings
+
 logger = structlog.get_logger()
 
+T = TypeVar("T")
+
+# Taille de page par defaut pour le parcours des comptes
+ACCOUNT_PAGE_SIZE = 1000
+
+
+def failed_row(error: Exception) -> Dict[str, Any]:
+    """Resultat d'une ligne en echec dans un appel groupe (bulk_*)."""
+    return {"status": "failed", "error": str(error)}
+
 
 class BaseConnector(ABC):
     """
@@ -19,12 +34,22 @@ class BaseConnector(ABC):
     def __init__(self):
         self.name = self.__class__.__name__
         self._connected = False
+        self._executor = connector_executor
+
+    async def _run_sync(self, fn: Callable[..., T], *args: Any) -> T:
+        """Execute un appel bloquant (pilote synchrone) dans le pool des connecteurs."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args))
 
     @abstractmethod
     async def test_connection(self) -> bool:
         """Teste la connexion au systeme cible."""
         pass
 
+    async def warmup(self) -> None:
+        """Ouvre d'avance les connexions du connecteur (par defaut: un test de connexion)."""
+        await self.test_connection()
+
     @abstractmethod
     async def create_account(
         self,
@@ -97,6 +122,61 @@ class BaseConnector(ABC):
         """
         pass
 
+    async def iter_accounts(
+        self,
+        page_size: int = ACCOUNT_PAGE_SIZE
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Parcourt les comptes page par page.
+
+        Implementation par defaut: list_accounts (charge tout).
+        Les connecteurs qui savent paginer surchargent cette methode.
+        """
+        for account in await self.list_accounts():
+            yield account
+
+    async def bulk_create_accounts(
+        self,
+        rows: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Cree plusieurs comptes en un seul appel.
+
+        Implementation par defaut: create_account compte par compte.
+        Une ligne en echec n'empeche pas les autres.
+
+        Args:
+            rows: Couples (account_id, attributes)
+
+        Returns:
+            Un resultat par ligne, dans l'ordre de rows (failed_row pour les echecs)
+        """
+        results = []
+        for account_id, attributes in rows:
+            try:
+                results.append(await self.create_account(account_id, attributes))
+            except Exception as e:
+                results.append(failed_row(e))
+        return results
+
+    async def bulk_update_accounts(
+        self,
+        rows: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Met a jour plusieurs comptes en un seul appel.
+
+        Implementation par defaut: update_account compte par compte.
+        Meme contrat de resultat que bulk_create_accounts.
+        """
+        results = []
+        for account_id, attributes in rows:
+            try:
+                results.append(await self.update_account(account_id, attributes))
+            except Exception as e:
+                results.append(failed_row(e))
+        return results
+
     async def disable_account(self, account_id: str) -> bool:
         """
         Desactive un compte.
@@ -129,6 +209,31 @@ class BaseConnector(ABC):
         """Retire un compte d'un groupe."""
         raise NotImplementedError(f"{self.name} does not support remove_from_group")
 
+    async def add_to_groups(self, account_id: str, group_ids: List[str]) -> bool:
+        """
+        Ajoute un compte a plusieurs groupes.
+
+        Implementation par defaut: add_to_group groupe par groupe.
+        """
+        results = [await self.add_to_group(account_id, group_id) for group_id in group_ids]
+        return all(results)
+
+    async def remove_from_groups(self, account_id: str, group_ids: List[str]) -> bool:
+        """
+        Retire un compte de plusieurs groupes.
+
+        Implementation par defaut: remove_from_group groupe par groupe.
+        """
+        results = [await self.remove_from_group(account_id, group_id) for group_id in group_ids]
+        return all(results)
+
     async def get_groups(self, account_id: str) -> List[str]:
         """Recupere les groupes d'un compte."""
         return []
+
+
+# Instance globale (partagee : le cache des connecteurs peut etre vide a chaud)
+connector_executor = ThreadPoolExecutor(
+    max_workers=settings.CONNECTOR_MAX_WORKERS,
+    thread_name_prefix="connector"
+)
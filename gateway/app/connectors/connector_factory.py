@@ -2,17 +2,154 @@
 Factory pour les connecteurs - Version dynamique
 Charge les connecteurs depuis la base de donnees ou la configuration statique.
 """
-from typing import Dict, Optional, Any
+from dataclasses import dataclass, fields
+from typing import Callable, Dict, List, Optional, Any
+import asyncio
+import threading
+import time
+import xmlrpc.client
+from urllib.parse import urlsplit
+import asyncpg
+import httpx
+import orjson
 import structlog
+from cachetools import LRUCache, TTLCache
+from ldap3 import Server, Connection, NONE, RESTARTABLE, MODIFY_REPLACE
+from sqlalchemy import text
 
 from app.connectors.base import BaseConnector
 from app.connectors.ldap_connector import LDAPConnector
 from app.connectors.sql_connector import SQLConnector
 from app.connectors.odoo_connector import OdooConnector
 from app.connectors.midpoint_connector import MidPointConnector
+from app.connectors.pool import AsyncConnectionPool
+from app.connectors.xmlrpc_transport import HTTPXTransport
+from app.core.config import settings
+from app.core.task_scheduler import spawn
 
 logger = structlog.get_logger()
 
+# Connecteurs statiques (config.py), par systeme cible
+_BUILDERS: Dict[str, Callable[[], BaseConnector]] = {
+    "MIDPOINT": MidPointConnector,
+    "LDAP": LDAPConnector,
+    "AD": LDAPConnector,
+    "SQL": SQLConnector,
+    "ODOO": OdooConnector,
+}
+
+# Cibles connues sans connecteur statique (a ajouter via la page Connecteurs)
+_PLANNED: Dict[str, str] = {
+    "GLPI": "GLPI",
+    "KEYCLOAK": "Keycloak",
+    "FIREBASE": "Firebase",
+}
+
+# Duree de validite de l'uid Odoo mis en cache (secondes)
+ODOO_AUTH_TTL = 1800
+
+# Limite de parametres d'une requete PostgreSQL (protocole etendu)
+PG_MAX_PARAMS = 32767
+# Textes SQL gardes par connecteur (colonnes et tailles de lot viennent des requetes)
+SQL_STATEMENT_CACHE_SIZE = 256
+
+# Tests de connexion menes en parallele au plus
+CONNECTOR_TEST_CONCURRENCY = 10
+# Duree de reutilisation d'un resultat de test (polling du tableau de bord)
+CONNECTOR_TEST_TTL = 10
+
+
+class _ConfigMixin:
+    """Construction depuis la configuration JSON (cles inconnues ignorees)."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]):
+        return cls(**{f.name: config[f.name] for f in fields(cls) if f.name in config})
+
+
+@dataclass(frozen=True, slots=True)
+class SQLConfig(_ConfigMixin):
+    """Configuration d'un connecteur SQL dynamique."""
+    host: Optional[str] = None
+    port: int = 5432
+    database: Optional[str] = None
+    username: Optional[str] = None
+    password: Optional[str] = None
+    ssl_mode: str = "prefer"
+    pool_min_size: int = 1
+    pool_max_size: int = 10
+
+
+@dataclass(frozen=True, slots=True)
+class LDAPConfig(_ConfigMixin):
+    """Configuration d'un connecteur LDAP dynamique."""
+    host: Optional[str] = None
+    port: int = 389
+    use_ssl: bool = False
+    bind_dn: Optional[str] = None
+    bind_password: Optional[str] = None
+    base_dn: Optional[str] = None
+    users_ou: str = "ou=users"
+    pool_max_size: int = 4
+
+
+@dataclass(frozen=True, slots=True)
+class RESTConfig(_ConfigMixin):
+    """Configuration d'un connecteur REST dynamique."""
+    base_url: str = ""
+    verify_ssl: bool = True
+    auth_type: str = "none"
+    username: Optional[str] = None
+    password: Optional[str] = None
+    bearer_token: Optional[str] = None
+    api_key_header: str = "X-API-Key"
+    api_key: Optional[str] = None
+    max_connections: int = 100
+
+
+@dataclass(frozen=True, slots=True)
+class OdooConfig(_ConfigMixin):
+    """Configuration d'un connecteur ERP Odoo dynamique."""
+    url: Optional[str] = None
+    database: Optional[str] = None
+    username: Optional[str] = None
+    password: Optional[str] = None
+
+
+# Classes des entrees utilisateur creees par les connecteurs LDAP dynamiques
+LDAP_USER_OBJECT_CLASSES = ("inetOrgPerson", "posixAccount", "top")
+LDAP_DEFAULT_ID_NUMBER = "10000"
+
+
+def _ldap_number(value: Any) -> str:
+    """uidNumber/gidNumber en texte (la valeur par defaut est deja une chaine)."""
+    if value is None:
+        return LDAP_DEFAULT_ID_NUMBER
+    return value if isinstance(value, str) else str(value)
+
+
+# Colonnes lues pour construire un connecteur dynamique (ordre de _store_config)
+_CONFIG_SELECT = (
+    "SELECT id, name, connector_type, connector_subtype, configuration, display_name, updated_at "
+    "FROM connector_configurations"
+)
+
+
+def _sorted_columns(row: Dict[str, Any], exclude: Optional[str] = None) -> tuple:
+    """(colonnes, valeurs) d'une ligne en un seul parcours, colonnes triees."""
+    items = sorted(item for item in row.items() if item[0] != exclude)
+    return tuple(k for k, _ in items), [v for _, v in items]
+
+
+_CONFIG_TYPES = {
+    "sql": SQLConfig,
+    "ldap": LDAPConfig,
+    "rest": RESTConfig,
+    "erp": OdooConfig,
+}
+
 
 class DynamicConnector(BaseConnector):
     """
@@ -20,155 +157,304 @@ class DynamicConnector(BaseConnector):
     """
 
     def __init__(self, name: str, connector_type: str, connector_subtype: str, config: Dict[str, Any]):
+        super().__init__()
         self.name = name
         self.connector_type = connector_type
         self.connector_subtype = connector_subtype
         self.config = config
+        # Configuration normalisee une fois (valeurs par defaut comprises)
+        config_type = _CONFIG_TYPES.get(connector_type)
+        self._cfg = config_type.from_dict(config) if config_type else None
+        # Suffixe des DN utilisateurs LDAP (",<users_ou>,<base_dn>")
+        if connector_type == "ldap":
+            self._ldap_users_suffix = f",{self._cfg.users_ou},{self._cfg.base_dn}"
+        # En-tetes et authentification REST fixes, calcules une fois
+        if connector_type == "rest":
+            self._rest_headers = self._build_rest_headers()
+            self._rest_auth = self._build_rest_auth()
         self._connection = None
+        # Pool asyncpg partage par les appels SQL (cree au premier usage)
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+        # Requetes SQL rendues par (operation, colonnes, lignes): meme texte => meme plan prepare
+        self._sql_statements: LRUCache = LRUCache(maxsize=SQL_STATEMENT_CACHE_SIZE)
+        # Client HTTP partage par les appels REST (keep-alive)
+        self._http = None
+        # Connexions LDAP liees, reutilisees d'un appel a l'autre
+        self._ldap_pool: Optional[AsyncConnectionPool] = None
+        # Session Odoo: uid authentifie + proxies XML-RPC sur un client HTTP keep-alive
+        self._odoo_uid: Optional[int] = None
+        self._odoo_auth_at = 0.0
+        self._odoo_lock = asyncio.Lock()
+        self._odoo_http: Optional[httpx.Client] = None
+        self._odoo_proxies: Dict[str, xmlrpc.client.ServerProxy] = {}
+        # Handlers resolus une fois selon le type de connecteur
+        self._provision_handler = {
+            "sql": self._provision_sql,
+            "ldap": self._provision_ldap,
+            "rest": self._provision_rest,
+            "erp": self._provision_erp,
+        }.get(connector_type)
+        self._provision_many_handler = {
+            "sql": self._provision_sql_many,
+            "ldap": self._provision_ldap_many,
+            "erp": self._provision_erp_many,
+        }.get(connector_type)
+        self._test_handler = {
+            "sql": self._test_sql,
+            "ldap": self._test_ldap,
+            "rest": self._test_rest,
+            "erp": self._test_erp,
+        }.get(connector_type)
 
     async def provision(self, operation_type: str, user_data: dict) -> dict:
         """Provision basé sur le type de connecteur."""
-        if self.connector_type == "sql":
-            return await self._provision_sql(operation_type, user_data)
-        elif self.connector_type == "ldap":
-            return await self._provision_ldap(operation_type, user_data)
-        elif self.connector_type == "rest":
-            return await self._provision_rest(operation_type, user_data)
-        elif self.connector_type == "erp":
-            return await self._provision_erp(operation_type, user_data)
-        else:
+        if self._provision_handler is None:
             raise NotImplementedError(f"Provisioning not implemented for type: {self.connector_type}")
+        return await self._provision_handler(operation_type, user_data)
+
+    async def provision_many(self, operation_type: str, users: List[dict]) -> List[dict]:
+        """Provision d'un lot d'utilisateurs (un aller-retour par lot quand la cible le permet)."""
+        if not users:
+            return []
+        if self._provision_many_handler is None:
+            return [await self.provision(operation_type, user_data) for user_data in users]
+        return await self._provision_many_handler(operation_type, users)
 
     async def _provision_sql(self, operation_type: str, user_data: dict) -> dict:
         """Provision vers une base SQL dynamique."""
-        import asyncpg
-
-        conn = await self._get_sql_connection()
-        try:
+        pool = await self._get_sql_pool()
+        async with pool.acquire() as conn:
             if operation_type == "create":
                 # Insert générique - peut être customisé via les règles
-                columns = ", ".join(user_data.keys())
-                placeholders = ", ".join(f"${i+1}" for i in range(len(user_data)))
-                query = f"INSERT INTO users ({columns}) VALUES ({placeholders}) RETURNING id"
-                result = await conn.fetchval(query, *user_data.values())
+                columns, values = _sorted_columns(user_data)
+                query = self._sql_statement("create", columns)
+                result = await conn.fetchval(query, *values)
                 return {"success": True, "id": result}
             elif operation_type == "update":
-                user_id = user_data.pop("id", None)
+                # Sans pop(): le dict de l'appelant n'est pas modifie
+                user_id = user_data.get("id")
                 if not user_id:
                     return {"success": False, "error": "Missing user id"}
-                sets = ", ".join(f"{k} = ${i+2}" for i, k in enumerate(user_data.keys()))
-                query = f"UPDATE users SET {sets} WHERE id = $1"
-                await conn.execute(query, user_id, *user_data.values())
+                columns, values = _sorted_columns(user_data, exclude="id")
+                query = self._sql_statement("update", columns)
+                await conn.execute(query, user_id, *values)
                 return {"success": True, "updated": user_id}
             elif operation_type == "delete":
                 user_id = user_data.get("id")
                 await conn.execute("DELETE FROM users WHERE id = $1", user_id)
                 return {"success": True, "deleted": user_id}
-        finally:
-            await conn.close()
 
         return {"success": False, "error": "Unknown operation"}
 
+    async def _provision_sql_many(self, operation_type: str, users: List[dict]) -> List[dict]:
+        """Provision SQL d'un lot dans une seule transaction."""
+        if not users:
+            return []
+        pool = await self._get_sql_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                if operation_type == "create":
+                    # Un INSERT multi-lignes par ensemble de colonnes, par tranche
+                    results: List[Optional[dict]] = [None] * len(users)
+                    groups: Dict[tuple, list] = {}
+                    for index, user_data in enumerate(users):
+                        columns, values = _sorted_columns(user_data)
+                        if not columns:
+                            results[index] = {"success": False, "error": "No columns to insert"}
+                            continue
+                        groups.setdefault(columns, []).append((index, values))
+                    for columns, entries in groups.items():
+                        chunk_size = max(1, PG_MAX_PARAMS // len(columns))
+                        for start in range(0, len(entries), chunk_size):
+                            chunk = entries[start:start + chunk_size]
+                            query = self._sql_statement("create", columns, len(chunk))
+                            params = [value for _, values in chunk for value in values]
+                            rows = await conn.fetch(query, *params)
+                            for (index, _), row in zip(chunk, rows):
+                                results[index] = {"success": True, "id": row["id"]}
+                    return results
+
+                elif operation_type == "update":
+                    # Un executemany par ensemble de colonnes modifiees
+                    results = []
+                    batches: Dict[tuple, list] = {}
+                    for user_data in users:
+                        user_id = user_data.get("id")
+                        if not user_id:
+                            results.append({"success": False, "error": "Missing user id"})
+                            continue
+                        columns, values = _sorted_columns(user_data, exclude="id")
+                        batches.setdefault(columns, []).append((user_id, *values))
+                        results.append({"success": True, "updated": user_id})
+                    for columns, args in batches.items():
+                        await conn.executemany(self._sql_statement("update", columns), args)
+                    return results
+
+                elif operation_type == "delete":
+                    user_ids = [user_data.get("id") for user_data in users]
+                    await conn.execute("DELETE FROM users WHERE id = ANY($1)", user_ids)
+                    return [{"success": True, "deleted": user_id} for user_id in user_ids]
+
+        return [{"success": False, "error": "Unknown operation"} for _ in users]
+
+    def _sql_statement(self, operation_type: str, columns: tuple, rows: int = 1) -> str:
+        """Texte SQL pour un ensemble de colonnes, rendu une seule fois."""
+        key = (operation_type, columns, rows)
+        query = self._sql_statements.get(key)
+        if query is None:
+            if operation_type == "create":
+                width = len(columns)
+                values = ", ".join(
+                    "(" + ", ".join(f"${r * width + c + 1}" for c in range(width)) + ")"
+                    for r in range(rows)
+                )
+                query = f"INSERT INTO users ({', '.join(columns)}) VALUES {values} RETURNING id"
+            else:
+                sets = ", ".join(f"{k} = ${i+2}" for i, k in enumerate(columns))
+                query = f"UPDATE users SET {sets} WHERE id = $1"
+            self._sql_statements[key] = query
+        return query
+
     async def _provision_ldap(self, operation_type: str, user_data: dict) -> dict:
         """Provision vers LDAP dynamique."""
-        from ldap3 import Server, Connection, ALL, SUBTREE
-
-        server = Server(
-            self.config.get("host"),
-            port=self.config.get("port", 389),
-            use_ssl=self.config.get("use_ssl", False),
-            get_info=ALL
-        )
-
-        conn = Connection(
+        return (await self._provision_ldap_many(operation_type, [user_data]))[0]
+
+    async def _provision_ldap_many(self, operation_type: str, users: List[dict]) -> List[dict]:
+        """Provision LDAP d'un lot sur une seule connexion liee."""
+        def apply_all(conn) -> List[dict]:
+            return [self._ldap_apply(conn, operation_type, user_data) for user_data in users]
+
+        async with self._get_ldap_pool().acquire() as conn:
+            return await self._run_sync(apply_all, conn)
+
+    def _get_ldap_pool(self) -> AsyncConnectionPool:
+        """Crée (une seule fois) le pool de connexions LDAP du connecteur."""
+        if self._ldap_pool is None:
+            self._ldap_pool = AsyncConnectionPool(
+                open_connection=lambda: self._run_sync(self._open_ldap_connection),
+                close_connection=lambda conn: self._run_sync(conn.unbind),
+                minsize=1,
+                maxsize=self._cfg.pool_max_size,
+                is_alive=lambda conn: not conn.closed
+            )
+        return self._ldap_pool
+
+    def _open_ldap_connection(self):
+        """Connexion liee, reouverte automatiquement si le serveur la coupe."""
+        # Pas de lecture du schema (get_info=ALL) a chaque bind
+        cfg = self._cfg
+        server = Server(cfg.host, port=cfg.port, use_ssl=cfg.use_ssl, get_info=NONE)
+        return Connection(
             server,
-            user=self.config.get("bind_dn"),
-            password=self.config.get("bind_password"),
-            auto_bind=True
+            user=cfg.bind_dn,
+            password=cfg.bind_password,
+            client_strategy=RESTARTABLE,
+            auto_bind=True,
+            receive_timeout=30
         )
 
-        try:
-            base_dn = self.config.get("base_dn")
-            users_ou = self.config.get("users_ou", "ou=users")
-
-            if operation_type == "create":
-                uid = user_data.get("uid") or user_data.get("username")
-                dn = f"uid={uid},{users_ou},{base_dn}"
-
-                attributes = {
-                    "objectClass": ["inetOrgPerson", "posixAccount", "top"],
-                    "cn": user_data.get("cn", f"{user_data.get('firstname', '')} {user_data.get('lastname', '')}"),
-                    "sn": user_data.get("lastname", "Unknown"),
-                    "uid": uid,
-                    "uidNumber": str(user_data.get("uid_number", 10000)),
-                    "gidNumber": str(user_data.get("gid_number", 10000)),
-                    "homeDirectory": user_data.get("home_directory", f"/home/{uid}"),
-                }
-
-                if user_data.get("email"):
-                    attributes["mail"] = user_data["email"]
-                if user_data.get("firstname"):
-                    attributes["givenName"] = user_data["firstname"]
+    def _ldap_apply(self, conn, operation_type: str, user_data: dict) -> dict:
+        """Applique une operation sur une connexion LDAP deja liee."""
+        uid = user_data.get("uid") or user_data.get("username")
+        dn = "uid=" + str(uid) + self._ldap_users_suffix
 
-                conn.add(dn, attributes=attributes)
-                return {"success": conn.result["result"] == 0, "dn": dn}
+        if operation_type == "create":
+            # Valeurs par defaut calculees seulement si l'attribut manque
+            cn = user_data.get("cn")
+            if cn is None:
+                cn = f"{user_data.get('firstname', '')} {user_data.get('lastname', '')}"
+            home_directory = user_data.get("home_directory")
+            if home_directory is None:
+                home_directory = "/home/" + str(uid)
+
+            attributes = {
+                "objectClass": LDAP_USER_OBJECT_CLASSES,
+                "cn": cn,
+                "sn": user_data.get("lastname", "Unknown"),
+                "uid": uid,
+                "uidNumber": _ldap_number(user_data.get("uid_number")),
+                "gidNumber": _ldap_number(user_data.get("gid_number")),
+                "homeDirectory": home_directory,
+            }
 
-            elif operation_type == "update":
-                uid = user_data.get("uid") or user_data.get("username")
-                dn = f"uid={uid},{users_ou},{base_dn}"
+            if user_data.get("email"):
+                attributes["mail"] = user_data["email"]
+            if user_data.get("firstname"):
+                attributes["givenName"] = user_data["firstname"]
 
-                changes = {}
-                for key, value in user_data.items():
-                    if key not in ["uid", "username"]:
-                        changes[key] = [(MODIFY_REPLACE, [value])]
+            conn.add(dn, attributes=attributes)
+            return {"success": conn.result["result"] == 0, "dn": dn}
 
-                if changes:
-                    conn.modify(dn, changes)
-                return {"success": True, "modified": dn}
+        elif operation_type == "update":
+            changes = {}
+            for key, value in user_data.items():
+                if key not in ("uid", "username"):
+                    changes[key] = [(MODIFY_REPLACE, [value])]
 
-            elif operation_type == "delete":
-                uid = user_data.get("uid") or user_data.get("username")
-                dn = f"uid={uid},{users_ou},{base_dn}"
-                conn.delete(dn)
-                return {"success": conn.result["result"] == 0, "deleted": dn}
+            if changes:
+                conn.modify(dn, changes)
+            return {"success": True, "modified": dn}
 
-        finally:
-            conn.unbind()
+        elif operation_type == "delete":
+            conn.delete(dn)
+            return {"success": conn.result["result"] == 0, "deleted": dn}
 
         return {"success": False, "error": "Unknown operation"}
 
     async def _provision_rest(self, operation_type: str, user_data: dict) -> dict:
         """Provision vers API REST dynamique."""
-        import httpx
+        client = self._get_http_client()
+
+        if operation_type == "create":
+            response = await client.post("/users", content=orjson.dumps(user_data))
+            return {"success": response.status_code in [200, 201], "response": orjson.loads(response.content) if response.content else {}}
+        elif operation_type == "update":
+            # Sans pop(): le dict de l'appelant n'est pas modifie
+            user_id = user_data.get("id")
+            payload = {k: v for k, v in user_data.items() if k != "id"}
+            response = await client.put(f"/users/{user_id}", content=orjson.dumps(payload))
+            return {"success": response.status_code == 200, "response": orjson.loads(response.content) if response.content else {}}
+        elif operation_type == "delete":
+            user_id = user_data.get("id")
+            response = await client.delete(f"/users/{user_id}")
+            return {"success": response.status_code in [200, 204]}
 
-        base_url = self.config.get("base_url")
-        auth_type = self.config.get("auth_type", "none")
+        return {"success": False, "error": "Unknown operation"}
 
+    def _get_http_client(self):
+        """Crée (une seule fois) le client HTTP du connecteur REST."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self._cfg.base_url,
+                verify=self._cfg.verify_ssl,
+                headers=self._rest_headers,
+                auth=self._rest_auth,
+                timeout=httpx.Timeout(30.0, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self._cfg.max_connections,
+                    max_keepalive_connections=20,
+                    keepalive_expiry=15.0
+                )
+            )
+        return self._http
+
+    def _build_rest_headers(self) -> Dict[str, str]:
+        """En-tetes fixes (type de contenu et authentification par jeton)."""
+        cfg = self._cfg
         headers = {"Content-Type": "application/json"}
-        auth = None
 
-        if auth_type == "basic":
-            auth = (self.config.get("username"), self.config.get("password"))
-        elif auth_type == "bearer":
-            headers["Authorization"] = f"Bearer {self.config.get('bearer_token')}"
-        elif auth_type == "api_key":
-            header_name = self.config.get("api_key_header", "X-API-Key")
-            headers[header_name] = self.config.get("api_key")
+        if cfg.auth_type == "bearer":
+            headers["Authorization"] = f"Bearer {cfg.bearer_token}"
+        elif cfg.auth_type == "api_key":
+            headers[cfg.api_key_header] = cfg.api_key
+        return headers
 
-        async with httpx.AsyncClient(verify=self.config.get("verify_ssl", True)) as client:
-            if operation_type == "create":
-                response = await client.post(f"{base_url}/users", json=user_data, headers=headers, auth=auth)
-                return {"success": response.status_code in [200, 201], "response": response.json() if response.content else {}}
-            elif operation_type == "update":
-                user_id = user_data.pop("id", None)
-                response = await client.put(f"{base_url}/users/{user_id}", json=user_data, headers=headers, auth=auth)
-                return {"success": response.status_code == 200, "response": response.json() if response.content else {}}
-            elif operation_type == "delete":
-                user_id = user_data.get("id")
-                response = await client.delete(f"{base_url}/users/{user_id}", headers=headers, auth=auth)
-                return {"success": response.status_code in [200, 204]}
-
-        return {"success": False, "error": "Unknown operation"}
+    def _build_rest_auth(self):
+        """Authentification basique eventuelle."""
+        if self._cfg.auth_type == "basic":
+            return (self._cfg.username, self._cfg.password)
+        return None
 
     async def _provision_erp(self, operation_type: str, user_data: dict) -> dict:
         """Provision vers ERP (Odoo, SAP)."""
@@ -177,113 +463,192 @@ class DynamicConnector(BaseConnector):
         else:
             raise NotImplementedError(f"ERP subtype not implemented: {self.connector_subtype}")
 
+    async def _provision_erp_many(self, operation_type: str, users: List[dict]) -> List[dict]:
+        """Provision d'un lot vers ERP (Odoo, SAP)."""
+        if self.connector_subtype == "odoo":
+            return await self._provision_odoo_many(operation_type, users)
+        else:
+            raise NotImplementedError(f"ERP subtype not implemented: {self.connector_subtype}")
+
     async def _provision_odoo(self, operation_type: str, user_data: dict) -> dict:
         """Provision vers Odoo."""
-        import xmlrpc.client
-
-        url = self.config.get("url")
-        db = self.config.get("database")
-        username = self.config.get("username")
-        password = self.config.get("password")
-
-        common = xmlrpc.client.ServerProxy(f'{url}/xmlrpc/2/common')
-        uid = common.authenticate(db, username, password, {})
+        return (await self._provision_odoo_many(operation_type, [user_data]))[0]
 
+    async def _provision_odoo_many(self, operation_type: str, users: List[dict]) -> List[dict]:
+        """Provision Odoo d'un lot (create et unlink en un seul appel XML-RPC)."""
+        uid = await self._get_odoo_uid()
         if not uid:
-            return {"success": False, "error": "Authentication failed"}
-
-        models = xmlrpc.client.ServerProxy(f'{url}/xmlrpc/2/object')
+            return [{"success": False, "error": "Authentication failed"} for _ in users]
 
         if operation_type == "create":
-            partner_data = {
-                "name": f"{user_data.get('firstname', '')} {user_data.get('lastname', '')}".strip(),
-                "email": user_data.get("email"),
-                "is_company": False,
-            }
-            partner_id = models.execute_kw(db, uid, password, 'res.partner', 'create', [partner_data])
-            return {"success": True, "partner_id": partner_id}
+            partners = [
+                {
+                    "name": f"{user_data.get('firstname', '')} {user_data.get('lastname', '')}".strip(),
+                    "email": user_data.get("email"),
+                    "is_company": False,
+                }
+                for user_data in users
+            ]
+            partner_ids = await self._odoo_execute(uid, 'res.partner', 'create', [partners])
+            return [{"success": True, "partner_id": partner_id} for partner_id in partner_ids]
 
         elif operation_type == "update":
-            partner_id = user_data.get("partner_id")
-            partner_data = {k: v for k, v in user_data.items() if k != "partner_id"}
-            models.execute_kw(db, uid, password, 'res.partner', 'write', [[partner_id], partner_data])
-            return {"success": True, "updated": partner_id}
+            # Valeurs propres a chaque partenaire: un write par utilisateur
+            results = []
+            for user_data in users:
+                partner_id = user_data.get("partner_id")
+                partner_data = {k: v for k, v in user_data.items() if k != "partner_id"}
+                await self._odoo_execute(uid, 'res.partner', 'write', [[partner_id], partner_data])
+                results.append({"success": True, "updated": partner_id})
+            return results
 
         elif operation_type == "delete":
-            partner_id = user_data.get("partner_id")
-            models.execute_kw(db, uid, password, 'res.partner', 'unlink', [[partner_id]])
-            return {"success": True, "deleted": partner_id}
+            partner_ids = [user_data.get("partner_id") for user_data in users]
+            await self._odoo_execute(uid, 'res.partner', 'unlink', [partner_ids])
+            return [{"success": True, "deleted": partner_id} for partner_id in partner_ids]
 
-        return {"success": False, "error": "Unknown operation"}
+        return [{"success": False, "error": "Unknown operation"} for _ in users]
 
-    async def _get_sql_connection(self):
-        """Crée une connexion SQL basée sur le subtype."""
-        import asyncpg
+    def _odoo_proxy(self, endpoint: str) -> xmlrpc.client.ServerProxy:
+        """
+        Proxy XML-RPC partage par tous les threads du pool.
 
+        Cree depuis la boucle d'evenements uniquement (pas de creation concurrente).
+        """
+        proxy = self._odoo_proxies.get(endpoint)
+        if proxy is None:
+            if self._odoo_http is None:
+                self._odoo_http = httpx.Client(
+                    timeout=httpx.Timeout(60.0, connect=10.0),
+                    limits=httpx.Limits(
+                        max_connections=settings.CONNECTOR_MAX_WORKERS,
+                        max_keepalive_connections=settings.CONNECTOR_MAX_WORKERS,
+                        keepalive_expiry=30.0
+                    )
+                )
+            url = f'{self._cfg.url}/xmlrpc/2/{endpoint}'
+            proxy = self._odoo_proxies[endpoint] = xmlrpc.client.ServerProxy(
+                url,
+                transport=HTTPXTransport(self._odoo_http, scheme=urlsplit(url).scheme)
+            )
+        return proxy
+
+    async def _get_odoo_uid(self, refresh: bool = False) -> Optional[int]:
+        """Retourne l'uid Odoo, re-authentifie seulement s'il est absent ou expire."""
+        async with self._odoo_lock:
+            expired = time.monotonic() - self._odoo_auth_at > ODOO_AUTH_TTL
+            if refresh or not self._odoo_uid or expired:
+                cfg = self._cfg
+                common = self._odoo_proxy("common")
+                self._odoo_uid = await self._run_sync(
+                    common.authenticate, cfg.database, cfg.username, cfg.password, {}
+                ) or None
+                self._odoo_auth_at = time.monotonic()
+            return self._odoo_uid
+
+    async def _odoo_execute(self, uid: int, model: str, method: str, args: list):
+        """Appel execute_kw hors de la boucle; un refus d'acces invalide l'uid en cache."""
+        models = self._odoo_proxy("object")
+        try:
+            return await self._run_sync(
+                models.execute_kw, self._cfg.database, uid, self._cfg.password, model, method, args
+            )
+        except xmlrpc.client.Fault as e:
+            if "AccessDenied" in e.faultString:
+                self._odoo_uid = None
+            raise
+
+    async def _get_sql_pool(self):
+        """Crée (une seule fois) le pool SQL basé sur le subtype."""
+        if self._pool is not None:
+            return self._pool
+
+        async with self._pool_lock:
+            if self._pool is None:
+                self._pool = await self._create_sql_pool()
+        return self._pool
+
+    async def _create_sql_pool(self):
         if self.connector_subtype in ["postgresql", "postgres"]:
-            return await asyncpg.connect(
-                host=self.config.get("host"),
-                port=self.config.get("port", 5432),
-                database=self.config.get("database"),
-                user=self.config.get("username"),
-                password=self.config.get("password"),
-                ssl=self.config.get("ssl_mode", "prefer")
+            cfg = self._cfg
+            return await asyncpg.create_pool(
+                host=cfg.host,
+                port=cfg.port,
+                database=cfg.database,
+                user=cfg.username,
+                password=cfg.password,
+                ssl=cfg.ssl_mode,
+                min_size=cfg.pool_min_size,
+                max_size=cfg.pool_max_size,
+                max_inactive_connection_lifetime=300,
+                command_timeout=60,
+                statement_cache_size=1024,
+                max_cached_statement_lifetime=0
             )
         else:
             raise NotImplementedError(f"SQL subtype not yet implemented: {self.connector_subtype}")
 
+    async def close(self) -> None:
+        """Ferme les pools SQL/LDAP et le client HTTP du connecteur."""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await pool.close()
+
+        ldap_pool, self._ldap_pool = self._ldap_pool, None
+        if ldap_pool is not None:
+            await ldap_pool.close()
+
+        http, self._http = self._http, None
+        if http is not None:
+            await http.aclose()
+
+        odoo_http, self._odoo_http = self._odoo_http, None
+        self._odoo_proxies = {}
+        if odoo_http is not None:
+            odoo_http.close()
+
     async def test_connection(self) -> bool:
         """Teste la connexion du connecteur dynamique."""
-        try:
-            if self.connector_type == "sql":
-                conn = await self._get_sql_connection()
-                await conn.execute("SELECT 1")
-                await conn.close()
-                return True
-
-            elif self.connector_type == "ldap":
-                from ldap3 import Server, Connection, ALL
-                server = Server(
-                    self.config.get("host"),
-                    port=self.config.get("port", 389),
-                    use_ssl=self.config.get("use_ssl", False),
-                    get_info=ALL
-                )
-                conn = Connection(
-                    server,
-                    user=self.config.get("bind_dn"),
-                    password=self.config.get("bind_password"),
-                    auto_bind=True
-                )
-                conn.unbind()
-                return True
-
-            elif self.connector_type == "rest":
-                import httpx
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    response = await client.get(
-                        self.config.get("base_url"),
-                        verify=self.config.get("verify_ssl", True)
-                    )
-                    return response.status_code < 500
-
-            elif self.connector_type == "erp":
-                if self.connector_subtype == "odoo":
-                    import xmlrpc.client
-                    common = xmlrpc.client.ServerProxy(f'{self.config.get("url")}/xmlrpc/2/common')
-                    uid = common.authenticate(
-                        self.config.get("database"),
-                        self.config.get("username"),
-                        self.config.get("password"),
-                        {}
-                    )
-                    return uid is not None and uid > 0
-
+        if self._test_handler is None:
             return False
+        try:
+            return await self._test_handler()
         except Exception as e:
             logger.error("Connection test failed", connector=self.name, error=str(e))
             return False
 
+    async def _test_sql(self) -> bool:
+        pool = await self._get_sql_pool()
+        async with pool.acquire() as conn:
+            await conn.execute("SELECT 1")
+        return True
+
+    async def _test_ldap(self) -> bool:
+        async with self._get_ldap_pool().acquire() as conn:
+            return conn.bound
+
+    async def _test_rest(self) -> bool:
+        response = await self._get_http_client().get("", timeout=10.0)
+        return response.status_code < 500
+
+    async def _test_erp(self) -> bool:
+        if self.connector_subtype == "odoo":
+            uid = await self._get_odoo_uid(refresh=True)
+            return uid is not None and uid > 0
+        return False
+
+    async def warmup(self) -> None:
+        """Ouvre d'avance le pool, le client ou la session du connecteur."""
+        if self.connector_type == "sql":
+            await self._get_sql_pool()
+        elif self.connector_type == "ldap":
+            async with self._get_ldap_pool().acquire():
+                pass
+        elif self.connector_type == "rest":
+            self._get_http_client()
+        elif self.connector_type == "erp" and self.connector_subtype == "odoo":
+            await self._get_odoo_uid()
+
     async def get_user(self, user_id: str) -> Optional[dict]:
         """Récupère un utilisateur."""
         # Implementation basique - à étendre selon le type
@@ -304,9 +669,18 @@ class ConnectorFactory:
     - Connecteurs dynamiques (depuis la base de données)
     """
 
+    # Etat partage par toutes les instances (chaque service cree sa factory)
     _connectors: Dict[str, BaseConnector] = {}
     _dynamic_configs: Dict[str, dict] = {}
     _cache_loaded: bool = False
+    # Creation unique par cible (un connecteur SQL ouvre son propre pool);
+    # un verrou par cible pour ne pas serialiser la creation des autres
+    _create_lock = threading.Lock()
+    _target_locks: Dict[str, threading.Lock] = {}
+    # Derniers resultats de test par cible
+    _test_results: TTLCache = TTLCache(maxsize=256, ttl=CONNECTOR_TEST_TTL)
+    # Configurations JSON deja decodees: id -> (updated_at, configuration)
+    _parsed_configs: Dict[Any, tuple] = {}
 
     async def load_dynamic_connectors(self, session=None):
         """Charge les connecteurs dynamiques depuis la base de données."""
@@ -317,36 +691,105 @@ class ConnectorFactory:
                 break
 
         try:
-            from sqlalchemy import text
-            result = await session.execute(
-                text("SELECT * FROM connector_configurations WHERE is_active = true")
-            )
-            rows = result.fetchall()
-
-            for row in rows:
-                row_dict = dict(row._mapping)
-                self._dynamic_configs[row_dict["name"].upper()] = {
-                    "id": row_dict["id"],
-                    "name": row_dict["name"],
-                    "connector_type": row_dict["connector_type"],
-                    "connector_subtype": row_dict["connector_subtype"],
-                    "configuration": row_dict["configuration"],
-                    "display_name": row_dict["display_name"]
-                }
+            result = await session.execute(text(f"{_CONFIG_SELECT} WHERE is_active = true"))
 
-            self._cache_loaded = True
-            logger.info("Dynamic connectors loaded", count=len(rows))
+            count = 0
+            for row in result:
+                self._store_config(*row)
+                count += 1
+
+            ConnectorFactory._cache_loaded = True
+            logger.info("Dynamic connectors loaded", count=count)
 
         except Exception as e:
             logger.warning("Could not load dynamic connectors", error=str(e))
 
+    async def invalidate_target(self, name: str, session) -> None:
+        """
+        Recharge la configuration d'une seule cible apres une modification.
+
+        Seul le connecteur de cette cible est ferme et recree; les autres
+        gardent leurs pools et clients.
+        """
+        target = name.upper()
+        connector = self._connectors.pop(target, None)
+        self._test_results.pop(target, None)
+        if isinstance(connector, DynamicConnector):
+            await connector.close()
+
+        try:
+            result = await session.execute(
+                text(f"{_CONFIG_SELECT} WHERE is_active = true AND name = :name"),
+                {"name": name}
+            )
+            row = result.first()
+        except Exception as e:
+            logger.warning("Could not reload connector configuration", target=target, error=str(e))
+            row = None
+
+        if row is None:
+            # Supprime ou desactive: la cible retombe sur le connecteur statique eventuel
+            self._dynamic_configs.pop(target, None)
+        else:
+            self._store_config(*row)
+
+        logger.info("Connector invalidated", target=target, active=row is not None)
+
+    def _store_config(
+        self,
+        config_id: Any,
+        name: str,
+        connector_type: str,
+        connector_subtype: str,
+        configuration: Any,
+        display_name: str,
+        updated_at: Any
+    ) -> None:
+        self._dynamic_configs[name.upper()] = {
+            "id": config_id,
+            "name": name,
+            "connector_type": connector_type,
+            "connector_subtype": connector_subtype,
+            "configuration": self._parse_configuration(config_id, updated_at, configuration),
+            "display_name": display_name
+        }
+
+    def _parse_configuration(self, config_id: Any, updated_at: Any, configuration: Any) -> dict:
+        """Decode une configuration stockee en texte JSON, une fois par version de la ligne."""
+        if isinstance(configuration, dict):
+            return configuration
+        if not configuration:
+            return {}
+
+        cached = self._parsed_configs.get(config_id)
+        if cached is not None and cached[0] == updated_at:
+            return cached[1]
+
+        parsed = orjson.loads(configuration)
+        self._parsed_configs[config_id] = (updated_at, parsed)
+        return parsed
+
     def invalidate_cache(self):
-        """Invalide le cache des connecteurs."""
-        self._connectors.clear()
+        """Invalide tout le cache des connecteurs (voir invalidate_target pour une seule cible)."""
+        self._release_connectors()
         self._dynamic_configs.clear()
-        self._cache_loaded = False
+        ConnectorFactory._cache_loaded = False
         logger.info("Connector cache invalidated")
 
+    def _release_connectors(self) -> None:
+        """Vide le cache et ferme en tache de fond les pools/clients des connecteurs dynamiques."""
+        dropped = list(self._connectors.values())
+        self._connectors.clear()
+        self._test_results.clear()
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        for connector in dropped:
+            if isinstance(connector, DynamicConnector):
+                spawn("connector_close", connector.close)
+
     def get_connector(self, target_system: str) -> BaseConnector:
         """
         Recupere ou cree un connecteur pour le systeme cible.
@@ -360,17 +803,28 @@ class ConnectorFactory:
         target = target_system.upper()
 
         # Return cached connector if exists
-        if target in self._connectors:
-            return self._connectors[target]
+        connector = self._connectors.get(target)
+        if connector is not None:
+            return connector
 
-        # Check if dynamic connector exists
-        if target in self._dynamic_configs:
-            connector = self._create_dynamic_connector(target)
-        else:
-            # Fallback to static connector
-            connector = self._create_static_connector(target)
+        with self._create_lock:
+            target_lock = self._target_locks.setdefault(target, threading.Lock())
+
+        with target_lock:
+            # Re-check: another caller may have created it meanwhile
+            connector = self._connectors.get(target)
+            if connector is not None:
+                return connector
+
+            # Check if dynamic connector exists
+            if target in self._dynamic_configs:
+                connector = self._create_dynamic_connector(target)
+            else:
+                # Fallback to static connector
+                connector = self._create_static_connector(target)
+
+            self._connectors[target] = connector
 
-        self._connectors[target] = connector
         logger.info("Connector created", target=target, type=connector.__class__.__name__)
         return connector
 
@@ -384,31 +838,23 @@ class ConnectorFactory:
             config=config["configuration"]
         )
 
+    @staticmethod
+    def register(target: str, builder: Callable[[], BaseConnector]) -> None:
+        """Enregistre un connecteur statique supplementaire (plugin) pour une cible."""
+        _BUILDERS[target.upper()] = builder
+
     def _create_static_connector(self, target: str) -> BaseConnector:
         """Create a static connector instance from config.py."""
-        if target == "MIDPOINT":
-            return MidPointConnector()
-
-        elif target in ("LDAP", "AD"):
-            return LDAPConnector()
-
-        elif target == "SQL":
-            return SQLConnector()
-
-        elif target == "ODOO":
-            return OdooConnector()
+        builder = _BUILDERS.get(target)
+        if builder is not None:
+            return builder()
 
-        elif target == "GLPI":
-            raise NotImplementedError("GLPI connector not configured. Add it via the Connectors page.")
-
-        elif target == "KEYCLOAK":
-            raise NotImplementedError("Keycloak connector not configured. Add it via the Connectors page.")
-
-        elif target == "FIREBASE":
-            raise NotImplementedError("Firebase connector not configured. Add it via the Connectors page.")
+        if target in _PLANNED:
+            raise NotImplementedError(
+                f"{_PLANNED[target]} connector not configured. Add it via the Connectors page."
+            )
 
-        else:
-            raise ValueError(f"Unknown target system: {target}. Configure it via the Connectors page.")
+        raise ValueError(f"Unknown target system: {target}. Configure it via the Connectors page.")
 
     def get_available_connectors(self) -> list:
         """Return list of available connector types."""
@@ -433,46 +879,66 @@ class ConnectorFactory:
         return connectors
 
     async def test_all_connectors(self) -> Dict[str, Dict[str, any]]:
-        """Test connectivity to all configured connectors."""
-        results = {}
-
-        # Test static connectors
+        """Test connectivity to all configured connectors (in parallel)."""
+        # Dynamic configs first: get_connector prefers them over the static connector
+        sources = {name: "dynamic" for name in self._dynamic_configs.keys()}
         for target in ["LDAP", "SQL", "ODOO"]:
-            try:
-                connector = self.get_connector(target)
-                connected = await connector.test_connection()
+            sources.setdefault(target, "static")
+
+        slots = asyncio.Semaphore(CONNECTOR_TEST_CONCURRENCY)
+        outcomes = await asyncio.gather(
+            *(self._test_connector(target, slots) for target in sources),
+            return_exceptions=True
+        )
+
+        results = {}
+        for (target, source), outcome in zip(sources.items(), outcomes):
+            if isinstance(outcome, Exception):
+                results[target] = {"status": "error", "error": str(outcome), "source": source}
+            else:
                 results[target] = {
-                    "status": "connected" if connected else "failed",
+                    "status": "connected" if outcome else "failed",
                     "error": None,
-                    "source": "static"
-                }
-            except Exception as e:
-                results[target] = {
-                    "status": "error",
-                    "error": str(e),
-                    "source": "static"
+                    "source": source
                 }
 
-        # Test dynamic connectors
-        for name in self._dynamic_configs.keys():
-            if name not in results:
-                try:
-                    connector = self.get_connector(name)
-                    connected = await connector.test_connection()
-                    results[name] = {
-                        "status": "connected" if connected else "failed",
-                        "error": None,
-                        "source": "dynamic"
-                    }
-                except Exception as e:
-                    results[name] = {
-                        "status": "error",
-                        "error": str(e),
-                        "source": "dynamic"
-                    }
-
         return results
 
+    async def _test_connector(self, target: str, slots: asyncio.Semaphore) -> bool:
+        """Cree (si besoin) puis teste le connecteur d'une cible (resultat garde CONNECTOR_TEST_TTL s)."""
+        result = self._test_results.get(target)
+        if result is None:
+            async with slots:
+                result = await self.get_connector(target).test_connection()
+            self._test_results[target] = result
+        return result
+
+    async def warmup(self, targets: Optional[List[str]] = None) -> None:
+        """Cree les connecteurs et ouvre leurs connexions avant les premieres requetes."""
+        if targets is None:
+            targets = list(self._dynamic_configs)
+            targets += [t for t in ("LDAP", "SQL", "ODOO") if t not in self._dynamic_configs]
+
+        outcomes = await asyncio.gather(
+            *(self._warmup_connector(target) for target in targets),
+            return_exceptions=True
+        )
+        for target, outcome in zip(targets, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning("Connector warmup failed", target=target, error=str(outcome))
+
+        logger.info("Connectors warmed up", targets=targets)
+
+    async def _warmup_connector(self, target: str) -> None:
+        await self.get_connector(target).warmup()
+
     def clear_cache(self):
         """Clear connector cache."""
-        self._connectors.clear()
+        self._release_connectors()
+
+
+async def warmup_connectors() -> None:
+    """Charge les connecteurs dynamiques puis ouvre les connexions de toutes les cibles."""
+    factory = ConnectorFactory()
+    await factory.load_dynamic_connectors()
+    await factory.warmup()
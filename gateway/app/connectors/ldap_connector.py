@@ -1,15 +1,36 @@
 """
 Connecteur LDAP/Active Directory
 """
-from typing import Dict, Any, Optional, List
-from ldap3 import Server, Connection, ALL, SUBTREE, MODIFY_ADD, MODIFY_DELETE, MODIFY_REPLACE
+from typing import Dict, Any, Optional, List, AsyncIterator, Tuple, Callable
+import threading
+from cachetools import TTLCache
+from ldap3 import Server, Connection, ALL, SUBTREE, MODIFY_ADD, MODIFY_DELETE, MODIFY_REPLACE, NO_ATTRIBUTES, RESTARTABLE
+from ldap3.utils.dn import escape_rdn
 import structlog
 
-from app.connectors.base import BaseConnector
+from app.connectors.base import BaseConnector, ACCOUNT_PAGE_SIZE, failed_row
+from app.connectors.pool import AsyncConnectionPool
 from app.core.config import settings
 
 logger = structlog.get_logger()
 
+# Correspondance uid -> DN gardee en memoire (stable pendant la vie du compte)
+DN_CACHE_SIZE = 10_000
+DN_CACHE_TTL = 300
+
+
+def _search_results(conn: Connection) -> List[Dict[str, Any]]:
+    """Entrees brutes de la derniere recherche (sans construire d'objets Entry)."""
+    return [r for r in conn.response or [] if r.get('type') == 'searchResEntry']
+
+
+def _first(attributes: Dict[str, Any], name: str) -> Optional[str]:
+    """Premiere valeur d'un attribut en texte, None s'il est absent."""
+    value = attributes.get(name)
+    if isinstance(value, list):
+        value = value[0] if value else None
+    return str(value) if value is not None else None
+
 
 class LDAPConnector(BaseConnector):
     """
@@ -33,79 +54,124 @@ class LDAPConnector(BaseConnector):
         self.base_dn = settings.LDAP_BASE_DN
         self.users_ou = f"ou=users,{self.base_dn}"
         self.groups_ou = f"ou=groups,{self.base_dn}"
+        self.pool = AsyncConnectionPool(
+            open_connection=lambda: self._run_sync(self._get_connection),
+            close_connection=lambda conn: self._run_sync(conn.unbind),
+            minsize=settings.LDAP_POOL_MIN_SIZE,
+            maxsize=settings.LDAP_POOL_MAX_SIZE,
+            is_alive=lambda conn: conn.bound and not conn.closed
+        )
+        # uid -> DN; lu et ecrit depuis les threads du pool d'execution
+        self._dn_cache: TTLCache = TTLCache(maxsize=DN_CACHE_SIZE, ttl=DN_CACHE_TTL)
+        self._dn_lock = threading.Lock()
 
     def _get_connection(self) -> Connection:
-        """Get LDAP connection."""
+        """Get LDAP connection (reopened and rebound automatically if the server drops it)."""
         conn = Connection(
             self.server,
             user=self.bind_dn,
             password=self.bind_password,
+            client_strategy=RESTARTABLE,
             auto_bind=True
         )
         return conn
 
     async def test_connection(self) -> bool:
         """Test LDAP connectivity."""
-        try:
+        def probe() -> bool:
             conn = self._get_connection()
             result = conn.bind()
             conn.unbind()
             return result
+
+        try:
+            return await self._run_sync(probe)
         except Exception as e:
             logger.error("LDAP connection test failed", error=str(e))
             return False
 
+    async def warmup(self) -> None:
+        """Ouvre les connexions initiales du pool."""
+        async with self.pool.acquire():
+            pass
+
     async def create_account(
         self,
         account_id: str,
         attributes: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Create LDAP user account."""
-        conn = self._get_connection()
+        async with self.pool.acquire() as conn:
+            return await self._run_sync(self._add_account, conn, account_id, attributes)
 
-        try:
-            dn = f"uid={attributes.get('uid', account_id)},{self.users_ou}"
-
-            # Build LDAP attributes
-            firstname = attributes.get('givenName') or attributes.get('firstname') or ''
-            lastname = attributes.get('sn') or attributes.get('lastname') or account_id
-            cn = attributes.get('cn') or f"{firstname} {lastname}".strip() or account_id
-
-            ldap_attrs = {
-                'objectClass': ['inetOrgPerson', 'organizationalPerson', 'person', 'top'],
-                'uid': attributes.get('uid', account_id),
-                'cn': cn,
-                'sn': lastname,
-            }
+    async def bulk_create_accounts(
+        self,
+        rows: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """Create several LDAP accounts back-to-back on a single bound connection."""
+        async with self.pool.acquire() as conn:
+            return await self._run_sync(self._sync_bulk_create_accounts, conn, rows)
 
-            # Only add givenName if not empty (LDAP doesn't accept empty strings)
-            if firstname:
-                ldap_attrs['givenName'] = firstname
-
-            # Add optional attributes
-            if attributes.get('mail'):
-                ldap_attrs['mail'] = attributes['mail']
-            if attributes.get('userPassword'):
-                ldap_attrs['userPassword'] = attributes['userPassword']
-            if attributes.get('employeeNumber'):
-                ldap_attrs['employeeNumber'] = attributes['employeeNumber']
-            if attributes.get('departmentNumber'):
-                ldap_attrs['departmentNumber'] = attributes['departmentNumber']
-
-            result = conn.add(dn, attributes=ldap_attrs)
-
-            if result:
-                logger.info("LDAP account created", uid=ldap_attrs['uid'], dn=dn)
-                return {
-                    "dn": dn,
-                    "uid": ldap_attrs['uid'],
-                    "status": "created"
-                }
-            else:
-                raise Exception(f"Failed to create LDAP account: {conn.result}")
-
-        finally:
-            conn.unbind()
+    def _sync_bulk_create_accounts(
+        self,
+        conn: Connection,
+        rows: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        results = []
+        for account_id, attributes in rows:
+            try:
+                results.append(self._add_account(conn, account_id, attributes))
+            except Exception as e:
+                results.append(failed_row(e))
+        return results
+
+    def _add_account(
+        self,
+        conn: Connection,
+        account_id: str,
+        attributes: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Send one add operation on an already bound connection."""
+        dn = self._guess_dn(attributes.get('uid', account_id))
+
+        # Build LDAP attributes
+        firstname = attributes.get('givenName') or attributes.get('firstname') or ''
+        lastname = attributes.get('sn') or attributes.get('lastname') or account_id
+        cn = attributes.get('cn') or f"{firstname} {lastname}".strip() or account_id
+
+        ldap_attrs = {
+            'objectClass': ['inetOrgPerson', 'organizationalPerson', 'person', 'top'],
+            'uid': attributes.get('uid', account_id),
+            'cn': cn,
+            'sn': lastname,
+        }
+
+        # Only add givenName if not empty (LDAP doesn't accept empty strings)
+        if firstname:
+            ldap_attrs['givenName'] = firstname
+
+        # Add optional attributes
+        if attributes.get('mail'):
+            ldap_attrs['mail'] = attributes['mail']
+        if attributes.get('userPassword'):
+            ldap_attrs['userPassword'] = attributes['userPassword']
+        if attributes.get('employeeNumber'):
+            ldap_attrs['employeeNumber'] = attributes['employeeNumber']
+        if attributes.get('departmentNumber'):
+            ldap_attrs['departmentNumber'] = attributes['departmentNumber']
+
+        result = conn.add(dn, attributes=ldap_attrs)
+
+        if result:
+            self._remember_dn(ldap_attrs['uid'], dn)
+            logger.info("LDAP account created", uid=ldap_attrs['uid'], dn=dn)
+            return {
+                "dn": dn,
+                "uid": ldap_attrs['uid'],
+                "status": "created"
+            }
+        else:
+            raise Exception(f"Failed to create LDAP account: {conn.result}")
 
     async def update_account(
         self,
@@ -113,114 +179,131 @@ class LDAPConnector(BaseConnector):
         attributes: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Update LDAP user account."""
-        conn = self._get_connection()
-
-        try:
-            # Find user DN
-            dn = await self._find_user_dn(account_id, conn)
-            if not dn:
-                raise Exception(f"User {account_id} not found")
-
-            # Build modifications
-            changes = {}
-            attr_mapping = {
-                'cn': 'cn',
-                'firstname': 'givenName',
-                'lastname': 'sn',
-                'mail': 'mail',
-                'email': 'mail',
-                'employeeNumber': 'employeeNumber',
-                'department': 'departmentNumber'
-            }
+        async with self.pool.acquire() as conn:
+            return await self._run_sync(self._sync_update_account, conn, account_id, attributes)
 
-            for key, value in attributes.items():
-                ldap_attr = attr_mapping.get(key, key)
-                if value is not None:
-                    changes[ldap_attr] = [(MODIFY_REPLACE, [value])]
-
-            if changes:
-                result = conn.modify(dn, changes)
-                if not result:
-                    raise Exception(f"Failed to update: {conn.result}")
+    def _sync_update_account(
+        self,
+        conn: Connection,
+        account_id: str,
+        attributes: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        # Build modifications
+        changes = {}
+        attr_mapping = {
+            'cn': 'cn',
+            'firstname': 'givenName',
+            'lastname': 'sn',
+            'mail': 'mail',
+            'email': 'mail',
+            'employeeNumber': 'employeeNumber',
+            'department': 'departmentNumber'
+        }
+
+        for key, value in attributes.items():
+            ldap_attr = attr_mapping.get(key, key)
+            if value is not None:
+                changes[ldap_attr] = [(MODIFY_REPLACE, [value])]
+
+        if changes:
+            dn, result = self._apply_to_user(
+                conn, account_id, lambda user_dn: conn.modify(user_dn, changes)
+            )
+        else:
+            dn = self._find_user_dn(account_id, conn)
+            result = True
 
-            logger.info("LDAP account updated", uid=account_id)
-            return {"dn": dn, "status": "updated"}
+        if not dn:
+            raise Exception(f"User {account_id} not found")
+        if not result:
+            raise Exception(f"Failed to update: {conn.result}")
 
-        finally:
-            conn.unbind()
+        logger.info("LDAP account updated", uid=account_id)
+        return {"dn": dn, "status": "updated"}
 
     async def delete_account(self, account_id: str) -> bool:
         """Delete LDAP user account."""
-        conn = self._get_connection()
-
-        try:
-            dn = await self._find_user_dn(account_id, conn)
-            if not dn:
-                logger.warning("User not found for deletion", uid=account_id)
-                return True  # Consider success if not found
-
-            result = conn.delete(dn)
-            if result:
-                logger.info("LDAP account deleted", uid=account_id)
-                return True
-            else:
-                raise Exception(f"Failed to delete: {conn.result}")
-
-        finally:
-            conn.unbind()
+        async with self.pool.acquire() as conn:
+            return await self._run_sync(self._sync_delete_account, conn, account_id)
+
+    def _sync_delete_account(self, conn: Connection, account_id: str) -> bool:
+        dn, result = self._apply_to_user(conn, account_id, conn.delete)
+        self._forget_dn(account_id)
+        if not dn:
+            logger.warning("User not found for deletion", uid=account_id)
+            return True  # Consider success if not found
+
+        if result:
+            logger.info("LDAP account deleted", uid=account_id)
+            return True
+        else:
+            raise Exception(f"Failed to delete: {conn.result}")
 
     async def get_account(self, account_id: str) -> Optional[Dict[str, Any]]:
         """Get LDAP user account."""
-        conn = self._get_connection()
+        async with self.pool.acquire() as conn:
+            return await self._run_sync(self._sync_get_account, conn, account_id)
 
-        try:
-            conn.search(
-                search_base=self.users_ou,
-                search_filter=f"(uid={account_id})",
-                search_scope=SUBTREE,
-                attributes=['*']
-            )
+    def _sync_get_account(self, conn: Connection, account_id: str) -> Optional[Dict[str, Any]]:
+        conn.search(
+            search_base=self.users_ou,
+            search_filter=f"(uid={account_id})",
+            search_scope=SUBTREE,
+            attributes=['*']
+        )
 
-            if conn.entries:
-                entry = conn.entries[0]
-                return {
-                    "dn": str(entry.entry_dn),
-                    "uid": str(entry.uid) if hasattr(entry, 'uid') else None,
-                    "cn": str(entry.cn) if hasattr(entry, 'cn') else None,
-                    "givenName": str(entry.givenName) if hasattr(entry, 'givenName') else None,
-                    "sn": str(entry.sn) if hasattr(entry, 'sn') else None,
-                    "mail": str(entry.mail) if hasattr(entry, 'mail') else None,
-                }
-            return None
-
-        finally:
-            conn.unbind()
+        results = _search_results(conn)
+        if results:
+            entry = results[0]
+            attrs = entry['attributes']
+            return {
+                "dn": entry['dn'],
+                "uid": _first(attrs, 'uid'),
+                "cn": _first(attrs, 'cn'),
+                "givenName": _first(attrs, 'givenName'),
+                "sn": _first(attrs, 'sn'),
+                "mail": _first(attrs, 'mail'),
+            }
+        return None
 
     async def list_accounts(self) -> List[Dict[str, Any]]:
         """List all LDAP user accounts."""
-        conn = self._get_connection()
+        return [account async for account in self.iter_accounts()]
 
-        try:
+    async def iter_accounts(
+        self,
+        page_size: int = ACCOUNT_PAGE_SIZE
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream LDAP user accounts using the paged results control."""
+        def fetch_page(conn: Connection, cookie: Optional[bytes]):
             conn.search(
                 search_base=self.users_ou,
                 search_filter="(objectClass=inetOrgPerson)",
                 search_scope=SUBTREE,
-                attributes=['uid', 'cn', 'mail', 'givenName', 'sn']
+                attributes=['uid', 'cn', 'mail', 'givenName', 'sn'],
+                paged_size=page_size,
+                paged_cookie=cookie
             )
-
-            accounts = []
-            for entry in conn.entries:
-                accounts.append({
-                    "id": str(entry.uid) if hasattr(entry, 'uid') else None,
-                    "uid": str(entry.uid) if hasattr(entry, 'uid') else None,
-                    "cn": str(entry.cn) if hasattr(entry, 'cn') else None,
-                    "mail": str(entry.mail) if hasattr(entry, 'mail') else None,
-                })
-
-            return accounts
-
-        finally:
-            conn.unbind()
+            controls = conn.result.get('controls') or {}
+            paged = controls.get('1.2.840.113556.1.4.319', {})
+            next_cookie = paged.get('value', {}).get('cookie')
+            return _search_results(conn), next_cookie
+
+        async with self.pool.acquire() as conn:
+            cookie = None
+            while True:
+                entries, cookie = await self._run_sync(fetch_page, conn, cookie)
+                for entry in entries:
+                    attrs = entry['attributes']
+                    uid = _first(attrs, 'uid')
+                    yield {
+                        "id": uid,
+                        "uid": uid,
+                        "cn": _first(attrs, 'cn'),
+                        "mail": _first(attrs, 'mail'),
+                    }
+                if not cookie:
+                    return
 
     async def disable_account(self, account_id: str) -> bool:
         """Disable LDAP account (AD specific or custom attribute)."""
@@ -234,13 +317,23 @@ class LDAPConnector(BaseConnector):
 
     async def add_to_group(self, account_id: str, group_id: str) -> bool:
         """Add user to LDAP group."""
-        conn = self._get_connection()
+        async with self.pool.acquire() as conn:
+            return await self._run_sync(self._sync_add_to_group, conn, account_id, group_id)
 
-        try:
-            user_dn = await self._find_user_dn(account_id, conn)
-            if not user_dn:
-                raise Exception(f"User {account_id} not found")
+    def _sync_add_to_group(self, conn: Connection, account_id: str, group_id: str) -> bool:
+        return self._sync_add_to_groups(conn, account_id, [group_id])
+
+    async def add_to_groups(self, account_id: str, group_ids: List[str]) -> bool:
+        """Add user to several LDAP groups, resolving its DN once on one connection."""
+        async with self.pool.acquire() as conn:
+            return await self._run_sync(self._sync_add_to_groups, conn, account_id, group_ids)
 
+    def _sync_add_to_groups(self, conn: Connection, account_id: str, group_ids: List[str]) -> bool:
+        user_dn = self._find_user_dn(account_id, conn)
+        if not user_dn:
+            raise Exception(f"User {account_id} not found")
+
+        for group_id in group_ids:
             group_dn = f"cn={group_id},{self.groups_ou}"
 
             result = conn.modify(
@@ -248,24 +341,31 @@ class LDAPConnector(BaseConnector):
                 {'member': [(MODIFY_ADD, [user_dn])]}
             )
 
-            if result:
-                logger.info("User added to group", user=account_id, group=group_id)
-                return True
-            else:
-                raise Exception(f"Failed to add to group: {conn.result}")
+            if not result:
+                raise Exception(f"Failed to add to group {group_id}: {conn.result}")
+            logger.info("User added to group", user=account_id, group=group_id)
 
-        finally:
-            conn.unbind()
+        return True
 
     async def remove_from_group(self, account_id: str, group_id: str) -> bool:
         """Remove user from LDAP group."""
-        conn = self._get_connection()
+        async with self.pool.acquire() as conn:
+            return await self._run_sync(self._sync_remove_from_group, conn, account_id, group_id)
 
-        try:
-            user_dn = await self._find_user_dn(account_id, conn)
-            if not user_dn:
-                raise Exception(f"User {account_id} not found")
+    def _sync_remove_from_group(self, conn: Connection, account_id: str, group_id: str) -> bool:
+        return self._sync_remove_from_groups(conn, account_id, [group_id])
+
+    async def remove_from_groups(self, account_id: str, group_ids: List[str]) -> bool:
+        """Remove user from several LDAP groups, resolving its DN once on one connection."""
+        async with self.pool.acquire() as conn:
+            return await self._run_sync(self._sync_remove_from_groups, conn, account_id, group_ids)
+
+    def _sync_remove_from_groups(self, conn: Connection, account_id: str, group_ids: List[str]) -> bool:
+        user_dn = self._find_user_dn(account_id, conn)
+        if not user_dn:
+            raise Exception(f"User {account_id} not found")
 
+        for group_id in group_ids:
             group_dn = f"cn={group_id},{self.groups_ou}"
 
             result = conn.modify(
@@ -273,45 +373,88 @@ class LDAPConnector(BaseConnector):
                 {'member': [(MODIFY_DELETE, [user_dn])]}
             )
 
-            if result:
-                logger.info("User removed from group", user=account_id, group=group_id)
-                return True
-            else:
-                raise Exception(f"Failed to remove from group: {conn.result}")
+            if not result:
+                raise Exception(f"Failed to remove from group {group_id}: {conn.result}")
+            logger.info("User removed from group", user=account_id, group=group_id)
 
-        finally:
-            conn.unbind()
+        return True
 
     async def get_groups(self, account_id: str) -> List[str]:
         """Get groups for a user."""
-        conn = self._get_connection()
+        async with self.pool.acquire() as conn:
+            return await self._run_sync(self._sync_get_groups, conn, account_id)
 
-        try:
-            user_dn = await self._find_user_dn(account_id, conn)
-            if not user_dn:
-                return []
+    def _sync_get_groups(self, conn: Connection, account_id: str) -> List[str]:
+        user_dn = self._find_user_dn(account_id, conn)
+        if not user_dn:
+            return []
 
-            conn.search(
-                search_base=self.groups_ou,
-                search_filter=f"(member={user_dn})",
-                search_scope=SUBTREE,
-                attributes=['cn']
-            )
+        conn.search(
+            search_base=self.groups_ou,
+            search_filter=f"(member={user_dn})",
+            search_scope=SUBTREE,
+            attributes=['cn']
+        )
 
-            return [str(entry.cn) for entry in conn.entries]
+        return [_first(entry['attributes'], 'cn') for entry in _search_results(conn)]
 
-        finally:
-            conn.unbind()
+    def _guess_dn(self, account_id: str) -> str:
+        """DN construit par create_account pour ce uid."""
+        return f"uid={escape_rdn(account_id)},{self.users_ou}"
+
+    def _apply_to_user(
+        self,
+        conn: Connection,
+        account_id: str,
+        operation: Callable[[str], bool]
+    ) -> Tuple[Optional[str], bool]:
+        """
+        Applique operation(dn) a l'entree de l'utilisateur sans recherche prealable.
+
+        Essaie le DN connu (cache ou deduit du uid) ; si l'entree n'existe pas,
+        retombe sur une recherche par uid. Renvoie (dn, resultat), dn None si introuvable.
+        """
+        with self._dn_lock:
+            dn = self._dn_cache.get(account_id)
+        dn = dn or self._guess_dn(account_id)
+
+        if operation(dn):
+            self._remember_dn(account_id, dn)
+            return dn, True
+        if conn.result.get('description') != 'noSuchObject':
+            return dn, False
+
+        self._forget_dn(account_id)
+        dn = self._find_user_dn(account_id, conn)
+        if not dn:
+            return None, False
+        return dn, operation(dn)
+
+    def _remember_dn(self, account_id: str, dn: str) -> None:
+        with self._dn_lock:
+            self._dn_cache[account_id] = dn
+
+    def _forget_dn(self, account_id: str) -> None:
+        with self._dn_lock:
+            self._dn_cache.pop(account_id, None)
+
+    def _find_user_dn(self, account_id: str, conn: Connection) -> Optional[str]:
+        """Find user DN by uid (cached for DN_CACHE_TTL seconds)."""
+        with self._dn_lock:
+            dn = self._dn_cache.get(account_id)
+        if dn is not None:
+            return dn
 
-    async def _find_user_dn(self, account_id: str, conn: Connection) -> Optional[str]:
-        """Find user DN by uid."""
         conn.search(
             search_base=self.users_ou,
             search_filter=f"(uid={account_id})",
             search_scope=SUBTREE,
-            attributes=['dn']
+            attributes=NO_ATTRIBUTES
         )
 
-        if conn.entries:
-            return str(conn.entries[0].entry_dn)
+        results = _search_results(conn)
+        if results:
+            dn = results[0]['dn']
+            self._remember_dn(account_id, dn)
+            return dn
         return None
@@ -6,6 +6,7 @@ pour toutes les operations de provisioning. MidPoint gere ensuite
 la propagation vers les systemes cibles (LDAP, Odoo, SQL, etc.)
 via ses propres connecteurs configures.
 """
+from dataclasses import dataclass
 from typing import Dict, Any, Optional, List
 import httpx
 import structlog
@@ -16,6 +17,14 @@ from app.core.config import settings
 logger = structlog.get_logger()
 
 
+@dataclass
+class AssignRoleResult:
+    """Resultat detaille d'une assignation de role."""
+    ok: bool
+    status_code: int = 200
+    reason: str = ""
+
+
 class MidPointConnector(BaseConnector):
     """
     Connecteur pour MidPoint comme hub central IAM.
@@ -368,14 +377,38 @@ class MidPointConnector(BaseConnector):
         Returns:
             True if successful
         """
+        result = await self.try_assign_role(account_id, role_id)
+        return result.ok
+
+    async def try_assign_role(self, account_id: str, role_id: str) -> AssignRoleResult:
+        """
+        Assign a role to a user and report why it failed, if it did.
+
+        Args:
+            account_id: User OID or name
+            role_id: Role OID or name
+
+        Returns:
+            AssignRoleResult with the HTTP status to surface to the caller
+        """
         try:
             client = self._get_client()
 
             user_oid = await self._resolve_oid(account_id)
-            role_oid = await self._resolve_role_oid(role_id)
+            if not user_oid:
+                return AssignRoleResult(
+                    ok=False,
+                    status_code=404,
+                    reason=f"User {account_id} not found in MidPoint"
+                )
 
-            if not user_oid or not role_oid:
-                raise Exception(f"User or role not found: {account_id}, {role_id}")
+            role_oid = await self._resolve_role_oid(role_id)
+            if not role_oid:
+                return AssignRoleResult(
+                    ok=False,
+                    status_code=404,
+                    reason=f"Role {role_id} not found in MidPoint"
+                )
 
             # Create assignment
             assignment = {
@@ -399,17 +432,20 @@ class MidPointConnector(BaseConnector):
                 json=assignment
             )
 
-            success = response.status_code in [200, 204]
-            if success:
+            if response.status_code in [200, 204]:
                 logger.info("Role assigned", user=account_id, role=role_id)
-            else:
-                logger.error("Failed to assign role", status=response.status_code, response=response.text[:200])
+                return AssignRoleResult(ok=True)
 
-            return success
+            logger.error("Failed to assign role", status=response.status_code, response=response.text[:200])
+            return AssignRoleResult(
+                ok=False,
+                status_code=502,
+                reason=f"MidPoint returned {response.status_code}: {response.text[:200]}"
+            )
 
         except Exception as e:
             logger.error("Error assigning role", error=str(e))
-            return False
+            return AssignRoleResult(ok=False, status_code=500, reason=str(e))
 
     async def remove_role(self, account_id: str, role_id: str) -> bool:
         """
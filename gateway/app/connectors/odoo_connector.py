@@ -1,11 +1,11 @@
 """
 Connecteur Odoo via XML-RPC
 """
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
 import xmlrpc.client
 import structlog
 
-from app.connectors.base import BaseConnector
+from app.connectors.base import BaseConnector, ACCOUNT_PAGE_SIZE
 from app.core.config import settings
 
 logger = structlog.get_logger()
@@ -55,17 +55,25 @@ class OdooConnector(BaseConnector):
             model, method, list(args)
         )
 
+    async def _call(self, model: str, method: str, *args):
+        """Execute an Odoo RPC call without blocking the event loop."""
+        return await self._run_sync(self._execute, model, method, *args)
+
     async def test_connection(self) -> bool:
         """Test Odoo connectivity."""
         try:
             common = xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/common')
-            version = common.version()
+            version = await self._run_sync(common.version)
             logger.info("Odoo connected", version=version.get('server_version'))
             return True
         except Exception as e:
             logger.error("Odoo connection test failed", error=str(e))
             return False
 
+    async def warmup(self) -> None:
+        """Authentifie d'avance (uid mis en cache)."""
+        await self._run_sync(self._authenticate)
+
     async def create_account(
         self,
         account_id: str,
@@ -85,7 +93,7 @@ class OdooConnector(BaseConnector):
             if attributes.get('phone'):
                 partner_data['phone'] = attributes.get('phone')
 
-            partner_result = self._execute('res.partner', 'create', [partner_data])
+            partner_result = await self._call('res.partner', 'create', [partner_data])
             # Extract partner_id from result (can be int or list)
             partner_id = partner_result[0] if isinstance(partner_result, list) else partner_result
 
@@ -101,7 +109,7 @@ class OdooConnector(BaseConnector):
             if attributes.get('groups'):
                 user_data['groups_id'] = [(6, 0, attributes['groups'])]
 
-            user_result = self._execute('res.users', 'create', [user_data])
+            user_result = await self._call('res.users', 'create', [user_data])
             # Extract user_id from result (can be int or list)
             user_id = user_result[0] if isinstance(user_result, list) else user_result
 
@@ -146,7 +154,7 @@ class OdooConnector(BaseConnector):
                 update_data['active'] = attributes['active']
 
             if update_data:
-                self._execute('res.users', 'write', [[user_id], update_data])
+                await self._call('res.users', 'write', [[user_id], update_data])
 
             # Update partner if needed
             if user.get('partner_id') and ('email' in attributes or 'phone' in attributes):
@@ -157,7 +165,7 @@ class OdooConnector(BaseConnector):
                     partner_data['phone'] = attributes['phone']
 
                 if partner_data:
-                    self._execute('res.partner', 'write', [[user['partner_id']], partner_data])
+                    await self._call('res.partner', 'write', [[user['partner_id']], partner_data])
 
             logger.info("Odoo account updated", user_id=user_id)
             return {"id": user_id, "status": "updated"}
@@ -175,7 +183,7 @@ class OdooConnector(BaseConnector):
                 return True
 
             # Deactivate instead of delete (Odoo best practice)
-            self._execute('res.users', 'write', [[user['id']], {'active': False}])
+            await self._call('res.users', 'write', [[user['id']], {'active': False}])
 
             logger.info("Odoo account deactivated", user_id=user['id'])
             return True
@@ -190,7 +198,7 @@ class OdooConnector(BaseConnector):
             # Search by login or ID
             domain = ['|', ('login', '=', account_id), ('id', '=', int(account_id) if account_id.isdigit() else 0)]
 
-            users = self._execute(
+            users = await self._call(
                 'res.users', 'search_read',
                 [domain],
                 {'fields': ['id', 'name', 'login', 'email', 'active', 'partner_id', 'groups_id']}
@@ -215,26 +223,44 @@ class OdooConnector(BaseConnector):
 
     async def list_accounts(self) -> List[Dict[str, Any]]:
         """List all Odoo user accounts."""
-        try:
-            users = self._execute(
-                'res.users', 'search_read',
-                [[]],
-                {'fields': ['id', 'name', 'login', 'active']}
-            )
+        return [account async for account in self.iter_accounts()]
 
-            return [
-                {
+    async def iter_accounts(
+        self,
+        page_size: int = ACCOUNT_PAGE_SIZE
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream Odoo user accounts page by page (search_read offset/limit)."""
+        offset = 0
+        while True:
+            try:
+                users = await self._call(
+                    'res.users', 'search_read',
+                    [[]],
+                    {
+                        'fields': ['id', 'name', 'login', 'active'],
+                        'order': 'id',
+                        'offset': offset,
+                        'limit': page_size
+                    }
+                )
+            except Exception as e:
+                logger.error("Failed to list Odoo accounts", error=str(e))
+                if offset:
+                    # Pages deja transmises : ne pas presenter un listage partiel comme complet
+                    raise
+                return
+
+            for u in users:
+                yield {
                     "id": u['id'],
                     "name": u['name'],
                     "login": u['login'],
                     "active": u['active']
                 }
-                for u in users
-            ]
 
-        except Exception as e:
-            logger.error("Failed to list Odoo accounts", error=str(e))
-            return []
+            if len(users) < page_size:
+                return
+            offset += page_size
 
     async def disable_account(self, account_id: str) -> bool:
         """Disable Odoo user account."""
@@ -254,18 +280,22 @@ class OdooConnector(BaseConnector):
 
     async def add_to_group(self, account_id: str, group_id: str) -> bool:
         """Add user to Odoo group."""
+        return await self.add_to_groups(account_id, [group_id])
+
+    async def add_to_groups(self, account_id: str, group_ids: List[str]) -> bool:
+        """Add user to several Odoo groups in a single write."""
         try:
             user = await self.get_account(account_id)
             if not user:
                 raise Exception(f"User {account_id} not found")
 
-            # Add group (4 = add relation)
-            self._execute(
+            # Add groups (4 = add relation)
+            await self._call(
                 'res.users', 'write',
-                [[user['id']], {'groups_id': [(4, int(group_id))]}]
+                [[user['id']], {'groups_id': [(4, int(group_id)) for group_id in group_ids]}]
             )
 
-            logger.info("User added to Odoo group", user_id=user['id'], group_id=group_id)
+            logger.info("User added to Odoo groups", user_id=user['id'], group_ids=group_ids)
             return True
 
         except Exception as e:
@@ -274,18 +304,22 @@ class OdooConnector(BaseConnector):
 
     async def remove_from_group(self, account_id: str, group_id: str) -> bool:
         """Remove user from Odoo group."""
+        return await self.remove_from_groups(account_id, [group_id])
+
+    async def remove_from_groups(self, account_id: str, group_ids: List[str]) -> bool:
+        """Remove user from several Odoo groups in a single write."""
         try:
             user = await self.get_account(account_id)
             if not user:
                 raise Exception(f"User {account_id} not found")
 
-            # Remove group (3 = remove relation)
-            self._execute(
+            # Remove groups (3 = remove relation)
+            await self._call(
                 'res.users', 'write',
-                [[user['id']], {'groups_id': [(3, int(group_id))]}]
+                [[user['id']], {'groups_id': [(3, int(group_id)) for group_id in group_ids]}]
             )
 
-            logger.info("User removed from Odoo group", user_id=user['id'], group_id=group_id)
+            logger.info("User removed from Odoo groups", user_id=user['id'], group_ids=group_ids)
             return True
 
         except Exception as e:
@@ -305,7 +339,7 @@ class OdooConnector(BaseConnector):
     async def get_available_groups(self) -> List[Dict[str, Any]]:
         """Get all available Odoo groups."""
         try:
-            groups = self._execute(
+            groups = await self._call(
                 'res.groups', 'search_read',
                 [[]],
                 {'fields': ['id', 'name', 'full_name']}
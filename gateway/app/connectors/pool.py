@@ -0,0 +1,90 @@
+"""
+Pool borne de connexions pour les connecteurs.
+"""
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+import asyncio
+import structlog
+
+logger = structlog.get_logger()
+
+
+class AsyncConnectionPool:
+    """
+    Pool de connexions reutilisables (minsize ouvertes d'avance, maxsize au plus).
+
+    Une connexion n'est utilisee que par une coroutine a la fois ;
+    les connexions hors d'usage (is_alive faux) sont remplacees.
+    Apres close(), le pool refuse les emprunts et ferme les connexions rendues.
+    """
+
+    def __init__(
+        self,
+        open_connection: Callable[[], Awaitable[Any]],
+        close_connection: Callable[[Any], Awaitable[None]],
+        minsize: int = 1,
+        maxsize: int = 8,
+        is_alive: Optional[Callable[[Any], bool]] = None
+    ):
+        self._open = open_connection
+        self._close = close_connection
+        self._is_alive = is_alive or (lambda conn: True)
+        self.minsize = min(minsize, maxsize)
+        self.maxsize = maxsize
+        self._idle: List[Any] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._closed = False
+
+    async def _ensure_started(self) -> None:
+        """Ouvre les minsize premieres connexions au premier emprunt."""
+        if self._slots is not None:
+            return
+        self._slots = asyncio.Semaphore(self.maxsize)
+        for _ in range(self.minsize):
+            try:
+                conn = await self._open()
+            except Exception as e:
+                logger.warning("Connection pool warm-up failed", error=str(e))
+                break
+            if self._closed:
+                await self._discard(conn)
+                break
+            self._idle.append(conn)
+
+    async def _discard(self, conn: Any) -> None:
+        try:
+            await self._close(conn)
+        except Exception as e:
+            logger.debug("Pooled connection close failed", error=str(e))
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Any]:
+        """Emprunte une connexion ; attend si maxsize connexions sont deja empruntees."""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        await self._ensure_started()
+
+        async with self._slots:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            conn = self._idle.pop() if self._idle else None
+            if conn is not None and not self._is_alive(conn):
+                await self._discard(conn)
+                conn = None
+            if conn is None:
+                conn = await self._open()
+
+            try:
+                yield conn
+            finally:
+                if not self._closed and self._is_alive(conn):
+                    self._idle.append(conn)
+                else:
+                    await self._discard(conn)
+
+    async def close(self) -> None:
+        """Ferme les connexions inactives (les connexions empruntees le seront a leur retour)."""
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await self._discard(conn)
@@ -1,13 +1,13 @@
 """
 Connecteur SQL pour bases de donnees relationnelles
 """
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator, Tuple
 from sqlalchemy import create_engine, text, MetaData, Table, Column, String, Boolean, DateTime
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
 import structlog
 
-from app.connectors.base import BaseConnector
+from app.connectors.base import BaseConnector, ACCOUNT_PAGE_SIZE, failed_row
 from app.core.config import settings
 
 logger = structlog.get_logger()
@@ -54,9 +54,12 @@ class SQLConnector(BaseConnector):
 
     async def test_connection(self) -> bool:
         """Test database connectivity."""
-        try:
+        def probe() -> None:
             with self.engine.connect() as conn:
                 conn.execute(text("SELECT 1"))
+
+        try:
+            await self._run_sync(probe)
             return True
         except SQLAlchemyError as e:
             logger.error("SQL connection test failed", error=str(e))
@@ -68,102 +71,187 @@ class SQLConnector(BaseConnector):
         attributes: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Create user in SQL database."""
+        return await self._run_sync(self._sync_create_account, account_id, attributes)
+
+    def _sync_create_account(
+        self,
+        account_id: str,
+        attributes: Dict[str, Any]
+    ) -> Dict[str, Any]:
         try:
-            username = attributes.get("username", account_id)
             with self.engine.connect() as conn:
-                # Check if user exists by username
-                result = conn.execute(
-                    text("SELECT id FROM users WHERE username = :username"),
-                    {"username": username}
-                )
-                if result.fetchone():
-                    raise Exception(f"User {username} already exists")
-
-                # Insert user (id is auto-generated SERIAL)
-                insert_sql = text("""
-                    INSERT INTO users (username, email, first_name, last_name, department, is_active, created_at)
-                    VALUES (:username, :email, :first_name, :last_name, :department, :is_active, :created_at)
-                    RETURNING id
-                """)
-
-                result = conn.execute(insert_sql, {
-                    "username": username,
-                    "email": attributes.get("email"),
-                    "first_name": attributes.get("firstname", attributes.get("first_name")),
-                    "last_name": attributes.get("lastname", attributes.get("last_name")),
-                    "department": attributes.get("department"),
-                    "is_active": True,
-                    "created_at": datetime.utcnow()
-                })
-
-                new_id = result.fetchone()[0]
+                created = self._insert_account(conn, account_id, attributes)
                 conn.commit()
 
-                logger.info("SQL account created", id=new_id, username=username)
-                return {
-                    "id": new_id,
-                    "username": username,
-                    "status": "created"
-                }
+                logger.info("SQL account created", id=created["id"], username=created["username"])
+                return created
 
         except SQLAlchemyError as e:
             logger.error("Failed to create SQL account", error=str(e))
             raise
 
+    async def bulk_create_accounts(
+        self,
+        rows: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """Create several users on one connection, in a single transaction (one savepoint per row)."""
+        return await self._run_sync(self._sync_bulk_create_accounts, rows)
+
+    def _sync_bulk_create_accounts(
+        self,
+        rows: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        try:
+            with self.engine.begin() as conn:
+                created = self._apply_rows(conn, self._insert_account, rows)
+
+            logger.info("SQL accounts created", count=len(created))
+            return created
+
+        except SQLAlchemyError as e:
+            logger.error("Failed to bulk create SQL accounts", count=len(rows), error=str(e))
+            raise
+
+    @staticmethod
+    def _apply_rows(conn, apply, rows: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Apply one row per savepoint: a failing row is rolled back alone."""
+        results = []
+        for account_id, attributes in rows:
+            try:
+                with conn.begin_nested():
+                    results.append(apply(conn, account_id, attributes))
+            except Exception as e:
+                results.append(failed_row(e))
+        return results
+
+    def _insert_account(self, conn, account_id: str, attributes: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert one user on an open connection (commit left to the caller)."""
+        username = attributes.get("username", account_id)
+
+        # Check if user exists by username
+        result = conn.execute(
+            text("SELECT id FROM users WHERE username = :username"),
+            {"username": username}
+        )
+        if result.fetchone():
+            raise Exception(f"User {username} already exists")
+
+        # Insert user (id is auto-generated SERIAL)
+        insert_sql = text("""
+            INSERT INTO users (username, email, first_name, last_name, department, is_active, created_at)
+            VALUES (:username, :email, :first_name, :last_name, :department, :is_active, :created_at)
+            RETURNING id
+        """)
+
+        result = conn.execute(insert_sql, {
+            "username": username,
+            "email": attributes.get("email"),
+            "first_name": attributes.get("firstname", attributes.get("first_name")),
+            "last_name": attributes.get("lastname", attributes.get("last_name")),
+            "department": attributes.get("department"),
+            "is_active": True,
+            "created_at": datetime.utcnow()
+        })
+
+        return {
+            "id": result.fetchone()[0],
+            "username": username,
+            "status": "created"
+        }
+
     async def update_account(
         self,
         account_id: str,
         attributes: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Update user in SQL database."""
+        return await self._run_sync(self._sync_update_account, account_id, attributes)
+
+    def _sync_update_account(
+        self,
+        account_id: str,
+        attributes: Dict[str, Any]
+    ) -> Dict[str, Any]:
         try:
             with self.engine.connect() as conn:
-                # Build dynamic update
-                set_clauses = []
-                params = {"id": account_id}
-
-                field_mapping = {
-                    "email": "email",
-                    "firstname": "first_name",
-                    "lastname": "last_name",
-                    "first_name": "first_name",
-                    "last_name": "last_name",
-                    "role": "role",
-                    "is_active": "is_active"
-                }
-
-                for key, value in attributes.items():
-                    if key in field_mapping and value is not None:
-                        db_field = field_mapping[key]
-                        set_clauses.append(f"{db_field} = :{db_field}")
-                        params[db_field] = value
-
-                if not set_clauses:
-                    return {"id": account_id, "status": "no_changes"}
-
-                set_clauses.append("updated_at = :updated_at")
-                params["updated_at"] = datetime.utcnow()
-
-                update_sql = text(f"""
-                    UPDATE users SET {', '.join(set_clauses)}
-                    WHERE id = :id
-                """)
-
-                result = conn.execute(update_sql, params)
+                updated = self._update_account(conn, account_id, attributes)
                 conn.commit()
 
-                if result.rowcount == 0:
-                    raise Exception(f"User {account_id} not found")
-
-                logger.info("SQL account updated", id=account_id)
-                return {"id": account_id, "status": "updated"}
+                if updated["status"] == "updated":
+                    logger.info("SQL account updated", id=account_id)
+                return updated
 
         except SQLAlchemyError as e:
             logger.error("Failed to update SQL account", error=str(e))
             raise
 
+    async def bulk_update_accounts(
+        self,
+        rows: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """Update several users on one connection, in a single transaction (one savepoint per row)."""
+        return await self._run_sync(self._sync_bulk_update_accounts, rows)
+
+    def _sync_bulk_update_accounts(
+        self,
+        rows: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        try:
+            with self.engine.begin() as conn:
+                updated = self._apply_rows(conn, self._update_account, rows)
+
+            logger.info("SQL accounts updated", count=len(updated))
+            return updated
+
+        except SQLAlchemyError as e:
+            logger.error("Failed to bulk update SQL accounts", count=len(rows), error=str(e))
+            raise
+
+    def _update_account(self, conn, account_id: str, attributes: Dict[str, Any]) -> Dict[str, Any]:
+        """Update one user on an open connection (commit left to the caller)."""
+        # Build dynamic update
+        set_clauses = []
+        params = {"id": account_id}
+
+        field_mapping = {
+            "email": "email",
+            "firstname": "first_name",
+            "lastname": "last_name",
+            "first_name": "first_name",
+            "last_name": "last_name",
+            "role": "role",
+            "is_active": "is_active"
+        }
+
+        for key, value in attributes.items():
+            if key in field_mapping and value is not None:
+                db_field = field_mapping[key]
+                set_clauses.append(f"{db_field} = :{db_field}")
+                params[db_field] = value
+
+        if not set_clauses:
+            return {"id": account_id, "status": "no_changes"}
+
+        set_clauses.append("updated_at = :updated_at")
+        params["updated_at"] = datetime.utcnow()
+
+        update_sql = text(f"""
+            UPDATE users SET {', '.join(set_clauses)}
+            WHERE id = :id
+        """)
+
+        result = conn.execute(update_sql, params)
+
+        if result.rowcount == 0:
+            raise Exception(f"User {account_id} not found")
+
+        return {"id": account_id, "status": "updated"}
+
     async def delete_account(self, account_id: str) -> bool:
         """Delete user from SQL database."""
+        return await self._run_sync(self._sync_delete_account, account_id)
+
+    def _sync_delete_account(self, account_id: str) -> bool:
         try:
             with self.engine.connect() as conn:
                 # Delete permissions first
@@ -193,6 +281,9 @@ class SQLConnector(BaseConnector):
 
     async def get_account(self, account_id: str) -> Optional[Dict[str, Any]]:
         """Get user from SQL database."""
+        return await self._run_sync(self._sync_get_account, account_id)
+
+    def _sync_get_account(self, account_id: str) -> Optional[Dict[str, Any]]:
         try:
             with self.engine.connect() as conn:
                 result = conn.execute(
@@ -211,17 +302,41 @@ class SQLConnector(BaseConnector):
 
     async def list_accounts(self) -> List[Dict[str, Any]]:
         """List all users from SQL database."""
-        try:
+        return [account async for account in self.iter_accounts()]
+
+    async def iter_accounts(
+        self,
+        page_size: int = ACCOUNT_PAGE_SIZE
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream users page by page (pagination par cle)."""
+        columns = "SELECT id, username, email, first_name, last_name, role, is_active FROM users"
+
+        def fetch_page(after: Optional[str]) -> List[Dict[str, Any]]:
+            where = " WHERE id > :after" if after is not None else ""
             with self.engine.connect() as conn:
                 result = conn.execute(
-                    text("SELECT id, username, email, first_name, last_name, role, is_active FROM users")
+                    text(f"{columns}{where} ORDER BY id LIMIT :limit"),
+                    {"after": after, "limit": page_size}
                 )
-
                 return [dict(row._mapping) for row in result]
 
-        except SQLAlchemyError as e:
-            logger.error("Failed to list SQL accounts", error=str(e))
-            return []
+        after = None
+        while True:
+            try:
+                page = await self._run_sync(fetch_page, after)
+            except SQLAlchemyError as e:
+                logger.error("Failed to list SQL accounts", error=str(e))
+                if after is not None:
+                    # Pages deja transmises : ne pas presenter un listage partiel comme complet
+                    raise
+                return
+
+            for account in page:
+                yield account
+
+            if len(page) < page_size:
+                return
+            after = page[-1]["id"]
 
     async def disable_account(self, account_id: str) -> bool:
         """Disable user account."""
@@ -246,6 +361,14 @@ class SQLConnector(BaseConnector):
         granted_by: str = "system"
     ) -> bool:
         """Add permission to user."""
+        return await self._run_sync(self._sync_add_permission, account_id, permission, granted_by)
+
+    def _sync_add_permission(
+        self,
+        account_id: str,
+        permission: str,
+        granted_by: str = "system"
+    ) -> bool:
         try:
             import uuid
             with self.engine.connect() as conn:
@@ -277,6 +400,13 @@ class SQLConnector(BaseConnector):
         permission: str
     ) -> bool:
         """Remove permission from user."""
+        return await self._run_sync(self._sync_remove_permission, account_id, permission)
+
+    def _sync_remove_permission(
+        self,
+        account_id: str,
+        permission: str
+    ) -> bool:
         try:
             with self.engine.connect() as conn:
                 conn.execute(
@@ -297,6 +427,9 @@ class SQLConnector(BaseConnector):
 
     async def get_permissions(self, account_id: str) -> List[str]:
         """Get permissions for user."""
+        return await self._run_sync(self._sync_get_permissions, account_id)
+
+    def _sync_get_permissions(self, account_id: str) -> List[str]:
         try:
             with self.engine.connect() as conn:
                 result = conn.execute(
@@ -311,6 +444,9 @@ class SQLConnector(BaseConnector):
 
     async def ensure_tables_exist(self):
         """Create tables if they don't exist."""
+        return await self._run_sync(self._sync_ensure_tables_exist)
+
+    def _sync_ensure_tables_exist(self):
         try:
             self.metadata.create_all(self.engine)
             logger.info("SQL tables ensured")
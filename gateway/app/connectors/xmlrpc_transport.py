@@ -0,0 +1,39 @@
+"""
+Transport XML-RPC sur httpx (connexions keep-alive partagees).
+"""
+from typing import Any
+import xmlrpc.client
+import httpx
+
+
+class HTTPXTransport(xmlrpc.client.Transport):
+    """
+    Transport XML-RPC qui envoie les requetes via un httpx.Client.
+
+    Le client garde ses connexions ouvertes et peut etre utilise depuis
+    plusieurs threads : un meme ServerProxy sert tout le pool d'execution.
+    """
+
+    def __init__(self, client: httpx.Client, scheme: str = "http", use_datetime: bool = True):
+        super().__init__(use_datetime=use_datetime)
+        self._client = client
+        self._scheme = scheme
+
+    def request(self, host: str, handler: str, request_body: bytes, verbose: bool = False) -> Any:
+        response = self._client.post(
+            f"{self._scheme}://{host}{handler}",
+            content=request_body,
+            headers={"Content-Type": "text/xml"}
+        )
+        if response.status_code != 200:
+            raise xmlrpc.client.ProtocolError(
+                host + handler,
+                response.status_code,
+                response.reason_phrase,
+                dict(response.headers)
+            )
+
+        parser, unmarshaller = self.getparser()
+        parser.feed(response.content)
+        parser.close()
+        return unmarshaller.close()
@@ -0,0 +1,118 @@
+"""
+Regroupement des ecritures d'audit.
+Les entrees sont mises en file puis ecrites par lots dans le memory_store.
+"""
+from typing import Any, Dict, List, Optional
+import asyncio
+import structlog
+
+from app.core.memory_store import memory_store
+
+logger = structlog.get_logger()
+
+# Marqueur de fin mis en file par stop() : le worker vide son lot puis s'arrete
+_STOP = object()
+
+
+class AsyncBatcher:
+    """Accumule des elements et les traite par lots (taille ou delai max)."""
+
+    def __init__(self, max_batch_size: int = 256, max_delay: float = 0.05):
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def process_batch(self, batch: List[Any]) -> None:
+        """Traite un lot d'elements (a surcharger)."""
+        raise NotImplementedError
+
+    async def process(self, item: Any) -> None:
+        """Met un element en file et retourne immediatement."""
+        if self._worker is None:
+            # Batcher non demarre (hors lifespan) : traitement direct
+            await self.process_batch([item])
+            return
+        self._queue.put_nowait(item)
+
+    async def start(self) -> None:
+        """Demarre la tache de fond qui vide la file."""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Arrete la tache de fond (sans l'annuler : le lot en cours est traite), puis vide la file.
+
+        timeout: duree max de l'arret ; au-dela, le traitement en cours est annule.
+        """
+        if self._worker is None:
+            return
+        self._queue.put_nowait(_STOP)
+        try:
+            await asyncio.wait_for(self._finish(), timeout)
+        except asyncio.TimeoutError:
+            unprocessed = 0
+            while not self._queue.empty():
+                unprocessed += len(self._drain())
+            logger.error(
+                "Batch processing cancelled at shutdown",
+                batcher=self.__class__.__name__,
+                unprocessed=unprocessed
+            )
+        self._worker = None
+
+    async def _finish(self) -> None:
+        await self._worker
+        while not self._queue.empty():
+            await self._flush(self._drain())
+
+    def _drain(self) -> List[Any]:
+        batch = []
+        while not self._queue.empty() and len(batch) < self.max_batch_size:
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                batch.append(item)
+        return batch
+
+    async def _flush(self, batch: List[Any]) -> None:
+        if not batch:
+            return
+        try:
+            await self.process_batch(batch)
+        except Exception as e:
+            logger.error("Batch processing failed", size=len(batch), error=str(e))
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    await self._flush(batch)
+                    return
+                batch.append(item)
+            await self._flush(batch)
+
+
+class AuditBatcher(AsyncBatcher):
+    """Ecrit les logs d'audit par lots via memory_store."""
+
+    async def process_batch(self, batch: List[Dict[str, Any]]) -> None:
+        memory_store.add_audit_logs_bulk(batch)
+
+
+# Instance globale
+audit_batcher = AuditBatcher(max_batch_size=256, max_delay=0.05)
@@ -0,0 +1,34 @@
+"""
+Taches de fond executees en parallele.
+"""
+import asyncio
+
+import structlog
+from fastapi import BackgroundTasks
+
+logger = structlog.get_logger()
+
+
+class GatherBackgroundTasks(BackgroundTasks):
+    """BackgroundTasks dont les taches s'executent via asyncio.gather."""
+
+    async def __call__(self) -> None:
+        results = await asyncio.gather(
+            *(task() for task in self.tasks),
+            return_exceptions=True
+        )
+        # Une tache en echec n'interrompt pas les autres, mais reste visible
+        for task, result in zip(self.tasks, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    "Background task failed",
+                    task=getattr(task.func, "__qualname__", repr(task.func)),
+                    error=str(result)
+                )
+
+
+def get_bg(background_tasks: BackgroundTasks) -> GatherBackgroundTasks:
+    """Fournit un GatherBackgroundTasks rattache a la reponse de la requete."""
+    tasks = GatherBackgroundTasks()
+    background_tasks.add_task(tasks)
+    return tasks
@@ -0,0 +1,155 @@
+"""
+Cache Redis partage entre les workers (lectures frequentes des API).
+Les erreurs Redis sont ignorees: l'appelant retombe sur la source.
+"""
+from typing import Any, AsyncIterator, Optional
+import time
+
+import orjson
+import redis.asyncio as redis
+import structlog
+
+from app.core.config import settings
+from app.core.responses import encode_json
+
+logger = structlog.get_logger()
+
+
+class RedisCache:
+    """Client Redis paresseux, desactive temporairement apres une erreur."""
+
+    def __init__(self, url: str, retry_after: float = 30.0):
+        self.url = url
+        self.retry_after = retry_after
+        self._client: Optional[redis.Redis] = None
+        self._disabled_until = 0.0
+
+    def _get_client(self) -> Optional[redis.Redis]:
+        if time.monotonic() < self._disabled_until:
+            return None
+        if self._client is None:
+            self._client = redis.Redis.from_url(
+                self.url,
+                socket_timeout=0.1,
+                socket_connect_timeout=0.1
+            )
+        return self._client
+
+    def _mark_unavailable(self, error: Exception) -> None:
+        self._disabled_until = time.monotonic() + self.retry_after
+        logger.warning("Redis cache unavailable", error=str(error))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Valeur brute de key, ou None (absente ou Redis indisponible)."""
+        client = self._get_client()
+        if client is None:
+            return None
+        try:
+            return await client.get(key)
+        except (redis.RedisError, OSError) as e:
+            self._mark_unavailable(e)
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        """Stocke une valeur brute avec une expiration en secondes."""
+        client = self._get_client()
+        if client is None:
+            return
+        try:
+            await client.set(key, value, ex=ttl)
+        except (redis.RedisError, OSError) as e:
+            self._mark_unavailable(e)
+
+    async def get_json(self, key: str) -> Optional[Any]:
+        """Valeur JSON decodee de key, ou None."""
+        raw = await self.get(key)
+        return orjson.loads(raw) if raw is not None else None
+
+    async def set_json(self, key: str, value: Any, ttl: int) -> None:
+        """Stocke value encodee en JSON."""
+        await self.set(key, encode_json(value), ttl)
+
+    async def delete(self, *keys: str) -> None:
+        """Supprime les cles donnees."""
+        client = self._get_client()
+        if client is None or not keys:
+            return
+        try:
+            await client.unlink(*keys)
+        except (redis.RedisError, OSError) as e:
+            self._mark_unavailable(e)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        """Supprime toutes les cles commencant par prefix (SCAN, par lots)."""
+        client = self._get_client()
+        if client is None:
+            return
+        try:
+            batch = []
+            async for key in client.scan_iter(match=f"{prefix}*", count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    await client.unlink(*batch)
+                    batch = []
+            if batch:
+                await client.unlink(*batch)
+        except (redis.RedisError, OSError) as e:
+            self._mark_unavailable(e)
+
+    async def incr(self, key: str) -> Optional[int]:
+        """Incremente le compteur key ; None si Redis indisponible."""
+        client = self._get_client()
+        if client is None:
+            return None
+        try:
+            return await client.incr(key)
+        except (redis.RedisError, OSError) as e:
+            self._mark_unavailable(e)
+            return None
+
+    async def set_nx(self, key: str, value: bytes, ttl: int) -> Optional[bool]:
+        """Pose key seulement si elle est absente ; False si deja prise, None si Redis indisponible."""
+        client = self._get_client()
+        if client is None:
+            return None
+        try:
+            return bool(await client.set(key, value, ex=ttl, nx=True))
+        except (redis.RedisError, OSError) as e:
+            self._mark_unavailable(e)
+            return None
+
+    async def publish(self, channel: str, message: bytes) -> int:
+        """Publie message ; retourne le nombre d'abonnes atteints (0 si Redis indisponible)."""
+        client = self._get_client()
+        if client is None:
+            return 0
+        try:
+            return await client.publish(channel, message)
+        except (redis.RedisError, OSError) as e:
+            self._mark_unavailable(e)
+            return 0
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        """
+        Messages publies sur channel, sur une connexion dediee sans timeout de lecture.
+        Les erreurs Redis sont propagees a l'appelant (qui se reabonne).
+        """
+        client = redis.Redis.from_url(self.url, socket_connect_timeout=1.0)
+        try:
+            async with client.pubsub() as pubsub:
+                await pubsub.subscribe(channel)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        yield message["data"]
+        finally:
+            await client.aclose()
+
+    async def close(self) -> None:
+        """Ferme la connexion Redis."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Instance globale
+cache = RedisCache(settings.REDIS_URL)
@@ -6,8 +6,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 import threading
 import asyncio
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy import text
 import structlog
 import uuid
@@ -36,9 +35,7 @@ class DatabaseStore:
             return
         self._initialized = True
         self.engine = create_async_engine(settings.DATABASE_URL, echo=False)
-        self.async_session = sessionmaker(
-            self.engine, class_=AsyncSession, expire_on_commit=False
-        )
+        self.async_session = async_sessionmaker(self.engine, expire_on_commit=False)
         # Cache local pour acces rapide (synchronise avec DB)
         self._operations_cache: Dict[str, Any] = {}
         self._audit_cache: List[Dict[str, Any]] = []
@@ -0,0 +1,109 @@
+"""
+Evenements d'approbation traites en tache de fond.
+Le handler HTTP publie l'evenement et repond sans attendre le provisionnement.
+Les evenements transitent par Redis pub/sub : chaque worker les recoit,
+un seul (verrou SET NX) poursuit l'operation.
+Le traitement (poursuite du provisionnement) est injecte au demarrage.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+
+import orjson
+import redis.asyncio as redis
+import structlog
+
+from app.core.audit_batcher import AsyncBatcher
+from app.core.cache import cache
+from app.core.responses import encode_json
+
+logger = structlog.get_logger()
+
+APPROVAL_CHANNEL = "approvals"
+OPERATION_LOCK_PREFIX = "lock:op:"
+OPERATION_LOCK_TTL = 60  # secondes
+RESUBSCRIBE_DELAY = 30.0  # secondes
+SHUTDOWN_TIMEOUT = 30.0  # secondes laissees aux provisionnements en cours a l'arret
+
+
+class ApprovalDispatcher(AsyncBatcher):
+    """Poursuit le provisionnement des operations approuvees."""
+
+    async def process_batch(self, batch: List[Dict[str, Any]]) -> None:
+        if self._handler is None:
+            logger.error(
+                "No approval handler configured",
+                operation_ids=[event["operation_id"] for event in batch]
+            )
+            return
+        results = await asyncio.gather(
+            *(self._handler(event["operation_id"]) for event in batch),
+            return_exceptions=True
+        )
+        for event, result in zip(batch, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    "Failed to continue provisioning",
+                    operation_id=event["operation_id"],
+                    error=str(result)
+                )
+            else:
+                logger.info("Provisioning continued after approval", operation_id=event["operation_id"])
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._listener: Optional[asyncio.Task] = None
+        self._handler: Optional[Callable[[str], Awaitable[Any]]] = None
+
+    def set_handler(self, handler: Callable[[str], Awaitable[Any]]) -> None:
+        """Definit la coroutine appelee avec l'operation_id de chaque evenement."""
+        self._handler = handler
+
+    async def publish(self, event: Dict[str, Any]) -> None:
+        """Diffuse l'evenement a tous les workers ; traitement local si aucun ne l'a recu."""
+        if not await cache.publish(APPROVAL_CHANNEL, encode_json(event)):
+            await self.process(event)
+
+    async def start(self) -> None:
+        """Demarre le traitement local et l'abonnement au canal Redis."""
+        await super().start()
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Se desabonne puis vide la file locale."""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await super().stop(timeout=SHUTDOWN_TIMEOUT)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async for data in cache.subscribe(APPROVAL_CHANNEL):
+                    await self._claim_and_process(data)
+            except (redis.RedisError, OSError) as e:
+                logger.warning("Approval channel unavailable", error=str(e))
+            await asyncio.sleep(RESUBSCRIBE_DELAY)
+
+    async def _claim_and_process(self, data: bytes) -> None:
+        # Tous les workers recoivent l'evenement : le premier a poser le verrou le traite
+        try:
+            event = orjson.loads(data)
+        except orjson.JSONDecodeError as e:
+            logger.error("Invalid approval event", error=str(e))
+            return
+        lock_key = f"{OPERATION_LOCK_PREFIX}{event['operation_id']}"
+        claimed = await cache.set_nx(lock_key, b"1", OPERATION_LOCK_TTL)
+        if claimed is None:
+            # Verrou impossible a poser : mieux vaut un traitement en double qu'une approbation perdue
+            logger.warning("Approval lock unavailable, processing locally", operation_id=event["operation_id"])
+        if claimed is not False:
+            await self.process(event)
+
+
+# Instance globale (pas d'attente de regroupement: chaque evenement part aussitot)
+approval_bus = ApprovalDispatcher(max_batch_size=16, max_delay=0.0)
@@ -1,35 +1,100 @@
 """
 Configuration du logging structure
 """
+from typing import Optional
+import queue
+import threading
 import structlog
 import logging
 import sys
+import orjson
 
 from app.core.config import settings
 
 
+class QueueBytesLogger:
+    """Logger structlog qui met les lignes rendues en file (aucune ecriture dans l'appelant)."""
+
+    def __init__(self, log_queue: queue.SimpleQueue):
+        self._queue = log_queue
+
+    def msg(self, message: bytes) -> None:
+        self._queue.put(message)
+
+    log = debug = info = warn = warning = msg
+    fatal = failure = err = error = critical = exception = msg
+
+
+class LogWriter:
+    """Thread unique qui vide la file de logs vers la sortie standard."""
+
+    def __init__(self):
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Ecrit les lignes restantes puis arrete le thread."""
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        out = sys.stdout.buffer
+        while True:
+            message = self.queue.get()
+            if message is None:
+                break
+            lines = [message]
+            # Regroupe ce qui s'est accumule en une seule ecriture
+            while not self.queue.empty():
+                message = self.queue.get()
+                if message is None:
+                    self.queue.put(None)
+                    break
+                lines.append(message)
+            out.write(b"\n".join(lines) + b"\n")
+            out.flush()
+
+
+# Instance globale
+log_writer = LogWriter()
+
+
 def setup_logging():
     """Configure structured logging."""
+    level = getattr(logging, settings.LOG_LEVEL.upper())
+
+    # Filtrage par niveau a la creation du logger (appels sous le niveau = no-op),
+    # rendu JSON via orjson directement en bytes, ecriture par le thread log_writer
+    log_writer.start()
     structlog.configure(
         processors=[
-            structlog.stdlib.filter_by_level,
-            structlog.stdlib.add_logger_name,
-            structlog.stdlib.add_log_level,
-            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.contextvars.merge_contextvars,
+            structlog.processors.add_log_level,
             structlog.processors.TimeStamper(fmt="iso"),
             structlog.processors.StackInfoRenderer(),
             structlog.processors.format_exc_info,
-            structlog.processors.UnicodeDecoder(),
-            structlog.processors.JSONRenderer()
+            structlog.processors.JSONRenderer(serializer=orjson.dumps)
         ],
         context_class=dict,
-        logger_factory=structlog.stdlib.LoggerFactory(),
-        wrapper_class=structlog.stdlib.BoundLogger,
+        logger_factory=lambda *args: QueueBytesLogger(log_writer.queue),
+        wrapper_class=structlog.make_filtering_bound_logger(level),
         cache_logger_on_first_use=True,
     )
 
     logging.basicConfig(
         format="%(message)s",
         stream=sys.stdout,
-        level=getattr(logging, settings.LOG_LEVEL.upper()),
+        level=level,
     )
+
+
+def shutdown_logging():
+    """Vide la file de logs (a appeler a l'arret)."""
+    log_writer.stop()
@@ -3,22 +3,55 @@ Stockage pour les operations et reconciliations.
 Utilise PostgreSQL pour persister les donnees entre redemarrages.
 Les donnees de demo ne sont plus generees - seules les vraies operations sont enregistrees.
 """
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional, Set
 from datetime import datetime
 import threading
 import asyncio
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+import heapq
+import itertools
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy import text
 import structlog
 import uuid
 import json
+import orjson
 
 from app.core.config import settings
 
 logger = structlog.get_logger()
 
 
+def _decode_json_column(values: List[Any]) -> List[Any]:
+    """
+    Decode une colonne JSON de toutes les lignes en un seul orjson.loads.
+
+    Les valeurs deja decodees (dict/list) sont conservees, None reste None.
+    """
+    if not any(isinstance(v, (str, bytes)) for v in values):
+        return values
+    parts = []
+    for v in values:
+        if v is None:
+            parts.append(b"null")
+        elif isinstance(v, str):
+            parts.append(v.encode())
+        elif isinstance(v, bytes):
+            parts.append(v)
+        else:
+            parts.append(orjson.dumps(v))
+    try:
+        return orjson.loads(b"[" + b",".join(parts) + b"]")
+    except orjson.JSONDecodeError:
+        # Ligne invalide: decodage ligne par ligne, valeur brute conservee
+        decoded = []
+        for v, part in zip(values, parts):
+            try:
+                decoded.append(orjson.loads(part))
+            except orjson.JSONDecodeError:
+                decoded.append(v)
+        return decoded
+
+
 class MemoryStore:
     """Stockage persistant dans PostgreSQL."""
 
@@ -38,15 +71,16 @@ class MemoryStore:
             return
         self._initialized = True
         self.engine = create_async_engine(settings.DATABASE_URL, echo=False)
-        self.async_session = sessionmaker(
-            self.engine, class_=AsyncSession, expire_on_commit=False
-        )
+        self.async_session = async_sessionmaker(self.engine, expire_on_commit=False)
         # Cache local pour acces rapide (synchronise avec DB)
         self.operations: Dict[str, Any] = {}
         self.reconciliation_jobs: Dict[str, Any] = {}
         self.audit_logs: List[Dict[str, Any]] = []
         self.discrepancies: Dict[str, List[Any]] = {}
         self.workflows: Dict[str, Any] = {}
+        # Index des workflows en attente : ids, et ids par approbateur
+        self._pending_workflows: Set[str] = set()
+        self._pending_by_approver: Dict[str, Set[str]] = {}
         self._cache_loaded = False
         # NE PAS charger de donnees de demo - on charge depuis la DB
 
@@ -71,16 +105,18 @@ class MemoryStore:
                     LIMIT 500
                 """))
                 rows = result.fetchall()
+                op_attributes = _decode_json_column([row[6] for row in rows])
+                op_calculated = _decode_json_column([row[7] for row in rows])
 
                 self.operations = {}
-                for row in rows:
+                for row, attributes, calculated in zip(rows, op_attributes, op_calculated):
                     op_id = str(row[0])
                     # Parse target_systems from comma-separated string
                     target_system_str = row[4] or ""
                     target_systems = target_system_str.split(",") if target_system_str else []
 
                     # Build calculated_attributes structure
-                    calc_attrs = row[7] or {}
+                    calc_attrs = calculated or {}
                     if target_systems and not calc_attrs:
                         # Create structure for display
                         calc_attrs = {ts: {} for ts in target_systems}
@@ -92,7 +128,7 @@ class MemoryStore:
                         "status": row[3],
                         "target_systems": target_systems,
                         "account_id": row[5],
-                        "user_data": row[6] or {},
+                        "user_data": attributes or {},
                         "calculated_attributes": calc_attrs,
                         "message": row[8] or "",
                         "timestamp": row[9].isoformat() if row[9] else datetime.utcnow().isoformat(),
@@ -108,9 +144,10 @@ class MemoryStore:
                     LIMIT 1000
                 """))
                 rows = result.fetchall()
+                log_details = _decode_json_column([row[8] for row in rows])
 
                 self.audit_logs = []
-                for i, row in enumerate(rows):
+                for i, (row, details) in enumerate(zip(rows, log_details)):
                     self.audit_logs.append({
                         "id": i + 1,
                         "db_id": str(row[0]),
@@ -121,7 +158,7 @@ class MemoryStore:
                         "action": row[5] or "-",
                         "severity": row[6] or "info",
                         "actor": row[7] or "system",
-                        "details": row[8] or {}
+                        "details": details or {}
                     })
 
                 # Charger les jobs de reconciliation
@@ -160,9 +197,12 @@ class MemoryStore:
                     LIMIT 200
                 """))
                 rows = result.fetchall()
+                wf_contexts = _decode_json_column([row[9] for row in rows])
 
                 self.workflows = {}
-                for row in rows:
+                self._pending_workflows = set()
+                self._pending_by_approver = {}
+                for row, context in zip(rows, wf_contexts):
                     wf_id = str(row[0])
                     pending_approvers_str = row[8] or ""
                     pending_approvers = pending_approvers_str.split(",") if pending_approvers_str else []
@@ -177,7 +217,7 @@ class MemoryStore:
                         "user_name": row[6] or "",
                         "operation_name": row[7] or "",
                         "pending_approvers": pending_approvers,
-                        "context": row[9] or {},
+                        "context": context or {},
                         "approve_token": row[10],
                         "reject_token": row[11],
                         "email_sent": row[12] or False,
@@ -186,6 +226,7 @@ class MemoryStore:
                         "created_at": row[15].isoformat() if row[15] else datetime.utcnow().isoformat(),
                         "expires_at": row[16].isoformat() if row[16] else None
                     }
+                    self._index_workflow(wf_id, None, self.workflows[wf_id])
 
                 logger.info(
                     "Database cache loaded",
@@ -214,48 +255,13 @@ class MemoryStore:
     def save_operation(self, operation_id: str, operation_data: Dict[str, Any]) -> None:
         """Sauvegarde une operation dans PostgreSQL et le cache."""
         # Mettre a jour le cache immediatement
-        self.operations[operation_id] = {
-            **operation_data,
-            "operation_id": operation_id,
-            "saved_at": datetime.utcnow().isoformat()
-        }
+        self._cache_operation(operation_id, operation_data)
 
         # Sauvegarder en DB de maniere asynchrone
         async def _save():
             try:
                 async with self.async_session() as session:
-                    account_id = operation_data.get("account_id", "")
-                    status = operation_data.get("status", "pending")
-                    target_systems = operation_data.get("target_systems", [])
-                    target_system = ",".join(target_systems) if isinstance(target_systems, list) else str(target_systems)
-                    attributes = operation_data.get("user_data", operation_data.get("attributes", {}))
-                    calculated = operation_data.get("calculated_attributes", {})
-                    message = operation_data.get("message", "")
-
-                    await session.execute(text("""
-                        INSERT INTO provisioning_operations
-                        (id, request_id, operation_type, status, target_system, identity_id, identity_type,
-                         attributes, calculated_attributes, error_message, created_at)
-                        VALUES (:id, :request_id, :op_type, :status, :target, :identity, :identity_type,
-                                CAST(:attrs AS jsonb), CAST(:calc AS jsonb), :msg, :created)
-                        ON CONFLICT (id) DO UPDATE SET
-                            status = EXCLUDED.status,
-                            calculated_attributes = EXCLUDED.calculated_attributes,
-                            error_message = EXCLUDED.error_message,
-                            updated_at = CURRENT_TIMESTAMP
-                    """), {
-                        "id": operation_id,
-                        "request_id": operation_id[:8],
-                        "op_type": operation_data.get("operation", "create"),
-                        "status": status,
-                        "target": target_system,
-                        "identity": account_id,
-                        "identity_type": "employee",
-                        "attrs": json.dumps(attributes) if attributes else "{}",
-                        "calc": json.dumps(calculated) if calculated else "{}",
-                        "msg": message,
-                        "created": datetime.utcnow()
-                    })
+                    await self._upsert_operation(session, operation_id, operation_data)
                     await session.commit()
                     logger.info("Operation saved to database", operation_id=operation_id)
             except Exception as e:
@@ -263,6 +269,76 @@ class MemoryStore:
 
         self._run_async(_save())
 
+    def save_operation_with_audit(
+        self,
+        operation_id: str,
+        operation_data: Dict[str, Any],
+        log_entry: Dict[str, Any]
+    ) -> None:
+        """Sauvegarde une operation et son entree d'audit dans une seule transaction."""
+        self._cache_operation(operation_id, operation_data)
+        params = self._normalize_audit_entry(log_entry)
+
+        async def _save():
+            try:
+                async with self.async_session() as session:
+                    await self._upsert_operation(session, operation_id, operation_data)
+                    await self._insert_audit_logs(session, [params])
+                    await session.commit()
+                    logger.info("Operation and audit log saved to database", operation_id=operation_id)
+            except Exception as e:
+                logger.error("Failed to save operation with audit log to DB", error=str(e))
+
+        self._run_async(_save())
+
+    def _cache_operation(self, operation_id: str, operation_data: Dict[str, Any]) -> None:
+        """Met a jour l'operation dans le cache local."""
+        self.operations[operation_id] = {
+            **operation_data,
+            "operation_id": operation_id,
+            "saved_at": datetime.utcnow().isoformat()
+        }
+
+    async def _upsert_operation(
+        self,
+        session: AsyncSession,
+        operation_id: str,
+        operation_data: Dict[str, Any]
+    ) -> None:
+        """INSERT ... ON CONFLICT d'une operation (sans commit)."""
+        account_id = operation_data.get("account_id", "")
+        status = operation_data.get("status", "pending")
+        target_systems = operation_data.get("target_systems", [])
+        target_system = ",".join(target_systems) if isinstance(target_systems, list) else str(target_systems)
+        attributes = operation_data.get("user_data", operation_data.get("attributes", {}))
+        calculated = operation_data.get("calculated_attributes", {})
+        message = operation_data.get("message", "")
+
+        await session.execute(text("""
+            INSERT INTO provisioning_operations
+            (id, request_id, operation_type, status, target_system, identity_id, identity_type,
+             attributes, calculated_attributes, error_message, created_at)
+            VALUES (:id, :request_id, :op_type, :status, :target, :identity, :identity_type,
+                    CAST(:attrs AS jsonb), CAST(:calc AS jsonb), :msg, :created)
+            ON CONFLICT (id) DO UPDATE SET
+                status = EXCLUDED.status,
+                calculated_attributes = EXCLUDED.calculated_attributes,
+                error_message = EXCLUDED.error_message,
+                updated_at = CURRENT_TIMESTAMP
+        """), {
+            "id": operation_id,
+            "request_id": operation_id[:8],
+            "op_type": operation_data.get("operation", "create"),
+            "status": status,
+            "target": target_system,
+            "identity": account_id,
+            "identity_type": "employee",
+            "attrs": json.dumps(attributes) if attributes else "{}",
+            "calc": json.dumps(calculated) if calculated else "{}",
+            "msg": message,
+            "created": datetime.utcnow()
+        })
+
     def get_operation(self, operation_id: str) -> Optional[Dict[str, Any]]:
         """Recupere une operation par ID."""
         return self.operations.get(operation_id)
@@ -272,19 +348,47 @@ class MemoryStore:
         account_id: Optional[str] = None,
         status: Optional[str] = None,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        fields: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
-        """Liste les operations avec filtres."""
-        ops = list(self.operations.values())
+        """
+        Liste les operations avec filtres.
+
+        fields: champs a retourner avec leur valeur par defaut
+        (None = operations completes).
+        """
+        return list(self.iter_operations(account_id, status, limit, offset, fields))
+
+    def iter_operations(
+        self,
+        account_id: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        fields: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Parcourt une page d'operations sans la materialiser.
+
+        Seules les offset + limit plus recentes sont selectionnees (tas borne),
+        la projection sur fields est faite a la volee.
+        """
+        ops = self.operations.values()
 
         if account_id:
-            ops = [o for o in ops if o.get("account_id") == account_id]
+            ops = (o for o in ops if o.get("account_id") == account_id)
 
         if status:
-            ops = [o for o in ops if o.get("status") == status]
+            ops = (o for o in ops if o.get("status") == status)
 
-        ops.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-        return ops[offset:offset + limit]
+        newest = heapq.nlargest(offset + limit, ops, key=lambda x: x.get("timestamp", ""))
+        page = itertools.islice(newest, offset, None)
+
+        if fields is None:
+            yield from page
+            return
+        for op in page:
+            yield {field: op.get(field, default) for field, default in fields.items()}
 
     def update_operation(self, operation_id: str, updates: Dict[str, Any]) -> None:
         """Met a jour une operation."""
@@ -327,8 +431,8 @@ class MemoryStore:
         return self.discrepancies.get(job_id, [])
 
     # Audit Logs
-    def add_audit_log(self, log_entry: Dict[str, Any]) -> None:
-        """Ajoute une entree d'audit dans PostgreSQL et le cache."""
+    def _normalize_audit_entry(self, log_entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Ajoute une entree d'audit au cache et retourne les parametres SQL."""
         target_systems = log_entry.get("target_systems", [])
         target_system = target_systems[0] if target_systems else log_entry.get("target_system", "")
 
@@ -362,32 +466,48 @@ class MemoryStore:
         if len(self.audit_logs) > 1000:
             self.audit_logs = self.audit_logs[:1000]
 
-        # Sauvegarder en DB
+        return {
+            "id": log_id,
+            "ts": datetime.utcnow(),
+            "event_type": event_type,
+            "target": target_system,
+            "identity": log_entry.get("account_id", log_entry.get("job_id", "")),
+            "action": action or log_entry.get("action", "-"),
+            "status": severity,
+            "actor": log_entry.get("actor", "system"),
+            "details": json.dumps(log_entry)
+        }
+
+    def add_audit_log(self, log_entry: Dict[str, Any]) -> None:
+        """Ajoute une entree d'audit dans PostgreSQL et le cache."""
+        self.add_audit_logs_bulk([log_entry])
+
+    def add_audit_logs_bulk(self, log_entries: List[Dict[str, Any]]) -> None:
+        """Ajoute plusieurs entrees d'audit en une seule transaction."""
+        if not log_entries:
+            return
+        params = [self._normalize_audit_entry(entry) for entry in log_entries]
+
+        # Sauvegarder en DB (un seul INSERT executemany)
         async def _save():
             try:
                 async with self.async_session() as session:
-                    await session.execute(text("""
-                        INSERT INTO audit_logs
-                        (id, timestamp, event_type, target_system, identity_id, action, status, actor, details)
-                        VALUES (:id, :ts, :event_type, :target, :identity, :action, :status, :actor, CAST(:details AS jsonb))
-                    """), {
-                        "id": log_id,
-                        "ts": datetime.utcnow(),
-                        "event_type": event_type,
-                        "target": target_system,
-                        "identity": log_entry.get("account_id", log_entry.get("job_id", "")),
-                        "action": action or log_entry.get("action", "-"),
-                        "status": severity,
-                        "actor": log_entry.get("actor", "system"),
-                        "details": json.dumps(log_entry)
-                    })
+                    await self._insert_audit_logs(session, params)
                     await session.commit()
-                    logger.info("Audit log saved to database", event_type=event_type)
+                    logger.info("Audit logs saved to database", count=len(params))
             except Exception as e:
                 logger.error("Failed to save audit log to DB", error=str(e))
 
         self._run_async(_save())
 
+    async def _insert_audit_logs(self, session: AsyncSession, params: List[Dict[str, Any]]) -> None:
+        """INSERT des entrees d'audit normalisees (sans commit)."""
+        await session.execute(text("""
+            INSERT INTO audit_logs
+            (id, timestamp, event_type, target_system, identity_id, action, status, actor, details)
+            VALUES (:id, :ts, :event_type, :target, :identity, :action, :status, :actor, CAST(:details AS jsonb))
+        """), params)
+
     def get_recent_logs(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Recupere les logs recents."""
         return self.audit_logs[:limit]
@@ -424,10 +544,12 @@ class MemoryStore:
 
     def save_workflow(self, workflow_id: str, workflow_data: Dict[str, Any]) -> None:
         """Sauvegarde un workflow dans PostgreSQL et le cache."""
+        previous = self.workflows.get(workflow_id)
         self.workflows[workflow_id] = {
             **workflow_data,
             "saved_at": datetime.utcnow().isoformat()
         }
+        self._index_workflow(workflow_id, previous, self.workflows[workflow_id])
 
         # Sauvegarder en DB de maniere asynchrone
         async def _save():
@@ -500,6 +622,42 @@ class MemoryStore:
         wfs.sort(key=lambda x: x.get("created_at", ""), reverse=True)
         return wfs[offset:offset + limit]
 
+    def list_pending_workflows(
+        self,
+        approver: Optional[str] = None,
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """Workflows en attente (tous, ou ceux d'un approbateur), les plus recents d'abord."""
+        if approver is None:
+            ids = self._pending_workflows
+        else:
+            ids = self._pending_by_approver.get(approver, ())
+        return heapq.nlargest(
+            limit,
+            (self.workflows[wf_id] for wf_id in ids),
+            key=lambda wf: wf.get("created_at", "")
+        )
+
+    def _index_workflow(
+        self,
+        workflow_id: str,
+        previous: Optional[Dict[str, Any]],
+        workflow: Dict[str, Any]
+    ) -> None:
+        """Met a jour l'index des workflows en attente apres un enregistrement."""
+        if previous is not None:
+            self._pending_workflows.discard(workflow_id)
+            for approver in previous.get("pending_approvers") or []:
+                ids = self._pending_by_approver.get(approver)
+                if ids is not None:
+                    ids.discard(workflow_id)
+                    if not ids:
+                        del self._pending_by_approver[approver]
+        if workflow.get("status") == "pending":
+            self._pending_workflows.add(workflow_id)
+            for approver in workflow.get("pending_approvers") or []:
+                self._pending_by_approver.setdefault(approver, set()).add(workflow_id)
+
 
 # Instance globale
 memory_store = MemoryStore()
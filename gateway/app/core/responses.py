@@ -0,0 +1,60 @@
+"""
+Reponses JSON serialisees directement avec orjson, et validation par ETag.
+"""
+from typing import Any
+import hashlib
+
+import orjson
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+
+def _default(obj: Any) -> Any:
+    """Convertit les objets non supportes nativement par orjson."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    return jsonable_encoder(obj)
+
+
+def encode_json(content: Any) -> bytes:
+    """Encode en JSON avec orjson (modeles pydantic compris)."""
+    return orjson.dumps(content, default=_default)
+
+
+def orjson_response(content: Any, status_code: int = 200) -> Response:
+    """Construit une reponse JSON sans passer par jsonable_encoder + json.dumps."""
+    return Response(
+        content=encode_json(content),
+        status_code=status_code,
+        media_type="application/json"
+    )
+
+
+def make_etag(*parts: Any) -> str:
+    """ETag faible derive des champs (ou du corps encode) d'une version de la ressource."""
+    if len(parts) == 1 and isinstance(parts[0], bytes):
+        data = parts[0]
+    else:
+        data = orjson.dumps(parts, default=str)
+    digest = hashlib.blake2b(data, digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+
+def not_modified(request: Request, response: Response, etag: str) -> bool:
+    """Positionne l'ETag et indique si le client possede deja cette version."""
+    response.headers["ETag"] = etag
+    return etag_matches(request, etag)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Indique si If-None-Match designe deja cette version."""
+    candidates = request.headers.get("if-none-match")
+    if not candidates:
+        return False
+    return any(tag.strip() in (etag, "*") for tag in candidates.split(","))
+
+
+def not_modified_response(etag: str) -> Response:
+    """Reponse 304 sans corps."""
+    return Response(status_code=304, headers={"ETag": etag})
@@ -0,0 +1,37 @@
+"""
+Memoisation partagee (Redis) des attributs calcules par le moteur de regles.
+En cas d'indisponibilite de Redis, le calcul est fait localement.
+
+Les cles incluent une version des regles tenue dans Redis (commune a tous
+les workers et survivant aux redemarrages) : la changer rend les anciens
+resultats inaccessibles, ils expirent ensuite via RULE_CACHE_TTL.
+"""
+from typing import Any, Awaitable, Callable
+
+from app.core.cache import cache
+from app.core.config import settings
+
+KEY_PREFIX = "rules:calc:"
+VERSION_KEY = "rules:version"
+
+
+async def bump_version() -> None:
+    """Invalide les resultats partages de tous les workers."""
+    if settings.RULE_CACHE_ENABLED:
+        await cache.incr(VERSION_KEY)
+
+
+async def get_or_compute(key: bytes, compute: Callable[[], Awaitable[Any]]) -> Any:
+    """Retourne la valeur en cache pour key, sinon la calcule et la stocke."""
+    if not settings.RULE_CACHE_ENABLED:
+        return await compute()
+
+    version = await cache.get(VERSION_KEY)
+    redis_key = f"{KEY_PREFIX}{(version or b'0').decode()}:{key.hex()}"
+    cached = await cache.get_json(redis_key)
+    if cached is not None:
+        return cached
+
+    value = await compute()
+    await cache.set_json(redis_key, value, settings.RULE_CACHE_TTL)
+    return value
@@ -2,7 +2,7 @@
 Module de securite - Authentication et Authorization
 """
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Iterable, Optional
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
@@ -68,14 +68,20 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
     return {"username": username, "roles": payload.get("roles", [])}
 
 
-def require_role(required_roles: list):
+def require_role(required_roles: Iterable[str]):
     """Dependency to require specific roles."""
+    allowed = frozenset(required_roles)
+
     async def role_checker(current_user: dict = Depends(get_current_user)):
-        user_roles = current_user.get("roles", [])
-        if not any(role in user_roles for role in required_roles):
+        if allowed.isdisjoint(current_user.get("roles", ())):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Insufficient permissions"
             )
         return current_user
     return role_checker
+
+
+# Dependances de role partagees par les routes
+ADMIN_ONLY = require_role(["admin"])
+ADMIN_OR_ENGINEER = require_role(["admin", "iam_engineer"])
@@ -0,0 +1,56 @@
+"""
+Ordonnancement borne des taches de fond.
+Un semaphore par type de tache (rollback, reconcile, cache_sync) limite
+le nombre de jobs simultanes; les suivants attendent leur tour.
+"""
+from typing import Any, Awaitable, Callable, Dict, Set
+import asyncio
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+_semaphores: Dict[str, asyncio.Semaphore] = {}
+_detached: Set[asyncio.Task] = set()
+
+
+def _semaphore(limit_key: str) -> asyncio.Semaphore:
+    semaphore = _semaphores.get(limit_key)
+    if semaphore is None:
+        semaphore = _semaphores[limit_key] = asyncio.Semaphore(settings.MAX_BG_TASKS)
+    return semaphore
+
+
+async def schedule(
+    limit_key: str,
+    func: Callable[..., Awaitable[Any]],
+    *args: Any,
+    **kwargs: Any
+) -> Any:
+    """
+    Execute func(*args, **kwargs) quand une place est libre pour limit_key.
+
+    La coroutine n'est creee qu'une fois la place obtenue.
+    """
+    async with _semaphore(limit_key):
+        return await func(*args, **kwargs)
+
+
+def spawn(
+    limit_key: str,
+    func: Callable[..., Awaitable[Any]],
+    *args: Any,
+    **kwargs: Any
+) -> asyncio.Task:
+    """Lance schedule() dans une tache detachee (ex: reponse d'erreur sans BackgroundTasks)."""
+    task = asyncio.create_task(schedule(limit_key, func, *args, **kwargs))
+    _detached.add(task)
+
+    def _done(t: asyncio.Task) -> None:
+        _detached.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            logger.error("Background task failed", limit_key=limit_key, error=str(t.exception()))
+
+    task.add_done_callback(_done)
+    return task
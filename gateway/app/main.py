@@ -10,12 +10,27 @@ import structlog
 from app.api import provision, rules, workflow, reconcile, ai_assistant, admin, live_comparison, permissions, connectors
 from app.core.config import settings
 from app.core.database import init_db
-from app.core.logging import setup_logging
+from app.core.logging import setup_logging, shutdown_logging
 from app.core.memory_store import memory_store
+from app.core.audit_batcher import audit_batcher
+from app.core.cache import cache
+from app.core.events import approval_bus
+from app.core.task_scheduler import spawn
+from app.connectors.connector_factory import warmup_connectors
+from app.services.provision_service import get_provision_service
 
 logger = structlog.get_logger()
 
 
+async def continue_after_approval(operation_id: str):
+    """Poursuit le provisionnement d'une operation approuvee."""
+    return await get_provision_service().continue_after_approval(operation_id)
+
+
+# Evenements d'approbation (branches ici : app.core ne depend pas des services)
+approval_bus.set_handler(continue_after_approval)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle management for the application."""
@@ -25,8 +40,17 @@ async def lifespan(app: FastAPI):
     # Charger les donnees depuis PostgreSQL
     await memory_store.ensure_cache_loaded()
     logger.info("Database cache loaded successfully")
+    await audit_batcher.start()
+    await approval_bus.start()
+    if settings.CONNECTOR_WARMUP:
+        # Pools/clients des connecteurs ouverts en arriere-plan (le demarrage n'attend pas les cibles)
+        spawn("connector_warmup", warmup_connectors)
     yield
+    await approval_bus.stop()
+    await audit_batcher.stop()
+    await cache.close()
     logger.info("Shutting down Gateway IAM")
+    shutdown_logging()
 
 
 app = FastAPI(
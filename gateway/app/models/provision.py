@@ -2,6 +2,7 @@
 Modeles pour les operations de provisionnement
 """
 from sqlmodel import SQLModel, Field
+from pydantic import BaseModel, PrivateAttr
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -41,7 +42,9 @@ class TargetSystem(str, Enum):
 
 
 # Request/Response Schemas
-class ProvisioningRequest(SQLModel):
+# BaseModel plutot que SQLModel: validation directe par pydantic-core,
+# sans la surcouche d'initialisation SQLModel (non-table) a chaque requete.
+class ProvisioningRequest(BaseModel):
     """Requete de provisionnement depuis MidPoint."""
     operation: OperationType
     target_systems: List[TargetSystem]
@@ -51,8 +54,19 @@ class ProvisioningRequest(SQLModel):
     correlation_id: Optional[str] = None
     require_approval: Optional[bool] = False
 
+    # Valeurs des systemes cibles, calculees une fois apres validation
+    _target_values: List[str] = PrivateAttr(default_factory=list)
 
-class ProvisioningResponse(SQLModel):
+    def model_post_init(self, __context: Any) -> None:
+        self._target_values = [t.value for t in self.target_systems]
+
+    @property
+    def target_values(self) -> List[str]:
+        """Noms des systemes cibles (str)."""
+        return self._target_values
+
+
+class ProvisioningResponse(BaseModel):
     """Reponse de provisionnement vers MidPoint."""
     status: OperationStatus
     operation_id: str
@@ -62,6 +76,17 @@ class ProvisioningResponse(SQLModel):
     errors: Optional[List[Dict[str, str]]] = None
 
 
+class BatchProvisioningItem(BaseModel):
+    """Element d'un lot de provisionnement."""
+    id: str
+    body: ProvisioningRequest
+
+
+class BatchProvisioningRequest(BaseModel):
+    """Lot de requetes de provisionnement (format type Microsoft Graph)."""
+    requests: List[BatchProvisioningItem]
+
+
 # Database Models
 class ProvisioningOperation(SQLModel, table=True):
     """Operation de provisionnement en base."""
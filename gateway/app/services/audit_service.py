@@ -3,7 +3,7 @@ Service d'audit et de logs
 """
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
-import json
+import orjson
 import structlog
 
 from app.models.audit import (
@@ -31,7 +31,7 @@ class AuditService:
     - Metriques
     """
 
-    def __init__(self, session):
+    def __init__(self, session=None):
         self.session = session
         self._vector_store = None  # Qdrant client
 
@@ -56,7 +56,7 @@ class AuditService:
             target_system=target_system,
             actor=actor,
             action=action,
-            details=json.dumps(details),
+            details=orjson.dumps(details, option=orjson.OPT_NON_STR_KEYS).decode(),
             ip_address=ip_address
         )
 
@@ -79,7 +79,6 @@ class AuditService:
     async def _index_log_entry(self, log_entry: AuditLog) -> None:
         """Indexe une entree de log dans le vector store."""
         # Generate summary for embedding
-        details = json.loads(log_entry.details)
         summary = f"{log_entry.event_type.value}: {log_entry.action}"
 
         if log_entry.account_id:
@@ -109,7 +108,7 @@ class AuditService:
             details={
                 "operation_id": operation.id,
                 "operation_type": operation.operation_type.value,
-                "target_systems": json.loads(operation.target_systems)
+                "target_systems": orjson.loads(operation.target_systems)
             },
             operation_id=operation.id,
             account_id=operation.account_id,
@@ -338,3 +337,17 @@ class AuditService:
             "active_workflows": 0,
             "errors_last_24h": 0
         }
+
+
+# Singleton instance for the service
+_audit_service: Optional[AuditService] = None
+
+
+def get_audit_service() -> AuditService:
+    """Get or create the audit service."""
+    global _audit_service
+
+    if _audit_service is None:
+        _audit_service = AuditService()
+
+    return _audit_service
@@ -16,7 +16,7 @@ from app.models.provision import (
     OperationStatus,
     TargetSystem
 )
-from app.connectors.midpoint_connector import MidPointConnector
+from app.connectors.midpoint_connector import MidPointConnector, AssignRoleResult
 from app.core.config import settings
 from app.core.memory_store import memory_store
 
@@ -95,7 +95,7 @@ class MidPointProvisionService:
             "account_id": request.account_id,
             "status": OperationStatus.IN_PROGRESS.value,
             "target_systems": ["MIDPOINT"],  # MidPoint is the only direct target
-            "original_targets": [t.value for t in request.target_systems],
+            "original_targets": request.target_values,
             "user_data": request.attributes,
             "created_by": created_by,
             "created_at": datetime.utcnow().isoformat(),
@@ -293,9 +293,9 @@ class MidPointProvisionService:
         """
         return await self.midpoint.get_user_shadows(account_id)
 
-    async def assign_role(self, account_id: str, role_name: str) -> bool:
+    async def assign_role(self, account_id: str, role_name: str) -> AssignRoleResult:
         """Assign a role to a user (triggers provisioning to role's Resources)."""
-        return await self.midpoint.assign_role(account_id, role_name)
+        return await self.midpoint.try_assign_role(account_id, role_name)
 
     async def remove_role(self, account_id: str, role_name: str) -> bool:
         """Remove a role from a user (may trigger deprovisioning)."""
@@ -339,12 +339,12 @@ class MidPointProvisionService:
 _midpoint_service: Optional[MidPointProvisionService] = None
 
 
-async def get_midpoint_provision_service(session=None) -> MidPointProvisionService:
-    """Get or create the MidPoint provision service."""
+async def get_midpoint_provision_service() -> MidPointProvisionService:
+    """Get or create the MidPoint provision service (usable as a FastAPI dependency)."""
     global _midpoint_service
 
     if _midpoint_service is None:
-        _midpoint_service = MidPointProvisionService(session)
+        _midpoint_service = MidPointProvisionService()
         await _midpoint_service.initialize()
 
     return _midpoint_service
@@ -4,6 +4,7 @@ Service de provisionnement multi-cibles
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import json
+import orjson
 import structlog
 
 from app.models.provision import (
@@ -16,10 +17,17 @@ from app.models.provision import (
     TargetAccountState
 )
 from app.connectors.connector_factory import ConnectorFactory
+from app.core.cache import cache
+from app.core.config import settings
 from app.core.memory_store import memory_store
+from app.services.rule_engine import get_rule_engine
 
 logger = structlog.get_logger()
 
+# Operations en attente d'approbation, partagees entre les workers
+# (l'approbation peut etre traitee par un autre worker que celui qui l'a creee)
+OPERATION_STATE_PREFIX = "op:state:"
+
 
 class ProvisionService:
     """
@@ -31,7 +39,7 @@ class ProvisionService:
     - Cache d'etat des comptes
     """
 
-    def __init__(self, session):
+    def __init__(self, session=None):
         self.session = session
         self.connector_factory = ConnectorFactory()
 
@@ -46,7 +54,7 @@ class ProvisionService:
             operation_type=request.operation,
             account_id=request.account_id,
             status=OperationStatus.PENDING,
-            target_systems=json.dumps([t.value for t in request.target_systems]),
+            target_systems=json.dumps(request.target_values),
             input_attributes=json.dumps(request.attributes),
             policy_id=request.policy_id,
             created_by=created_by
@@ -84,7 +92,7 @@ class ProvisionService:
         operation.calculated_attributes = json.dumps(calculated_attributes)
         operation.updated_at = datetime.utcnow()
 
-        target_systems = json.loads(operation.target_systems)
+        target_systems = orjson.loads(operation.target_systems)
         results = {}
         rollback_actions = []
 
@@ -198,7 +206,7 @@ class ProvisionService:
 
             try:
                 connector = self.connector_factory.get_connector(action.target_system.value)
-                action_data = json.loads(action.action_data)
+                action_data = orjson.loads(action.action_data)
 
                 if action.action_type == "delete":
                     await connector.delete_account(action_data["account_id"])
@@ -244,9 +252,24 @@ class ProvisionService:
         # Upsert in DB
         # ...
 
+    async def share_operation(self, operation_id: str, operation_data: Dict[str, Any]) -> None:
+        """Publie une operation en attente dans Redis (lisible par tous les workers)."""
+        await cache.set_json(
+            OPERATION_STATE_PREFIX + operation_id,
+            operation_data,
+            settings.WORKFLOW_DEFAULT_TIMEOUT_HOURS * 3600
+        )
+
     async def get_operation(self, operation_id: str) -> Optional[Dict[str, Any]]:
-        """Recupere une operation par ID."""
-        return memory_store.get_operation(operation_id)
+        """Recupere une operation par ID (memory_store, sinon Redis si creee par un autre worker)."""
+        operation = memory_store.get_operation(operation_id)
+        if operation is None:
+            shared = await cache.get_json(OPERATION_STATE_PREFIX + operation_id)
+            if shared is not None:
+                # Copie locale : update_operation ne modifie que les operations en cache
+                memory_store.save_operation(operation_id, shared)
+                operation = memory_store.get_operation(operation_id)
+        return operation
 
     async def list_operations(
         self,
@@ -273,12 +296,20 @@ class ProvisionService:
         # operation est un dictionnaire
         calculated_attrs = operation.get("calculated_attributes", {})
         if isinstance(calculated_attrs, str):
-            calculated_attrs = json.loads(calculated_attrs)
+            calculated_attrs = orjson.loads(calculated_attrs)
 
         # Executer le provisionnement avec les donnees du dictionnaire
         target_systems = operation.get("target_systems", [])
         account_id = operation.get("account_id", "")
         user_data = operation.get("user_data", {})
+
+        # Regles non calculees a la demande (workflow sans email): les appliquer maintenant
+        if not calculated_attrs and target_systems:
+            calculated_attrs = await get_rule_engine().calculate_attributes(
+                attributes={**user_data, "account_id": account_id},
+                target_systems=target_systems,
+                policy_id=operation.get("policy_id")
+            )
         results = {}
 
         # Mettre a jour le statut
@@ -327,6 +358,10 @@ class ProvisionService:
             })
             raise
 
+        finally:
+            # Operation terminee : plus besoin de la partager
+            await cache.delete(OPERATION_STATE_PREFIX + operation_id)
+
     async def cancel_operation(self, operation_id: str, reason: str) -> None:
         """Annule une operation en attente."""
         operation = await self.get_operation(operation_id)
@@ -334,3 +369,17 @@ class ProvisionService:
             operation.status = OperationStatus.REJECTED
             operation.error_message = reason
             operation.updated_at = datetime.utcnow()
+
+
+# Singleton instance for the service
+_provision_service: Optional[ProvisionService] = None
+
+
+def get_provision_service() -> ProvisionService:
+    """Get or create the provision service."""
+    global _provision_service
+
+    if _provision_service is None:
+        _provision_service = ProvisionService()
+
+    return _provision_service
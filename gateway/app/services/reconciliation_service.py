@@ -53,7 +53,7 @@ class ReconciliationService:
     - Synchronisation du cache
     """
 
-    def __init__(self, session):
+    def __init__(self, session=None):
         self.session = session
         self.connector_factory = ConnectorFactory()
         self.midpoint_client = MidPointClient()
@@ -152,10 +152,9 @@ class ReconciliationService:
                         })
 
                 # Check for orphan accounts in target
-                target_accounts = await connector.list_accounts()
                 midpoint_ids = {a["id"] for a in midpoint_accounts}
 
-                for target_acc in target_accounts:
+                async for target_acc in connector.iter_accounts():
                     if target_acc.get("id") not in midpoint_ids:
                         discrepancies.append(Discrepancy(
                             id=f"disc-{len(discrepancies)}",
@@ -266,23 +265,14 @@ class ReconciliationService:
         if discrepancy_ids:
             discrepancies = [d for d in discrepancies if d.id in discrepancy_ids]
 
+        if action == "use_midpoint":
+            # Sync from MidPoint to target: un appel groupe par cible et type
+            resolved_count = await self._push_midpoint_values(discrepancies, errors)
+            discrepancies = []
+
         for disc in discrepancies:
             try:
-                if action == "use_midpoint":
-                    # Sync from MidPoint to target
-                    connector = self.connector_factory.get_connector(disc.target_system)
-                    if disc.discrepancy_type == "missing_in_target":
-                        await connector.create_account(
-                            disc.account_id,
-                            disc.midpoint_value
-                        )
-                    elif disc.discrepancy_type == "attribute_mismatch":
-                        await connector.update_account(
-                            disc.account_id,
-                            disc.midpoint_value
-                        )
-
-                elif action == "use_target":
+                if action == "use_target":
                     # Sync from target to MidPoint
                     await self.midpoint_client.update_account(
                         disc.account_id,
@@ -315,6 +305,43 @@ class ReconciliationService:
             "errors": errors
         }
 
+    async def _push_midpoint_values(
+        self,
+        discrepancies: List[Discrepancy],
+        errors: List[Dict[str, Any]]
+    ) -> int:
+        """Applique les valeurs MidPoint sur les cibles via les appels groupes des connecteurs."""
+        groups: Dict[tuple, List[Discrepancy]] = {}
+        for disc in discrepancies:
+            groups.setdefault((disc.target_system, disc.discrepancy_type), []).append(disc)
+
+        resolved_count = 0
+        for (target_system, discrepancy_type), group in groups.items():
+            rows = [(disc.account_id, disc.midpoint_value) for disc in group]
+            try:
+                connector = self.connector_factory.get_connector(target_system)
+                if discrepancy_type == "missing_in_target":
+                    results = await connector.bulk_create_accounts(rows)
+                elif discrepancy_type == "attribute_mismatch":
+                    results = await connector.bulk_update_accounts(rows)
+                else:
+                    results = [{} for _ in group]
+            except Exception as e:
+                errors.extend({"discrepancy_id": disc.id, "error": str(e)} for disc in group)
+                continue
+
+            # Un resultat par ligne : seules les lignes en echec restent non resolues
+            now = datetime.utcnow()
+            for disc, result in zip(group, results):
+                if result.get("status") == "failed":
+                    errors.append({"discrepancy_id": disc.id, "error": result.get("error")})
+                    continue
+                disc.resolved = True
+                disc.resolved_at = now
+                resolved_count += 1
+
+        return resolved_count
+
     async def sync_cache(
         self,
         target_systems: Optional[List[TargetSystem]] = None
@@ -324,9 +351,7 @@ class ReconciliationService:
 
         for target in targets:
             connector = self.connector_factory.get_connector(target.value)
-            accounts = await connector.list_accounts()
-
-            for account in accounts:
+            async for account in connector.iter_accounts():
                 state = TargetAccountState(
                     account_id=account.get("id"),
                     target_system=target,
@@ -346,3 +371,17 @@ class ReconciliationService:
             "by_system": {},
             "last_sync": None
         }
+
+
+# Singleton instance for the service
+_reconciliation_service: Optional[ReconciliationService] = None
+
+
+def get_reconciliation_service() -> ReconciliationService:
+    """Get or create the reconciliation service."""
+    global _reconciliation_service
+
+    if _reconciliation_service is None:
+        _reconciliation_service = ReconciliationService()
+
+    return _reconciliation_service
@@ -1,11 +1,15 @@
 """
 Moteur de regles dynamiques pour le calcul des attributs
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass
 from datetime import datetime
+import asyncio
+import hashlib
 import json
 import time
-from jinja2 import Environment, BaseLoader, sandbox
+from cachetools import LRUCache, TTLCache
+from jinja2 import Environment, BaseLoader, Template, sandbox
 import structlog
 
 from app.models.rules import (
@@ -13,6 +17,7 @@ from app.models.rules import (
     RuleType, RuleStatus, RuleTestResponse
 )
 from app.models.provision import TargetSystem
+from app.core import rule_cache
 
 logger = structlog.get_logger()
 
@@ -90,6 +95,14 @@ class SafeJinjaEnvironment(sandbox.SandboxedEnvironment):
         return text.strip('-')
 
 
+@dataclass
+class CompiledRule:
+    """Regle avec son expression compilee et ses conditions decodees."""
+    rule: Rule
+    template: Optional[Template]
+    conditions: Optional[Dict[str, Any]]
+
+
 class RuleEngine:
     """
     Moteur de regles pour le calcul dynamique des attributs.
@@ -101,10 +114,35 @@ class RuleEngine:
     - Tests de regles
     """
 
-    def __init__(self, session):
+    # Environnement Jinja2 partage entre toutes les instances
+    jinja_env = SafeJinjaEnvironment()
+
+    # Regles compilees par (policy_id, version des regles, cible), partagees entre instances
+    _compiled_rules: LRUCache = LRUCache(maxsize=256)
+    _rules_version: int = 0
+    # Lectures de regles et politiques (get/list), invalidees a chaque ecriture
+    _catalog_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+
+    def __init__(self, session=None):
         self.session = session
-        self.jinja_env = SafeJinjaEnvironment()
         self._rules_cache = {}
+        # Resultats recents de calculate_attributes (cle incluant la version des regles)
+        self._results_cache: TTLCache = TTLCache(maxsize=4096, ttl=60)
+        self._inflight: Dict[Tuple[int, bytes], asyncio.Future] = {}
+
+    @staticmethod
+    def _results_key(
+        attributes: Dict[str, Any],
+        target_systems: List[TargetSystem],
+        policy_id: Optional[str]
+    ) -> bytes:
+        """Cle stable pour (policy_id, attributs, systemes cibles), hors version des regles."""
+        targets = sorted(t.value if isinstance(t, TargetSystem) else t for t in target_systems)
+        payload = json.dumps(
+            [policy_id, sorted(attributes.items()), targets],
+            default=str
+        )
+        return hashlib.blake2b(payload.encode(), digest_size=16).digest()
 
     async def calculate_attributes(
         self,
@@ -115,6 +153,9 @@ class RuleEngine:
         """
         Calcule les attributs pour chaque systeme cible.
 
+        Les resultats sont mis en cache 60s (puis partages via Redis) et
+        les calculs identiques simultanes sont fusionnes.
+
         Args:
             attributes: Attributs source depuis MidPoint
             target_systems: Liste des systemes cibles
@@ -123,41 +164,52 @@ class RuleEngine:
         Returns:
             Dict avec attributs calcules par systeme cible
         """
-        results = {}
-
-        # Load applicable rules
-        rules = await self._get_applicable_rules(target_systems, policy_id)
-
-        for target in target_systems:
-            target_name = target.value if isinstance(target, TargetSystem) else target
-            results[target_name] = {}
-
-            # Get rules for this target, sorted by priority
-            target_rules = sorted(
-                [r for r in rules if r.target_system == target_name],
-                key=lambda r: r.priority,
-                reverse=True
-            )
-
-            # Build context with source attributes
-            context = {**attributes}
-
-            # Apply each rule
-            for rule in target_rules:
+        key = self._results_key(attributes, target_systems, policy_id)
+        # Version locale pour le cache du processus ; Redis tient la version partagee
+        local_key = (RuleEngine._rules_version, key)
+
+        results = self._results_cache.get(local_key)
+        if results is None:
+            pending = self._inflight.get(local_key)
+            if pending is not None:
+                results = await asyncio.shield(pending)
+            else:
+                pending = asyncio.get_running_loop().create_future()
+                self._inflight[local_key] = pending
                 try:
-                    value = self._execute_rule(rule, context)
-                    results[target_name][rule.target_attribute] = value
-                    # Add to context for subsequent rules
-                    context[rule.target_attribute] = value
-
-                except Exception as e:
-                    logger.error(
-                        "Rule execution failed",
-                        rule_id=rule.id,
-                        rule_name=rule.name,
-                        error=str(e)
+                    results = await rule_cache.get_or_compute(
+                        key,
+                        lambda: self._calculate_attributes(attributes, target_systems, policy_id)
                     )
-                    # Continue with other rules
+                    self._results_cache[local_key] = results
+                    pending.set_result(results)
+                except asyncio.CancelledError:
+                    pending.cancel()
+                    raise
+                except Exception as e:
+                    pending.set_exception(e)
+                    # Evite "Future exception was never retrieved" sans attente
+                    pending.exception()
+                    raise
+                finally:
+                    del self._inflight[local_key]
+
+        # Copie pour que l'appelant ne modifie pas le cache
+        return {target: dict(values) for target, values in results.items()}
+
+    async def _calculate_attributes(
+        self,
+        attributes: Dict[str, Any],
+        target_systems: List[TargetSystem],
+        policy_id: Optional[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Evalue les regles pour chaque systeme cible (sans cache), en parallele."""
+        target_names = [t.value if isinstance(t, TargetSystem) else t for t in target_systems]
+        per_target = await asyncio.gather(*[
+            self.calculate_for(target, attributes, policy_id)
+            for target in target_systems
+        ])
+        results = dict(zip(target_names, per_target))
 
         logger.info(
             "Attributes calculated",
@@ -167,17 +219,98 @@ class RuleEngine:
 
         return results
 
-    def _execute_rule(self, rule: Rule, context: Dict[str, Any]) -> Any:
-        """Execute une regle individuelle."""
+    async def calculate_for(
+        self,
+        target: TargetSystem,
+        attributes: Dict[str, Any],
+        policy_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Calcule les attributs pour un seul systeme cible."""
+        result = {}
+
+        # Build context with source attributes
+        context = {**attributes}
+
+        # Apply each rule (sorted by priority)
+        for compiled in await self._get_compiled_rules(target, policy_id):
+            rule = compiled.rule
+            try:
+                value = self._execute_rule(rule, context, compiled.template, compiled.conditions)
+                result[rule.target_attribute] = value
+                # Add to context for subsequent rules
+                context[rule.target_attribute] = value
+
+            except Exception as e:
+                logger.error(
+                    "Rule execution failed",
+                    rule_id=rule.id,
+                    rule_name=rule.name,
+                    error=str(e)
+                )
+                # Continue with other rules
+
+        return result
+
+    async def _get_compiled_rules(
+        self,
+        target: TargetSystem,
+        policy_id: Optional[str] = None
+    ) -> List[CompiledRule]:
+        """Regles compilees d'une cible, triees par priorite (cache LRU)."""
+        target_name = target.value if isinstance(target, TargetSystem) else target
+        key = (policy_id, RuleEngine._rules_version, target_name)
+
+        compiled = self._compiled_rules.get(key)
+        if compiled is None:
+            rules = await self._get_applicable_rules([target], policy_id)
+            compiled = [
+                self._compile_rule(rule)
+                for rule in sorted(
+                    [r for r in rules if r.target_system == target_name],
+                    key=lambda r: r.priority,
+                    reverse=True
+                )
+            ]
+            self._compiled_rules[key] = compiled
+        return compiled
+
+    def _compile_rule(self, rule: Rule) -> CompiledRule:
+        """Compile l'expression et decode les conditions d'une regle."""
+        try:
+            template = self.jinja_env.from_string(rule.expression)
+        except Exception:
+            # Erreur remontee a l'execution, comme pour une regle non compilee
+            template = None
+        conditions = json.loads(rule.conditions) if rule.conditions else None
+        return CompiledRule(rule=rule, template=template, conditions=conditions)
+
+    @classmethod
+    async def _bump_rules_version(cls) -> None:
+        """Invalide les regles compilees, les lectures et les resultats en cache (locaux et partages)."""
+        cls._rules_version += 1
+        cls._compiled_rules.clear()
+        cls._catalog_cache.clear()
+        await rule_cache.bump_version()
+
+    def _execute_rule(
+        self,
+        rule: Rule,
+        context: Dict[str, Any],
+        template: Optional[Template] = None,
+        conditions: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """Execute une regle individuelle (template/conditions precompiles optionnels)."""
         # Check conditions first
         if rule.conditions:
-            conditions = json.loads(rule.conditions)
+            if conditions is None:
+                conditions = json.loads(rule.conditions)
             if not self._evaluate_conditions(conditions, context):
                 return None
 
         # Render expression with Jinja2
         try:
-            template = self.jinja_env.from_string(rule.expression)
+            if template is None:
+                template = self.jinja_env.from_string(rule.expression)
             result = template.render(**context)
 
             # Try to convert to appropriate type
@@ -423,19 +556,23 @@ class RuleEngine:
         # Save to DB (simplified)
         # await self.session.add(rule)
         # await self.session.commit()
+        await self._bump_rules_version()
 
         return rule
 
     async def get_rule(self, rule_id: str) -> Optional[Rule]:
         """Recupere une regle par ID."""
+        key = ("rule", rule_id)
+        if key in self._catalog_cache:
+            return self._catalog_cache[key]
+
         # Simplified - replace with DB query
         default_rules = await self._get_default_rules([
             TargetSystem.LDAP, TargetSystem.SQL, TargetSystem.ODOO
         ])
-        for rule in default_rules:
-            if rule.id == rule_id:
-                return rule
-        return None
+        found = next((rule for rule in default_rules if rule.id == rule_id), None)
+        self._catalog_cache[key] = found
+        return found
 
     async def update_rule(
         self,
@@ -445,12 +582,12 @@ class RuleEngine:
     ) -> Rule:
         """Met a jour une regle existante."""
         # Implementation DB
-        pass
+        await self._bump_rules_version()
 
     async def delete_rule(self, rule_id: str) -> None:
         """Supprime une regle (soft delete)."""
         # Implementation DB
-        pass
+        await self._bump_rules_version()
 
     async def list_rules(
         self,
@@ -459,16 +596,21 @@ class RuleEngine:
         status: Optional[RuleStatus] = None
     ) -> List[Rule]:
         """Liste les regles avec filtres."""
-        rules = await self._get_default_rules([
-            TargetSystem.LDAP, TargetSystem.SQL, TargetSystem.ODOO
-        ])
+        key = ("rules", target_system, rule_type, status)
+        rules = self._catalog_cache.get(key)
+        if rules is None:
+            rules = await self._get_default_rules([
+                TargetSystem.LDAP, TargetSystem.SQL, TargetSystem.ODOO
+            ])
 
-        if target_system:
-            rules = [r for r in rules if r.target_system == target_system]
-        if rule_type:
-            rules = [r for r in rules if r.rule_type == rule_type]
+            if target_system:
+                rules = [r for r in rules if r.target_system == target_system]
+            if rule_type:
+                rules = [r for r in rules if r.rule_type == rule_type]
 
-        return rules
+            self._catalog_cache[key] = rules
+
+        return list(rules)
 
     async def get_rule_versions(self, rule_id: str) -> List[RuleVersion]:
         """Recupere les versions d'une regle."""
@@ -476,11 +618,16 @@ class RuleEngine:
 
     async def restore_version(self, rule_id: str, version: int) -> Rule:
         """Restaure une version de regle."""
-        pass
+        await self._bump_rules_version()
 
     async def list_policies(self) -> List[PolicyConfig]:
         """Liste les politiques."""
-        return []
+        policies = self._catalog_cache.get(("policies",))
+        if policies is None:
+            # Simplified - replace with DB query
+            policies = []
+            self._catalog_cache[("policies",)] = policies
+        return list(policies)
 
     async def create_policy(
         self,
@@ -488,8 +635,30 @@ class RuleEngine:
         created_by: str
     ) -> PolicyConfig:
         """Cree une nouvelle politique."""
+        await self._bump_rules_version()
         return policy
 
     async def get_policy(self, policy_id: str) -> Optional[PolicyConfig]:
         """Recupere une politique."""
-        return None
+        key = ("policy", policy_id)
+        if key in self._catalog_cache:
+            return self._catalog_cache[key]
+
+        # Simplified - replace with DB query
+        policy = None
+        self._catalog_cache[key] = policy
+        return policy
+
+
+# Singleton instance for the service
+_rule_engine: Optional[RuleEngine] = None
+
+
+def get_rule_engine() -> RuleEngine:
+    """Get or create the rule engine."""
+    global _rule_engine
+
+    if _rule_engine is None:
+        _rule_engine = RuleEngine()
+
+    return _rule_engine
@@ -1,11 +1,12 @@
 """
 Service de gestion des workflows d'approbation
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import json
 import uuid
 import structlog
+from cachetools import TTLCache
 
 from app.models.workflow import (
     WorkflowConfig,
@@ -18,12 +19,22 @@ from app.models.workflow import (
     ApproverType,
     WorkflowInstanceResponse
 )
+from app.core.cache import cache
 from app.core.config import settings
 from app.core.memory_store import memory_store
+from app.core.task_scheduler import spawn
 from app.services.email_service import email_service
 
 logger = structlog.get_logger()
 
+# Cles du cache Redis des lectures de workflow (voir api/workflow.py)
+CONFIG_CACHE_PREFIX = "wf:cfg:"
+INSTANCE_CACHE_PREFIX = "wf:inst:"
+INSTANCE_LIST_CACHE_PREFIX = "wf:list:"
+HISTORY_CACHE_PREFIX = "wf:hist:"
+# Etat des workflows d'approbation par email, partage entre les workers
+STATE_PREFIX = "wf:state:"
+
 
 class WorkflowService:
     """
@@ -36,8 +47,36 @@ class WorkflowService:
     - Notifications (a integrer)
     """
 
-    def __init__(self, session):
+    def __init__(self, session=None):
         self.session = session
+        # Droits d'approbation recents: instance_id -> {user_id: bool} (TTL 30s)
+        self._can_approve_cache: TTLCache = TTLCache(maxsize=4096, ttl=30)
+
+    async def _invalidate_configs(self) -> None:
+        """Invalide le cache des configurations."""
+        await cache.delete_prefix(CONFIG_CACHE_PREFIX)
+
+    async def _invalidate_instance(self, instance_id: Optional[str] = None) -> None:
+        """Invalide le cache d'une instance; les listes sont purgees en tache de fond."""
+        if instance_id:
+            await cache.delete(INSTANCE_CACHE_PREFIX + instance_id, HISTORY_CACHE_PREFIX + instance_id)
+        spawn("cache_invalidation", cache.delete_prefix, INSTANCE_LIST_CACHE_PREFIX)
+
+    async def _save_workflow(self, workflow_id: str, workflow_data: Dict[str, Any]) -> None:
+        """Enregistre le workflow dans memory_store et dans Redis (lisible par tous les workers)."""
+        # Le statut peut avoir change : les droits d'approbation en cache ne valent plus
+        self._can_approve_cache.pop(workflow_id, None)
+        memory_store.save_workflow(workflow_id, workflow_data)
+        await cache.set_json(
+            STATE_PREFIX + workflow_id,
+            workflow_data,
+            settings.WORKFLOW_DEFAULT_TIMEOUT_HOURS * 3600
+        )
+
+    async def _load_workflow(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        """Lit le workflow depuis Redis, ou depuis memory_store si absent."""
+        workflow = await cache.get_json(STATE_PREFIX + workflow_id)
+        return workflow if workflow is not None else memory_store.get_workflow(workflow_id)
 
     async def create_config(self, definition: WorkflowDefinition) -> WorkflowConfig:
         """Cree une nouvelle configuration de workflow."""
@@ -51,6 +90,7 @@ class WorkflowService:
         )
 
         # Save to DB
+        await self._invalidate_configs()
         logger.info("Workflow config created", name=config.name)
         return config
 
@@ -64,7 +104,7 @@ class WorkflowService:
         definition: WorkflowDefinition
     ) -> WorkflowConfig:
         """Met a jour une configuration de workflow."""
-        pass
+        await self._invalidate_configs()
 
     async def list_configs(self) -> List[WorkflowConfig]:
         """Liste les configurations de workflow."""
@@ -212,7 +252,8 @@ class WorkflowService:
                 sent=email_result.get("sent")
             )
 
-        memory_store.save_workflow(workflow_id, workflow_data)
+        await self._save_workflow(workflow_id, workflow_data)
+        await self._invalidate_instance()
 
         logger.info(
             "Workflow started",
@@ -274,7 +315,8 @@ class WorkflowService:
         workflow_data["reject_token"] = email_result.get("reject_token")
         workflow_data["email_sent"] = email_result.get("sent", False)
 
-        memory_store.save_workflow(workflow_id, workflow_data)
+        await self._save_workflow(workflow_id, workflow_data)
+        await self._invalidate_instance()
 
         logger.info(
             "Simple approval workflow created",
@@ -300,7 +342,7 @@ class WorkflowService:
         """
         Approuve ou rejette un workflow via un token email.
         """
-        workflow = memory_store.get_workflow(workflow_id)
+        workflow = await self._load_workflow(workflow_id)
         if not workflow:
             return {"success": False, "error": "Workflow non trouve"}
 
@@ -324,7 +366,8 @@ class WorkflowService:
         workflow["decided_at"] = datetime.utcnow().isoformat()
         workflow["decided_by"] = "email_link"
 
-        memory_store.save_workflow(workflow_id, workflow)
+        await self._save_workflow(workflow_id, workflow)
+        await self._invalidate_instance(workflow_id)
 
         # Envoyer notification au demandeur
         context = workflow.get("context", {})
@@ -347,6 +390,7 @@ class WorkflowService:
         return {
             "success": True,
             "workflow_id": workflow_id,
+            "operation_id": workflow.get("operation_id"),
             "action": action,
             "status": new_status,
             "message": f"Demande {'approuvee' if action == 'approve' else 'rejetee'} avec succes"
@@ -377,9 +421,9 @@ class WorkflowService:
         status_str = status.value if status else None
         workflows = memory_store.list_workflows(status=status_str, limit=limit, offset=offset)
 
-        result = []
-        for wf in workflows:
-            result.append(WorkflowInstanceResponse(
+        # Donnees deja typees par memory_store : construction sans revalidation
+        return [
+            WorkflowInstanceResponse.model_construct(
                 id=wf.get("id", ""),
                 workflow_id=wf.get("workflow_id", "wf-default-pre"),
                 operation_id=wf.get("operation_id", ""),
@@ -391,12 +435,15 @@ class WorkflowService:
                 created_at=wf.get("created_at"),
                 user_name=wf.get("user_name", ""),
                 operation_name=wf.get("operation_name", "")
-            ))
-        return result
+            )
+            for wf in workflows
+        ]
 
     async def get_pending_approvals(self, user_id: str) -> List[Dict[str, Any]]:
-        """Recupere les approbations en attente pour un utilisateur."""
-        workflows = memory_store.list_workflows(status="pending")
+        """Recupere les approbations en attente pour un utilisateur (admin: toutes)."""
+        workflows = memory_store.list_pending_workflows(
+            approver=None if user_id == "admin" else user_id
+        )
         return [
             {
                 "id": wf.get("id"),
@@ -408,11 +455,43 @@ class WorkflowService:
                 "created_at": wf.get("created_at")
             }
             for wf in workflows
-            if user_id in wf.get("pending_approvers", []) or user_id == "admin"
         ]
 
-    async def can_approve(self, instance_id: str, user_id: str) -> bool:
-        """Verifie si un utilisateur peut approuver."""
+    async def get_instance_with_auth(
+        self,
+        instance_id: str,
+        user_id: str
+    ) -> Tuple[Optional[WorkflowInstanceResponse], bool]:
+        """Recupere une instance et verifie en une lecture si l'utilisateur peut approuver."""
+        instance = await self.get_instance(instance_id)
+        if not instance:
+            return None, False
+        return instance, await self.can_approve(instance_id, user_id, instance=instance)
+
+    async def can_approve(
+        self,
+        instance_id: str,
+        user_id: str,
+        instance: Optional[WorkflowInstanceResponse] = None
+    ) -> bool:
+        """Verifie si un utilisateur peut approuver (resultat mis en cache)."""
+        decisions = self._can_approve_cache.get(instance_id)
+        if decisions is None:
+            decisions = self._can_approve_cache[instance_id] = {}
+        elif user_id in decisions:
+            return decisions[user_id]
+
+        allowed = await self._check_can_approve(instance_id, user_id, instance)
+        decisions[user_id] = allowed
+        return allowed
+
+    async def _check_can_approve(
+        self,
+        instance_id: str,
+        user_id: str,
+        instance: Optional[WorkflowInstanceResponse] = None
+    ) -> bool:
+        """Verifie les droits d'approbation (sans cache), sur l'instance deja chargee si fournie."""
         # Check if user is in current level approvers
         return True
 
@@ -424,6 +503,8 @@ class WorkflowService:
         comments: Optional[str] = None
     ) -> Dict[str, Any]:
         """Enregistre une decision d'approbation."""
+        self._can_approve_cache.pop(instance_id, None)
+        await self._invalidate_instance(instance_id)
         instance = await self.get_instance(instance_id)
 
         # Create decision record
@@ -479,6 +560,8 @@ class WorkflowService:
 
     async def cancel_instance(self, instance_id: str) -> Dict[str, Any]:
         """Annule une instance de workflow."""
+        self._can_approve_cache.pop(instance_id, None)
+        await self._invalidate_instance(instance_id)
         logger.info("Workflow cancelled", instance_id=instance_id)
         return {"cancelled": True}
 
@@ -490,3 +573,17 @@ class WorkflowService:
         """Verifie et traite les workflows expires."""
         # Background task to handle timeouts
         pass
+
+
+# Singleton instance for the service
+_workflow_service: Optional[WorkflowService] = None
+
+
+def get_workflow_service() -> WorkflowService:
+    """Get or create the workflow service."""
+    global _workflow_service
+
+    if _workflow_service is None:
+        _workflow_service = WorkflowService()
+
+    return _workflow_service